@@ -1,34 +1,75 @@
+import hmac
 import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
 from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
 
 from .db import get_db
+from .hashing import ALGORITHM, LEGACY_ITERATIONS, derive, derive_async, target_iterations
+from .tokens import (
+    access_ttl_seconds,
+    decode_access_token,
+    is_revoked,
+    is_signed_token,
+    revoke,
+    sign_access_token,
+    signed_mode,
+)
 
 
-def _pbkdf2(password: str, salt: bytes) -> str:
-    import hashlib
+def _password_fields(salt_hex: str, hash_hex: str, iterations: int) -> dict:
+    return {
+        "password_salt": salt_hex,
+        "password_hash": hash_hex,
+        "password_algo": ALGORITHM,
+        "password_iterations": iterations,
+    }
+
 
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 200_000)
-    return dk.hex()
+def hash_password(password: str) -> dict:
+    salt = secrets.token_hex(16)
+    iterations = target_iterations()
+    return _password_fields(salt, derive(password, salt, iterations), iterations)
 
 
-def hash_password(password: str) -> tuple[str, str]:
-    salt = secrets.token_bytes(16)
-    return salt.hex(), _pbkdf2(password, salt)
+async def hash_password_async(password: str) -> dict:
+    salt = secrets.token_hex(16)
+    iterations = target_iterations()
+    return _password_fields(salt, await derive_async(password, salt, iterations), iterations)
 
 
-def verify_password(password: str, salt_hex: str, hash_hex: str) -> bool:
+def _stored_params(user: dict) -> Optional[tuple]:
+    salt_hex = user.get("password_salt") or ""
+    hash_hex = user.get("password_hash") or ""
+    algo = user.get("password_algo") or ALGORITHM
+    if not salt_hex or not hash_hex or algo != ALGORITHM:
+        return None
     try:
-        salt = bytes.fromhex(salt_hex)
+        bytes.fromhex(salt_hex)
     except ValueError:
+        return None
+    return salt_hex, hash_hex, int(user.get("password_iterations") or LEGACY_ITERATIONS)
+
+
+async def verify_password_async(password: str, user: dict) -> bool:
+    params = _stored_params(user)
+    if not params:
         return False
-    return _pbkdf2(password, salt) == hash_hex
+    salt_hex, hash_hex, iterations = params
+    return hmac.compare_digest(await derive_async(password, salt_hex, iterations), hash_hex)
+
+
+def needs_rehash(user: dict) -> bool:
+    return int(user.get("password_iterations") or LEGACY_ITERATIONS) != target_iterations()
 
 
-def create_session(user_id: ObjectId) -> str:
+def create_session(user_id: ObjectId, kind: str = "session") -> str:
     token = secrets.token_urlsafe(32)
     db = get_db()
     expires = datetime.utcnow() + timedelta(days=7)
@@ -36,6 +77,7 @@ def create_session(user_id: ObjectId) -> str:
         {
             "user_id": user_id,
             "token": token,
+            "kind": kind,
             "expires_at": expires,
             "created_at": datetime.utcnow(),
         }
@@ -43,30 +85,202 @@ def create_session(user_id: ObjectId) -> str:
     return token
 
 
+def issue_tokens(user: dict) -> dict:
+    if not signed_mode():
+        return {"token": create_session(user["_id"])}
+    refresh_token = create_session(user["_id"], kind="refresh")
+    session = get_db().sessions.find_one({"token": refresh_token}, {"_id": 1})
+    return {
+        "token": sign_access_token(user, str(session["_id"])),
+        "refresh_token": refresh_token,
+        "expires_in": access_ttl_seconds(),
+    }
+
+
+def refresh_access_token(refresh_token: str) -> Optional[dict]:
+    if not signed_mode():
+        return None
+    db = get_db()
+    session = db.sessions.find_one({"token": refresh_token, "kind": "refresh"})
+    if not session:
+        return None
+    if session.get("expires_at") and session["expires_at"] < datetime.utcnow():
+        db.sessions.delete_one({"_id": session["_id"]})
+        return None
+    user = db.users.find_one({"_id": session["user_id"]})
+    if not user:
+        return None
+    return {"token": sign_access_token(user, str(session["_id"])), "expires_in": access_ttl_seconds()}
+
+
+_SESSION_CACHE: "OrderedDict[str, dict]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "miss_seconds": 0.0}
+_CACHE_SYNC = {"version": None, "checked_at": 0.0}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _cache_get(token: str) -> Optional[dict]:
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        entry = _SESSION_CACHE.get(token)
+        if not entry:
+            return None
+        if entry["expires"] <= now:
+            _SESSION_CACHE.pop(token, None)
+            return None
+        _SESSION_CACHE.move_to_end(token)
+        return entry["user"]
+
+
+def _cache_put(token: str, user: dict, session_expires: Optional[datetime]) -> None:
+    ttl = _env_float("SESSION_CACHE_TTL_SECONDS", 30)
+    if ttl <= 0:
+        return
+    if session_expires:
+        ttl = min(ttl, (session_expires - datetime.utcnow()).total_seconds())
+    if ttl <= 0:
+        return
+    max_entries = int(_env_float("SESSION_CACHE_MAX_ENTRIES", 1000))
+    with _CACHE_LOCK:
+        _SESSION_CACHE[token] = {"user": user, "expires": time.monotonic() + ttl}
+        _SESSION_CACHE.move_to_end(token)
+        while len(_SESSION_CACHE) > max_entries:
+            _SESSION_CACHE.popitem(last=False)
+            _CACHE_STATS["evictions"] += 1
+
+
+def _evict(token: str | None = None, user_id: ObjectId | None = None) -> None:
+    with _CACHE_LOCK:
+        if token is not None and _SESSION_CACHE.pop(token, None) is not None:
+            _CACHE_STATS["invalidations"] += 1
+        if user_id is not None:
+            for key in [k for k, v in _SESSION_CACHE.items() if v["user"].get("_id") == user_id]:
+                _SESSION_CACHE.pop(key, None)
+                _CACHE_STATS["invalidations"] += 1
+
+
+def _bump_auth_version(db) -> None:
+    db.auth_state.update_one({"_id": "sessions"}, {"$inc": {"version": 1}}, upsert=True)
+
+
+def _sync_auth_version(db) -> None:
+    interval = _env_float("SESSION_CACHE_SYNC_SECONDS", 5)
+    now = time.monotonic()
+    if now - _CACHE_SYNC["checked_at"] < interval:
+        return
+    _CACHE_SYNC["checked_at"] = now
+    doc = db.auth_state.find_one({"_id": "sessions"}) or {}
+    version = doc.get("version", 0)
+    if _CACHE_SYNC["version"] is not None and version != _CACHE_SYNC["version"]:
+        with _CACHE_LOCK:
+            _CACHE_STATS["invalidations"] += len(_SESSION_CACHE)
+            _SESSION_CACHE.clear()
+    _CACHE_SYNC["version"] = version
+
+
+def _user_from_claims(db, token: str) -> Optional[dict]:
+    claims = decode_access_token(token)
+    if not claims or is_revoked(db, claims):
+        return None
+    return {
+        "_id": ObjectId(claims["sub"]),
+        "email": claims.get("email"),
+        "name": claims.get("name"),
+        "role": claims.get("role"),
+        "from_token": True,
+    }
+
+
 def get_user_by_token(token: str) -> Optional[dict]:
     db = get_db()
-    session = db.sessions.find_one({"token": token})
+    if is_signed_token(token):
+        return _user_from_claims(db, token)
+    _sync_auth_version(db)
+    cached = _cache_get(token)
+    if cached is not None:
+        _CACHE_STATS["hits"] += 1
+        return dict(cached)
+
+    _CACHE_STATS["misses"] += 1
+    started = time.perf_counter()
+    session = db.sessions.find_one({"token": token, "kind": {"$ne": "refresh"}})
     if not session:
         return None
     if session.get("expires_at") and session["expires_at"] < datetime.utcnow():
         db.sessions.delete_one({"_id": session["_id"]})
         return None
     user = db.users.find_one({"_id": session["user_id"]})
+    _CACHE_STATS["miss_seconds"] += time.perf_counter() - started
+    if user:
+        _cache_put(token, user, session.get("expires_at"))
+        return dict(user)
+    return user
+
+
+def session_cache_stats() -> dict:
+    hits = _CACHE_STATS["hits"]
+    misses = _CACHE_STATS["misses"]
+    avg_miss = _CACHE_STATS["miss_seconds"] / misses if misses else 0.0
+    with _CACHE_LOCK:
+        size = len(_SESSION_CACHE)
+    return {
+        "size": size,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "evictions": _CACHE_STATS["evictions"],
+        "invalidations": _CACHE_STATS["invalidations"],
+        "avg_lookup_ms": round(avg_miss * 1000, 3),
+        "saved_ms": round(hits * avg_miss * 1000, 1),
+    }
+
+
+def logout(token: str) -> None:
+    db = get_db()
+    if is_signed_token(token):
+        claims = decode_access_token(token, verify_exp=False)
+        if claims and ObjectId.is_valid(claims.get("sid", "")):
+            session = db.sessions.find_one_and_delete({"_id": ObjectId(claims["sid"])}, {"token": 1})
+            revoke(db, "sid", claims["sid"])
+            if session:
+                _evict(token=session["token"])
+            _bump_auth_version(db)
+        return
+    db.sessions.delete_one({"token": token})
+    _evict(token=token)
+    _bump_auth_version(db)
+
+
+def set_user_role(user_id: ObjectId, role: str) -> Optional[dict]:
+    db = get_db()
+    user = db.users.find_one_and_update(
+        {"_id": user_id},
+        {"$set": {"role": role, "updated_at": datetime.utcnow()}},
+        return_document=True,
+    )
+    _evict(user_id=user_id)
+    _bump_auth_version(db)
+    revoke(db, "user", str(user_id))
     return user
 
 
-def create_user(email: str, name: str, password: str, role: str) -> dict:
+def _insert_user(email: str, name: str, role: str, password_fields: dict) -> dict:
     db = get_db()
     existing = db.users.find_one({"email": email})
     if existing:
         raise ValueError("User already exists")
-    salt, hashed = hash_password(password)
     doc = {
         "email": email,
         "name": name,
         "role": role,
-        "password_salt": salt,
-        "password_hash": hashed,
+        **password_fields,
         "created_at": datetime.utcnow(),
         "recommendations": [],
     }
@@ -75,13 +289,32 @@ def create_user(email: str, name: str, password: str, role: str) -> dict:
     return doc
 
 
-def authenticate(email: str, password: str) -> Optional[dict]:
+async def create_user_async(email: str, name: str, password: str, role: str) -> dict:
+    if await run_in_threadpool(get_db().users.find_one, {"email": email}, {"_id": 1}):
+        raise ValueError("User already exists")
+    password_fields = await hash_password_async(password)
+    return await run_in_threadpool(_insert_user, email, name, role, password_fields)
+
+
+async def authenticate_async(email: str, password: str) -> Optional[dict]:
     db = get_db()
-    user = db.users.find_one({"email": email})
+    user = await run_in_threadpool(db.users.find_one, {"email": email})
     if not user:
         return None
-    if not verify_password(password, user.get("password_salt", ""), user.get("password_hash", "")):
+    if not await verify_password_async(password, user):
         return None
+    if needs_rehash(user):
+        password_fields = await hash_password_async(password)
+        await run_in_threadpool(
+            db.users.update_one,
+            {"_id": user["_id"], "password_hash": user.get("password_hash")},
+            {"$set": password_fields},
+        )
+        user.update(password_fields)
+    elif not user.get("password_algo"):
+        params = {"password_algo": ALGORITHM, "password_iterations": LEGACY_ITERATIONS}
+        await run_in_threadpool(db.users.update_one, {"_id": user["_id"]}, {"$set": params})
+        user.update(params)
     return user
 
 
@@ -100,14 +333,12 @@ def ensure_demo_users() -> None:
     name = os.getenv("DEMO_STAFF_NAME", "Demo Staff")
     db = get_db()
     if not db.users.find_one({"email": email}):
-        salt, hashed = hash_password(password)
         db.users.insert_one(
             {
                 "email": email,
                 "name": name,
                 "role": "staff",
-                "password_salt": salt,
-                "password_hash": hashed,
+                **hash_password(password),
                 "created_at": datetime.utcnow(),
                 "recommendations": [],
             }
@@ -137,14 +368,11 @@ def consume_magic_token(token: str) -> Optional[dict]:
     email = f"{role}-{token[:6]}@bookmatch.local"
     user = db.users.find_one({"email": email})
     if not user:
-        salt, hashed = hash_password(secrets.token_urlsafe(12))
         result = db.users.insert_one(
             {
                 "email": email,
                 "name": "Volunteer",
                 "role": role,
-                "password_salt": salt,
-                "password_hash": hashed,
                 "created_at": datetime.utcnow(),
                 "recommendations": [],
             }
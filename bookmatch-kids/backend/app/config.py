@@ -3,6 +3,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+_ENV: dict = {"result": None}
+
 
 def _candidate_paths() -> list[Path]:
     here = Path(__file__).resolve()
@@ -32,6 +34,12 @@ def load_env() -> dict:
     return {"path": None, "loaded": False}
 
 
+def ensure_env() -> dict:
+    if _ENV["result"] is None:
+        _ENV["result"] = load_env()
+    return _ENV["result"]
+
+
 def env_debug() -> dict:
     return {
         "cwd": str(Path.cwd()),
@@ -0,0 +1,348 @@
+import argparse
+import calendar
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from bson import ObjectId
+
+from .auth import hash_password
+from .db import ensure_indexes, get_db
+from .services.analytics import rebuild_rollups
+from .services.catalog import BOOK_SNAPSHOT_FIELDS
+from .services.identity import identity_fields
+from .services.reservations import reservation_ttl, reservations_enabled
+from .services.versions import bump_version
+
+AGE_BANDS = [((3, 6), 4), ((4, 7), 5), ((6, 9), 3), ((7, 10), 6), ((8, 11), 2), ((8, 12), 6), ((9, 12), 4)]
+FORMATS = [("chapter", 15), ("picture", 10), ("graphic", 5)]
+LANGUAGES = [("English", 85), ("Spanish", 10), ("Bilingual", 5)]
+TAGS = [
+    ("animals", 14),
+    ("mystery", 10),
+    ("space", 9),
+    ("science", 7),
+    ("sports", 7),
+    ("adventure", 4),
+    ("community", 3),
+    ("fantasy", 3),
+    ("history", 2),
+    ("friendship", 2),
+]
+TITLE_WORDS = [
+    "Star", "Moon", "Paws", "Garden", "Rocket", "Secret", "River", "Dragon", "Robot", "Castle",
+    "Galaxy", "Forest", "Clue", "Goal", "Ocean", "Comet", "Whisker", "Lantern", "Puzzle", "Thunder",
+]
+TITLE_NOUNS = ["Explorers", "Mystery", "Heroes", "Parade", "Club", "Quest", "Friends", "Adventure", "Tales", "Team"]
+FIRST_NAMES = ["Ana", "Ben", "Chloe", "Diego", "Emma", "Farah", "Gus", "Hana", "Ivan", "Jada", "Kofi", "Lena"]
+SURNAMES = ["Vega", "Hart", "Quinn", "Cruz", "Patel", "Reed", "Kim", "Okafor", "Silva", "Nguyen", "Haddad", "Novak"]
+DESCRIPTION_BITS = {
+    "animals": "a clever cat and a rescue dog",
+    "mystery": "a detective club that follows every clue",
+    "space": "kids who explore new planets",
+    "science": "a curious robot building inventions",
+    "sports": "a soccer team learning fair play",
+    "adventure": "a map to a hidden island",
+    "community": "neighbors planning a town parade",
+    "fantasy": "a friendly dragon and a magic lantern",
+    "history": "a trip back to the first railroads",
+    "friendship": "two new friends at summer camp",
+}
+ROLES = [("parent", 90), ("volunteer", 8), ("staff", 2)]
+OPEN_STATUSES = {"new", "approved", "picked", "packed"}
+STATUS_BY_AGE = [
+    (2, [("new", 5), ("approved", 3), ("picked", 2), ("packed", 2), ("distributed", 1), ("cancelled", 1)]),
+    (7, [("new", 1), ("approved", 2), ("picked", 1), ("packed", 2), ("distributed", 8), ("cancelled", 1)]),
+    (None, [("new", 1), ("distributed", 20), ("cancelled", 3)]),
+]
+QTY_WEIGHTS = [2, 4, 4, 3, 2, 1, 1]
+RESET_COLLECTIONS = ["books", "inventory", "requests", "reservations", "receipts", "analytics_rollups", "sessions"]
+_KINDS = {"books": 1, "users": 2, "sessions": 3, "requests": 4, "reservations": 5, "inventory": 6}
+_STREAMS = {"book": 0, "inventory": 1, "user": 2, "request": 3}
+
+
+def _pick(rng: random.Random, weighted: List[tuple]) -> Any:
+    return rng.choices([value for value, _ in weighted], weights=[weight for _, weight in weighted])[0]
+
+
+def _rng(seed: int, stream: str, index: int) -> random.Random:
+    return random.Random(((seed * 8 + _STREAMS[stream]) << 36) | index)
+
+
+def object_id(kind: str, index: int, seed: int, when: datetime) -> ObjectId:
+    stamp = calendar.timegm(when.utctimetuple())
+    return ObjectId(f"{stamp:08x}{_KINDS[kind]:02x}{seed & 0xFFFFFF:06x}{index & 0xFFFFFFFF:08x}")
+
+
+def isbn13(index: int) -> str:
+    body = f"978{index % 10**9:09d}"
+    check = (10 - sum((1 if i % 2 == 0 else 3) * int(c) for i, c in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+
+def make_book(index: int, seed: int = 7) -> Dict[str, Any]:
+    rng = _rng(seed, "book", index)
+    tags = list(dict.fromkeys(_pick(rng, TAGS) for _ in range(rng.choice([1, 2, 2, 3]))))
+    age_min, age_max = _pick(rng, AGE_BANDS)
+    fmt = _pick(rng, FORMATS)
+    return {
+        "title": f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {rng.choice(TITLE_NOUNS)} {index}",
+        "author": f"{chr(65 + rng.randrange(26))}. {rng.choice(SURNAMES)}",
+        "description": f"A {fmt} book about {' and '.join(DESCRIPTION_BITS[tag] for tag in tags)}.",
+        "tags": tags,
+        "age_min": age_min,
+        "age_max": age_max,
+        "reading_level": "early" if age_max <= 7 else "middle",
+        "language": _pick(rng, LANGUAGES),
+        "format": fmt,
+        "cover_url": "",
+        "isbn": isbn13(index),
+    }
+
+
+def generate_books(count: int, seed: int = 7) -> Iterator[Dict[str, Any]]:
+    for index in range(count):
+        yield make_book(index, seed)
+
+
+def location_ids(count: int) -> List[str]:
+    return ["main"] + [f"branch-{index}" for index in range(1, count)]
+
+
+def inventory_rows(index: int, seed: int, locations: List[str]) -> List[Tuple[str, int]]:
+    rng = _rng(seed, "inventory", index)
+    held = rng.sample(locations, min(len(locations), rng.choice([1, 1, 1, 2, 2, 3])))
+    return [(location, rng.choices(range(len(QTY_WEIGHTS)), weights=QTY_WEIGHTS)[0]) for location in held]
+
+
+def _books(count: int, seed: int, anchor: datetime) -> Iterator[Tuple[str, dict]]:
+    for index in range(count):
+        book = make_book(index, seed)
+        yield "books", {"_id": object_id("books", index, seed, anchor), **book, **identity_fields(book)}
+
+
+def _users(count: int, sessions: int, seed: int, anchor: datetime, password: str) -> Iterator[Tuple[str, dict]]:
+    password_fields = hash_password(password)
+    for index in range(count):
+        rng = _rng(seed, "user", index)
+        created = anchor - timedelta(days=rng.uniform(0, 365))
+        user_id = object_id("users", index, seed, anchor)
+        yield "users", {
+            "_id": user_id,
+            "email": f"user{index}@datagen.local",
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+            "role": _pick(rng, ROLES),
+            **password_fields,
+            "created_at": created,
+            "last_recommendations": [],
+        }
+        for slot in range(sessions):
+            started = anchor - timedelta(days=rng.uniform(0, 14))
+            yield "sessions", {
+                "_id": object_id("sessions", index * sessions + slot, seed, started),
+                "user_id": user_id,
+                "token": f"{rng.getrandbits(256):064x}",
+                "kind": "refresh" if rng.random() < 0.3 else "session",
+                "expires_at": started + timedelta(days=7),
+                "created_at": started,
+            }
+
+
+class _Stock:
+    def __init__(self, seed: int, locations: List[str]) -> None:
+        self.seed = seed
+        self.locations = locations
+        self.reserved: Dict[Tuple[int, str], int] = {}
+
+    def reserve(self, book_index: int, location_id: str) -> str | None:
+        rows = sorted(inventory_rows(book_index, self.seed, self.locations), key=lambda row: row[0] != location_id)
+        for location, qty in rows:
+            key = (book_index, location)
+            if qty - self.reserved.get(key, 0) >= 1:
+                self.reserved[key] = self.reserved.get(key, 0) + 1
+                return location
+        return None
+
+
+def _status(rng: random.Random, age_days: float) -> str:
+    for limit, weights in STATUS_BY_AGE:
+        if limit is None or age_days < limit:
+            return _pick(rng, weights)
+    return "distributed"
+
+
+def _requests(
+    count: int, books: int, users: int, days: int, seed: int, anchor: datetime, stock: _Stock
+) -> Iterator[Tuple[str, dict]]:
+    ttl = reservation_ttl()
+    reserving = reservations_enabled()
+    for index in range(count):
+        rng = _rng(seed, "request", index)
+        age_days = rng.uniform(0, days)
+        created = anchor - timedelta(days=age_days)
+        request_id = object_id("requests", index, seed, created)
+        status = _status(rng, age_days)
+        location_id = rng.choice(stock.locations)
+        picks = list(dict.fromkeys(int(books * rng.random() ** 2) for _ in range(rng.randint(3, 5))))
+        lead = make_book(picks[0], seed)
+        age = rng.randint(lead["age_min"], lead["age_max"])
+        matched = []
+        for rank, book_index in enumerate(picks):
+            book = lead if rank == 0 else make_book(book_index, seed)
+            match = {
+                "book_id": str(object_id("books", book_index, seed, anchor)),
+                "score": round(12 - rank * 1.5 - rng.random(), 2),
+                **{field: book.get(field) or "" for field in BOOK_SNAPSHOT_FIELDS},
+            }
+            if reserving:
+                reserved = stock.reserve(book_index, location_id) if status in OPEN_STATUSES else None
+                match["reserved"] = reserved is not None
+                if reserved:
+                    match["reserved_location"] = reserved
+                    yield "reservations", {
+                        "_id": object_id("reservations", index * 8 + rank, seed, created),
+                        "request_id": request_id,
+                        "book_id": object_id("books", book_index, seed, anchor),
+                        "location_id": reserved,
+                        "qty": 1,
+                        "status": "held",
+                        "created_at": created,
+                        "expires_at": created + ttl,
+                    }
+            matched.append(match)
+        yield "requests", {
+            "_id": request_id,
+            "created_at": created,
+            "updated_at": created if status == "new" else created + timedelta(hours=rng.uniform(0.5, 48)),
+            "raw_text": f"{lead['format']} book about {' and '.join(lead['tags'])} for a {age} year old",
+            "parsed_preferences": {
+                "age": age,
+                "language": lead["language"] if lead["language"] != "English" else None,
+                "format": lead["format"],
+                "tags": lead["tags"],
+                "keywords": lead["tags"][:2],
+            },
+            "matched": matched,
+            "location_id": location_id,
+            "status": status,
+            "requester_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+            "requester_contact": None,
+            "requester_notes": None,
+            "user_id": str(object_id("users", rng.randrange(users), seed, anchor)) if users and rng.random() < 0.5 else None,
+        }
+
+
+def _inventory(books: int, seed: int, anchor: datetime, stock: _Stock) -> Iterator[Tuple[str, dict]]:
+    for index in range(books):
+        book_id = object_id("books", index, seed, anchor)
+        for slot, (location, qty) in enumerate(inventory_rows(index, seed, stock.locations)):
+            reserved = stock.reserved.get((index, location), 0)
+            doc = {
+                "_id": object_id("inventory", index * 8 + slot, seed, anchor),
+                "book_id": book_id,
+                "location_id": location,
+                "qty_available": qty - reserved,
+            }
+            if reserved:
+                doc["qty_reserved"] = reserved
+            yield "inventory", doc
+
+
+def write_chunked(db, items: Iterable[Tuple[str, dict]], batch: int) -> Dict[str, int]:
+    buffers: Dict[str, List[dict]] = {}
+    counts: Dict[str, int] = {}
+    started = time.perf_counter()
+
+    def flush(name: str) -> None:
+        docs = buffers[name]
+        if docs:
+            db[name].insert_many(docs, ordered=False)
+            counts[name] = counts.get(name, 0) + len(docs)
+            buffers[name] = []
+
+    for name, doc in items:
+        buffers.setdefault(name, []).append(doc)
+        if len(buffers[name]) >= batch:
+            flush(name)
+    for name in list(buffers):
+        flush(name)
+    elapsed = time.perf_counter() - started
+    for name, count in counts.items():
+        print(f"{name:<14} {count:>10} docs in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f}/s)")
+    return counts
+
+
+def reset(db) -> None:
+    for name in RESET_COLLECTIONS:
+        db[name].delete_many({})
+    db.users.delete_many({"email": {"$regex": r"@datagen\.local$"}})
+
+
+def generate(
+    db,
+    books: int,
+    locations: int,
+    users: int,
+    sessions: int,
+    requests: int,
+    days: int,
+    seed: int,
+    batch: int,
+    password: str,
+) -> Dict[str, int]:
+    anchor = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    stock = _Stock(seed, location_ids(max(locations, 1)))
+    counts: Dict[str, int] = {}
+    counts.update(write_chunked(db, _books(books, seed, anchor), batch))
+    if users:
+        counts.update(write_chunked(db, _users(users, sessions, seed, anchor, password), batch))
+    if requests and books:
+        counts.update(write_chunked(db, _requests(requests, books, users, days, seed, anchor, stock), batch))
+    counts.update(write_chunked(db, _inventory(books, seed, anchor, stock), batch))
+    started = time.perf_counter()
+    ensure_indexes(db)
+    rebuild_rollups(db)
+    bump_version(db, "requests")
+    bump_version(db, "inventory", "stock")
+    print(f"indexes and rollups in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.datagen")
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--locations", type=int, default=8)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--sessions", type=int, default=2, help="Sessions per user")
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=180, help="Days of request history")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch", type=int, default=5_000, help="Documents per insert_many")
+    parser.add_argument("--password", default="datagen1234", help="Password for every generated user")
+    parser.add_argument("--reset", action="store_true", help="Clear the catalog, requests, sessions and generated users first")
+    args = parser.parse_args()
+
+    db = get_db()
+    if args.reset:
+        reset(db)
+    elif db.books.estimated_document_count():
+        raise SystemExit("The database already has books; pass --reset to replace them")
+    counts = generate(
+        db,
+        books=args.books,
+        locations=args.locations,
+        users=args.users,
+        sessions=args.sessions,
+        requests=args.requests,
+        days=args.days,
+        seed=args.seed,
+        batch=args.batch,
+        password=args.password,
+    )
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
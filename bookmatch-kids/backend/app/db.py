@@ -1,13 +1,19 @@
 import os
+import pymongo
 from pymongo import MongoClient
-from .config import load_env
+from .config import ensure_env
+from .metrics import mongo_listener
 
-load_env()
+
+_CLIENTS: dict[str, MongoClient] = {}
 
 
 def get_db():
+    ensure_env()
     uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/bookmatch_kids")
-    client = MongoClient(uri)
+    client = _CLIENTS.get(uri)
+    if client is None:
+        client = _CLIENTS.setdefault(uri, MongoClient(uri, event_listeners=[mongo_listener]))
     try:
         db = client.get_default_database()
     except Exception:
@@ -16,3 +22,33 @@ def get_db():
         db_name = uri.rsplit("/", 1)[-1] or "bookmatch_kids"
         db = client[db_name]
     return db
+
+
+def ping_db(seconds: float | None = None) -> None:
+    if seconds is None:
+        try:
+            seconds = float(os.getenv("STARTUP_DB_TIMEOUT_SECONDS") or 5)
+        except ValueError:
+            seconds = 5.0
+    with pymongo.timeout(seconds):
+        get_db().command("ping")
+
+
+def ensure_indexes(db=None) -> None:
+    db = db if db is not None else get_db()
+    db.books.create_index("isbn13")
+    db.books.create_index("fingerprint")
+    db.books.create_index("isbn")
+    db.books.create_index([("source", 1), ("source_id", 1)])
+    db.sessions.create_index("token")
+    db.revoked_tokens.create_index("expires_at", expireAfterSeconds=0)
+    db.users.create_index("email")
+    db.inventory.create_index([("book_id", 1), ("location_id", 1)])
+    db.requests.create_index([("created_at", -1)])
+    db.requests.create_index([("status", 1), ("created_at", -1)])
+    db.requests.create_index([("location_id", 1), ("created_at", -1)])
+    db.requests.create_index("updated_at")
+    db.reservations.create_index([("request_id", 1), ("status", 1)])
+    db.reservations.create_index([("status", 1), ("expires_at", 1)])
+    db.reservations.create_index("purge_at", expireAfterSeconds=0)
+    db.analytics_rollups.create_index([("kind", 1), ("count", -1)])
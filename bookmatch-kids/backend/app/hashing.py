@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict
+
+
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 200_000
+_POOL: Dict[str, Any] = {"executor": None}
+_LOCK = threading.Lock()
+_STATS = {"pending": 0, "peak_pending": 0, "completed": 0, "rejected": 0, "failed": 0, "seconds": 0.0}
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def target_iterations() -> int:
+    return max(_env_int("PASSWORD_HASH_ITERATIONS", LEGACY_ITERATIONS), 10_000)
+
+
+def pool_size() -> int:
+    return max(_env_int("PASSWORD_HASH_WORKERS", min(os.cpu_count() or 1, 2)), 0)
+
+
+def max_queue() -> int:
+    return max(_env_int("PASSWORD_HASH_MAX_QUEUE", max(pool_size(), 1) * 8), 1)
+
+
+def derive(password: str, salt_hex: str, iterations: int) -> str:
+    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt_hex), iterations)
+    return dk.hex()
+
+
+def _executor() -> Executor:
+    if _POOL["executor"] is None:
+        size = pool_size()
+        if size:
+            _POOL["executor"] = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            _POOL["executor"] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-hash")
+    return _POOL["executor"]
+
+
+def _done(started: float, future: Future) -> None:
+    with _LOCK:
+        _STATS["pending"] -= 1
+        if future.cancelled() or future.exception() is not None:
+            _STATS["failed"] += 1
+        else:
+            _STATS["completed"] += 1
+            _STATS["seconds"] += time.perf_counter() - started
+
+
+def submit(password: str, salt_hex: str, iterations: int) -> Future:
+    with _LOCK:
+        if _STATS["pending"] >= max_queue():
+            _STATS["rejected"] += 1
+            raise HashingBusy("Too many sign-ins in progress, try again shortly")
+        _STATS["pending"] += 1
+        _STATS["peak_pending"] = max(_STATS["peak_pending"], _STATS["pending"])
+    started = time.perf_counter()
+    try:
+        try:
+            future = _executor().submit(derive, password, salt_hex, iterations)
+        except BrokenProcessPool:
+            shutdown_pool()
+            future = _executor().submit(derive, password, salt_hex, iterations)
+    except Exception:
+        with _LOCK:
+            _STATS["pending"] -= 1
+            _STATS["failed"] += 1
+        raise
+    future.add_done_callback(lambda f: _done(started, f))
+    return future
+
+
+async def derive_async(password: str, salt_hex: str, iterations: int) -> str:
+    try:
+        return await asyncio.wrap_future(submit(password, salt_hex, iterations))
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise
+
+
+def shutdown_pool() -> None:
+    executor = _POOL["executor"]
+    _POOL["executor"] = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def hashing_stats() -> dict:
+    with _LOCK:
+        completed = _STATS["completed"]
+        return {
+            "algorithm": ALGORITHM,
+            "iterations": target_iterations(),
+            "workers": pool_size(),
+            "max_queue": max_queue(),
+            "queue_depth": _STATS["pending"],
+            "peak_queue_depth": _STATS["peak_pending"],
+            "completed": completed,
+            "rejected": _STATS["rejected"],
+            "failed": _STATS["failed"],
+            "avg_ms": round(_STATS["seconds"] / completed * 1000, 1) if completed else None,
+        }
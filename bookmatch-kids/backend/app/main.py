@@ -1,27 +1,63 @@
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List
-import csv
-import io
+import asyncio
+import base64
+import hashlib
+import json
 import os
-
-from fastapi import FastAPI, Query, HTTPException, Header, Depends, Request
-from fastapi.responses import StreamingResponse
+import shutil
+
+from fastapi import (
+    FastAPI,
+    Query,
+    HTTPException,
+    Header,
+    Depends,
+    Request,
+    File,
+    Form,
+    UploadFile,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from bson import ObjectId
-from .config import load_env, env_debug, write_env_var
+from pymongo import ReturnDocument
+from . import startup
+from .config import ensure_env, env_debug, write_env_var
 
-from .db import get_db
+from .db import get_db, ensure_indexes, ping_db
+from .manage import migrate_created_at
 from .models import ParseRequest, CreateRequest, UpdateStatus
 from .auth import (
-    authenticate,
-    create_session,
-    create_user,
+    authenticate_async,
+    issue_tokens,
+    refresh_access_token,
+    create_user_async,
     get_user_by_token,
+    logout,
+    set_user_role,
+    session_cache_stats,
     staff_signup_allowed,
     ensure_demo_users,
     create_magic_token,
     consume_magic_token,
 )
+from .metrics import MetricsMiddleware, render as render_metrics
+from .profiling import (
+    ProfilerBusy,
+    ProfilingRoute,
+    collapsed,
+    dump_profile,
+    get_profile,
+    list_profiles,
+    sample_stacks,
+    top_frames,
+)
+from .tracing import slow_threshold_ms, slow_traces, span, start_trace
+from .hashing import HashingBusy, hashing_stats, shutdown_pool
+from .tokens import revocation_stats, signed_mode
 from .services.gemini import (
     parse_preferences,
     summarize_book,
@@ -30,15 +66,119 @@ from .services.gemini import (
     parse_preferences_with_meta,
     test_gemini,
     list_models,
+    resolve_model,
 )
 from .services.matching import rank_books
-from .services.elevenlabs import text_to_speech
+from .services.elevenlabs import speech_params, stream_stats
+from .services.speech import open_speech, shutdown_speech_pool
+from .services.tts_cache import KEY_PATTERN, cache_key, cache_stats, iter_file, lookup, parse_range, tee
 from .services.google_books import search_google_books, fetch_cover_url
+from .services.analytics import (
+    range_analytics,
+    read_analytics,
+    rebuild_rollups,
+    record_request,
+    record_status_change,
+)
+from .services.catalog import (
+    BOOK_SNAPSHOT_FIELDS,
+    in_stock_books,
+    snapshot_matches,
+    stock_cache_stats,
+    store_google_books,
+)
+from .services.reservations import (
+    extend_request,
+    fulfill_request,
+    release_request,
+    reservation_stats,
+    reserve_for_request,
+    set_stock,
+    start_reservation_sweeper,
+    stop_reservation_sweeper,
+)
+from .services.picklists import iter_picklist, iter_picklist_csv, iter_picklist_json
+from .services.live import live_status, stop_live_hub, subscribe, unsubscribe
+from .services.versions import bump_version, current_version
+from .services.identity import identity_fields, merge_duplicate_books
+from .services.import_jobs import (
+    create_job,
+    new_job_path,
+    submit_job,
+    cancel_job,
+    resume_job,
+    recover_jobs,
+    job_progress,
+    iter_rejected_csv,
+)
+from .services.prefetch import (
+    run_prefetch,
+    quota_status,
+    start_prefetch_scheduler,
+    stop_prefetch_scheduler,
+)
+
+REQUIRED_WARMUPS = ("db_ping", "indexes", "catalog_cache", "demo_users")
+
+
+def _load_catalog_cache():
+    books, _ = in_stock_books(get_db())
+    return {"books": len(books)}
 
-load_env()
-ensure_demo_users()
 
-app = FastAPI(title="BookMatch Kids")
+def _start_background_jobs():
+    return {"prefetch": start_prefetch_scheduler(), "reservation_sweeper": start_reservation_sweeper()}
+
+
+def _migrate_history() -> dict:
+    db = get_db()
+    migrated = migrate_created_at(db)
+    rebuilt = bool(migrated) or db.analytics_rollups.estimated_document_count() == 0
+    if rebuilt:
+        rebuild_rollups(db)
+    return {"migrated": migrated, "rollups_rebuilt": rebuilt}
+
+
+async def _warm_database():
+    await startup.retry_step("db_ping", ping_db, required=True)
+    await asyncio.gather(
+        startup.retry_step("indexes", lambda: ensure_indexes(get_db()), required=True),
+        startup.retry_step("catalog_cache", _load_catalog_cache, required=True),
+        startup.retry_step("demo_users", ensure_demo_users, required=True),
+        startup.run_step("recover_jobs", lambda: {"recovered": recover_jobs(get_db())}),
+        startup.run_step("history", _migrate_history),
+    )
+
+
+async def _warmup():
+    steps = [_warm_database()]
+    if os.getenv("GEMINI_API_KEY"):
+        steps.append(startup.run_step("gemini_model", resolve_model, timeout=30))
+    else:
+        startup.skip("gemini_model", "GEMINI_API_KEY not set")
+    await asyncio.gather(*steps)
+    startup.finish()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.begin(REQUIRED_WARMUPS)
+    startup.run_sync("env", ensure_env)
+    startup.run_sync("background_jobs", _start_background_jobs)
+    warmup = asyncio.create_task(_warmup())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        stop_prefetch_scheduler()
+        stop_reservation_sweeper()
+        stop_live_hub()
+        shutdown_pool()
+        shutdown_speech_pool()
+
+
+app = FastAPI(title="BookMatch Kids", lifespan=lifespan)
+app.router.route_class = ProfilingRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,7 +186,14 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-TTS-Key", "Content-Range", "Server-Timing", "X-Profile-Id", "X-Profile-Status"],
 )
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(HashingBusy)
+def hashing_busy(request: Request, exc: HashingBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "2"})
 
 
 def _get_current_user(authorization: str | None = Header(default=None)):
@@ -66,6 +213,12 @@ def _require_staff(user=Depends(_get_current_user)):
     return user
 
 
+def _require_staff_only(user=Depends(_require_staff)):
+    if user.get("role") != "staff":
+        raise HTTPException(status_code=403, detail="Staff access required")
+    return user
+
+
 def _serialize(doc):
     if not doc:
         return doc
@@ -73,9 +226,26 @@ def _serialize(doc):
     if "_id" in out:
         out["id"] = str(out["_id"])
         del out["_id"]
+    for key, value in out.items():
+        if isinstance(value, datetime):
+            out[key] = value.isoformat() + "Z"
     return out
 
 
+def _parse_date_param(value: str | None, name: str, end: bool = False) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} date") from exc
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
 def _build_google_query(text: str | None, tags: List[str], keywords: List[str]) -> str:
     parts: List[str] = []
     if text:
@@ -105,26 +275,7 @@ def _import_google_books(db, query: str, language: str | None, limit: int) -> Li
     except Exception:
         return []
 
-    imported = []
-    for book in results:
-        source_id = book.get("source_id")
-        if not source_id:
-            continue
-        existing = db.books.find_one({"source": "google", "source_id": source_id})
-        if existing:
-            if not db.inventory.find_one({"book_id": existing["_id"]}):
-                db.inventory.insert_one(
-                    {"book_id": existing["_id"], "location_id": "main", "qty_available": 1}
-                )
-            imported.append(existing)
-            continue
-        result = db.books.insert_one(book)
-        book["_id"] = result.inserted_id
-        db.inventory.insert_one(
-            {"book_id": result.inserted_id, "location_id": "main", "qty_available": 1}
-        )
-        imported.append(book)
-    return imported
+    return store_google_books(db, results)
 
 
 def _maybe_backfill_cover(db, book: dict) -> dict:
@@ -141,58 +292,33 @@ def _maybe_backfill_cover(db, book: dict) -> dict:
     )
     if cover_url:
         db.books.update_one({"_id": book["_id"]}, {"$set": {"cover_url": cover_url}})
+        bump_version(db, "books")
         book["cover_url"] = cover_url
     return book
 
 
-def _normalize_header(key: str) -> str:
-    key = key.strip().lower()
-    key = key.replace(" ", "_").replace("-", "_")
-    if key in {"book_title", "book"}:
-        return "title"
-    if key in {"authors", "writer"}:
-        return "author"
-    if key in {"desc", "summary", "synopsis"}:
-        return "description"
-    if key in {"genres", "genre", "subjects"}:
-        return "tags"
-    if key in {"subgenre", "sub_genre", "subcategory"}:
-        return "tags"
-    if key in {"min_age", "age_minimum"}:
-        return "age_min"
-    if key in {"max_age", "age_maximum"}:
-        return "age_max"
-    if key in {"readinglevel", "level"}:
-        return "reading_level"
-    if key in {"lang"}:
-        return "language"
-    if key in {"book_format", "binding"}:
-        return "format"
-    if key in {"cover", "image", "thumbnail"}:
-        return "cover_url"
-    if key in {"isbn13", "isbn_13"}:
-        return "isbn"
-    if key in {"qty", "quantity", "stock"}:
-        return "qty_available"
-    if key in {"location", "site"}:
-        return "location_id"
-    return key
-
-
-def _parse_csv_inventory(text: str) -> List[dict]:
-    reader = csv.DictReader(io.StringIO(text))
-    rows = []
-    for row in reader:
-        if not row:
-            continue
-        normalized = {}
-        for k, v in row.items():
-            if k is None:
-                continue
-            nk = _normalize_header(k)
-            normalized[nk] = v.strip() if isinstance(v, str) else v
-        rows.append(normalized)
-    return rows
+def _stock_candidates(db, google_query: str, language: str | None) -> List[dict]:
+    with span("catalog") as attrs:
+        filtered, attrs["cached"] = in_stock_books(db)
+        attrs["books"] = len(filtered)
+
+    if len(filtered) < 5:
+        with span("google_import") as attrs:
+            imported = _import_google_books(db, google_query, language, 5 - len(filtered))
+            attrs["imported"] = len(imported)
+        existing_ids = {str(b["_id"]) for b in filtered}
+        for book in imported:
+            if str(book["_id"]) not in existing_ids:
+                filtered.append(book)
+                existing_ids.add(str(book["_id"]))
+    return filtered
+
+
+def _rank_top(db, books: List[dict], prefs: dict, query: str, limit: int = 5) -> List[dict]:
+    with span("rank", candidates=len(books)):
+        top = rank_books(books, prefs, query=query)[:limit]
+    with span("covers", missing=sum(1 for b in top if not b.get("cover_url"))):
+        return [_maybe_backfill_cover(db, b) for b in top]
 
 
 @app.get("/health")
@@ -200,6 +326,22 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    state = startup.readiness()
+    return JSONResponse(status_code=200 if state["status"] == "ready" else 503, content=state)
+
+
+@app.get("/api/admin/startup", dependencies=[Depends(_require_staff)])
+def startup_status():
+    return {**startup.timeline(), "catalog_cache": stock_cache_stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/admin/config-status", dependencies=[Depends(_require_staff)])
 def config_status():
     import os
@@ -251,6 +393,33 @@ def db_info():
     }
 
 
+@app.get("/api/admin/stream")
+async def admin_stream(request: Request, token: Optional[str] = None):
+    user = await run_in_threadpool(_get_current_user, f"Bearer {token}" if token else None)
+    _require_staff(user)
+    queue = subscribe(asyncio.get_running_loop())
+
+    async def events():
+        try:
+            yield f"retry: 5000\nevent: ready\ndata: {json.dumps(live_status())}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    batch = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                for name, data in batch:
+                    yield f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/admin/env-debug", dependencies=[Depends(_require_staff)])
 def env_debug_info():
     return env_debug()
@@ -266,7 +435,7 @@ def set_mongodb_uri(payload: dict):
 
 
 @app.post("/api/auth/register")
-def register(payload: dict):
+async def register(payload: dict):
     email = (payload.get("email") or "").strip().lower()
     name = (payload.get("name") or "").strip()
     password = payload.get("password") or ""
@@ -279,45 +448,42 @@ def register(payload: dict):
     if role not in {"parent", "staff", "volunteer"}:
         role = "parent"
     try:
-        user = create_user(email, name, password, role)
+        user = await create_user_async(email, name, password, role)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    token = create_session(user["_id"])
     return {
-        "token": token,
+        **(await run_in_threadpool(issue_tokens, user)),
         "user": {"id": str(user["_id"]), "email": user["email"], "name": user["name"], "role": user["role"]},
     }
 
 
 @app.post("/api/auth/login")
-def login(payload: dict):
+async def login(payload: dict):
     email = (payload.get("email") or "").strip().lower()
     password = payload.get("password") or ""
     if not email or not password:
         raise HTTPException(status_code=400, detail="email and password required")
-    user = authenticate(email, password)
+    user = await authenticate_async(email, password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_session(user["_id"])
     return {
-        "token": token,
+        **(await run_in_threadpool(issue_tokens, user)),
         "user": {"id": str(user["_id"]), "email": user["email"], "name": user["name"], "role": user["role"]},
     }
 
 
 @app.post("/api/auth/demo")
-def demo_login():
+async def demo_login():
     import os
 
     if os.getenv("DEMO_LOGIN", "false").lower() not in {"1", "true", "yes"}:
         raise HTTPException(status_code=403, detail="Demo login disabled")
     email = os.getenv("DEMO_STAFF_EMAIL", "demo@bookmatch.local").lower()
-    user = authenticate(email, os.getenv("DEMO_STAFF_PASSWORD", "demo1234"))
+    user = await authenticate_async(email, os.getenv("DEMO_STAFF_PASSWORD", "demo1234"))
     if not user:
         raise HTTPException(status_code=401, detail="Demo user missing")
-    token = create_session(user["_id"])
     return {
-        "token": token,
+        **(await run_in_threadpool(issue_tokens, user)),
         "user": {"id": str(user["_id"]), "email": user["email"], "name": user["name"], "role": user["role"]},
     }
 
@@ -329,6 +495,51 @@ def me(user=Depends(_get_current_user)):
     return {"id": str(user["_id"]), "email": user["email"], "name": user["name"], "role": user["role"]}
 
 
+@app.post("/api/auth/refresh")
+def refresh(payload: dict):
+    refresh_token = payload.get("refresh_token")
+    if not refresh_token:
+        raise HTTPException(status_code=400, detail="refresh_token required")
+    tokens = refresh_access_token(refresh_token)
+    if not tokens:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    return tokens
+
+
+@app.post("/api/auth/logout")
+def logout_session(authorization: str | None = Header(default=None)):
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.split(" ", 1)[1].strip()
+        if token:
+            logout(token)
+    return {"ok": True}
+
+
+@app.post("/api/admin/users/{user_id}/role")
+def change_user_role(user_id: str, payload: dict, user=Depends(_require_staff)):
+    if user.get("role") != "staff":
+        raise HTTPException(status_code=403, detail="Staff access required")
+    role = (payload.get("role") or "").strip().lower()
+    if role not in {"parent", "staff", "volunteer"}:
+        raise HTTPException(status_code=400, detail="Invalid role")
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    updated = set_user_role(ObjectId(user_id), role)
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"id": str(updated["_id"]), "email": updated["email"], "name": updated["name"], "role": updated["role"]}
+
+
+@app.get("/api/admin/auth-cache", dependencies=[Depends(_require_staff)])
+def auth_cache_stats():
+    return {
+        **session_cache_stats(),
+        **revocation_stats(),
+        "token_mode": "signed" if signed_mode() else "session",
+        "password_hashing": hashing_stats(),
+    }
+
+
 @app.post("/api/auth/magic-link", dependencies=[Depends(_require_staff)])
 def magic_link(payload: dict):
     role = payload.get("role") or "volunteer"
@@ -347,9 +558,8 @@ def magic_login(payload: dict):
     user = consume_magic_token(token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    session = create_session(user["_id"])
     return {
-        "token": session,
+        **issue_tokens(user),
         "user": {"id": str(user["_id"]), "email": user["email"], "name": user["name"], "role": user["role"]},
     }
 
@@ -421,116 +631,115 @@ def admin_search_books(q: Optional[str] = None, limit: int = 20):
     return {"books": serialized}
 
 
-@app.post("/api/admin/inventory/import", dependencies=[Depends(_require_staff)])
-def import_inventory(payload: dict):
+def _import_default_qty(raw) -> int:
+    try:
+        return int(raw or 1)
+    except Exception:
+        return 1
+
+
+def _job_response(job: dict) -> dict:
+    out = _serialize(job)
+    out.pop("path", None)
+    out.pop("missing_covers", None)
+    out["progress"] = job_progress(job)
+    return out
+
+
+def _job_id(job_id: str) -> ObjectId:
+    try:
+        return ObjectId(job_id)
+    except Exception as exc:
+        raise HTTPException(status_code=404, detail="Job not found") from exc
+
+
+@app.post("/api/admin/inventory/import", status_code=202)
+def import_inventory(payload: dict, user=Depends(_require_staff)):
     csv_text = payload.get("csv") or ""
     if not csv_text.strip():
         raise HTTPException(status_code=400, detail="csv is required")
     location_id = payload.get("location_id") or "main"
-    try:
-        default_qty = int(payload.get("default_qty") or 1)
-    except Exception:
-        default_qty = 1
+    default_qty = _import_default_qty(payload.get("default_qty"))
+
+    path = new_job_path()
+    path.write_text(csv_text, encoding="utf-8")
+    db = get_db()
+    job = create_job(db, path, "pasted.csv", location_id, default_qty, user_id=str(user["_id"]))
+    submit_job(job["_id"])
+    return {"ok": True, "job": _job_response(job)}
 
-    rows = _parse_csv_inventory(csv_text)
-    if not rows:
-        raise HTTPException(status_code=400, detail="No rows found in CSV")
 
+@app.post("/api/admin/inventory/upload", status_code=202)
+def upload_inventory(
+    file: UploadFile = File(...),
+    location_id: str = Form(default="main"),
+    default_qty: str = Form(default="1"),
+    user=Depends(_require_staff),
+):
+    path = new_job_path()
+    with path.open("wb") as out:
+        shutil.copyfileobj(file.file, out)
     db = get_db()
-    inserted = 0
-    updated = 0
-    inventory_upserts = 0
-    skipped = 0
+    job = create_job(
+        db,
+        path,
+        file.filename or "upload.csv",
+        location_id or "main",
+        _import_default_qty(default_qty),
+        user_id=str(user["_id"]),
+    )
+    submit_job(job["_id"])
+    return {"ok": True, "job": _job_response(job)}
 
-    for row in rows:
-        title = row.get("title") or ""
-        author = row.get("author") or ""
-        if not title:
-            skipped += 1
-            continue
-        isbn = row.get("isbn") or ""
-        tags_raw = row.get("tags") or ""
-        tags = [t.strip().lower() for t in tags_raw.replace("|", ",").split(",") if t.strip()]
-        try:
-            age_min = int(row.get("age_min")) if row.get("age_min") else None
-        except Exception:
-            age_min = None
-        try:
-            age_max = int(row.get("age_max")) if row.get("age_max") else None
-        except Exception:
-            age_max = None
-        reading_level = row.get("reading_level") or "middle"
-        language = row.get("language") or "English"
-        fmt = row.get("format") or "chapter"
-        cover_url = row.get("cover_url") or ""
-        description = row.get("description") or ""
-        publisher = row.get("publisher") or ""
-
-        if not tags and row.get("genre"):
-            tags = [str(row.get("genre")).strip().lower()]
-        if row.get("subgenre"):
-            sub = str(row.get("subgenre")).strip().lower()
-            if sub and sub not in tags:
-                tags.append(sub)
-        if publisher and not description:
-            description = f"Publisher: {publisher}"
-        if age_min is None:
-            age_min = 8
-        if age_max is None:
-            age_max = max(age_min + 4, 12)
-        if not cover_url and os.getenv("GOOGLE_BOOKS_ENABLED", "true").lower() in {"1", "true", "yes"}:
-            cover_url = fetch_cover_url(title=title, author=author, isbn=isbn)
-
-        book_doc = {
-            "title": title,
-            "author": author or "Unknown Author",
-            "description": description,
-            "tags": tags,
-            "age_min": age_min,
-            "age_max": age_max,
-            "reading_level": reading_level,
-            "language": language,
-            "format": fmt,
-            "cover_url": cover_url,
-            "isbn": isbn,
-            "source": row.get("source") or "manual",
-        }
 
-        existing = None
-        if isbn:
-            existing = db.books.find_one({"isbn": isbn})
-        if not existing and author:
-            existing = db.books.find_one({"title": title, "author": author})
-
-        if existing:
-            db.books.update_one({"_id": existing["_id"]}, {"$set": book_doc})
-            book_id = existing["_id"]
-            updated += 1
-        else:
-            result = db.books.insert_one(book_doc)
-            book_id = result.inserted_id
-            inserted += 1
-
-        row_location = row.get("location_id") or location_id
-        try:
-            qty = int(row.get("qty_available")) if row.get("qty_available") else default_qty
-        except Exception:
-            qty = default_qty
+@app.get("/api/admin/jobs", dependencies=[Depends(_require_staff)])
+def list_jobs(limit: int = 20):
+    db = get_db()
+    jobs = db.import_jobs.find({}, {"missing_covers": 0}).sort("created_at", -1).limit(max(min(limit, 100), 1))
+    return {"jobs": [_job_response(j) for j in jobs]}
 
-        db.inventory.update_one(
-            {"book_id": book_id, "location_id": row_location},
-            {"$set": {"qty_available": max(qty, 0)}},
-            upsert=True,
-        )
-        inventory_upserts += 1
 
-    return {
-        "ok": True,
-        "inserted_books": inserted,
-        "updated_books": updated,
-        "inventory_upserts": inventory_upserts,
-        "skipped": skipped,
-    }
+@app.get("/api/admin/jobs/{job_id}", dependencies=[Depends(_require_staff)])
+def get_job(job_id: str):
+    db = get_db()
+    job = db.import_jobs.find_one({"_id": _job_id(job_id)}, {"missing_covers": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@app.get("/api/admin/jobs/{job_id}/errors", dependencies=[Depends(_require_staff)])
+def get_job_errors(job_id: str):
+    db = get_db()
+    obj_id = _job_id(job_id)
+    if not db.import_jobs.find_one({"_id": obj_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        iter_rejected_csv(db, obj_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="import-{job_id}-rejected.csv"'},
+    )
+
+
+@app.post("/api/admin/jobs/{job_id}/cancel", dependencies=[Depends(_require_staff)])
+def cancel_import_job(job_id: str):
+    job = cancel_job(get_db(), _job_id(job_id))
+    if not job:
+        raise HTTPException(status_code=409, detail="Job is not running")
+    return _job_response(job)
+
+
+@app.post("/api/admin/jobs/{job_id}/resume", dependencies=[Depends(_require_staff)])
+def resume_import_job(job_id: str):
+    job = resume_job(get_db(), _job_id(job_id))
+    if not job:
+        raise HTTPException(status_code=409, detail="Job cannot be resumed")
+    return _job_response(job)
+
+
+@app.post("/api/admin/books/merge-duplicates", dependencies=[Depends(_require_staff)])
+def merge_duplicates(payload: dict):
+    return {"ok": True, **merge_duplicate_books(get_db(), dry_run=bool(payload.get("dry_run")))}
 
 
 @app.post("/api/admin/books/refresh-covers", dependencies=[Depends(_require_staff)])
@@ -575,9 +784,25 @@ def refresh_covers(payload: dict):
         if not refresh_all:
             break
 
+    if updated:
+        bump_version(db, "books")
     return {"ok": True, "checked": checked, "updated": updated, "skipped": skipped}
 
 
+@app.post("/api/admin/catalog/prefetch", dependencies=[Depends(_require_staff)])
+def catalog_prefetch(payload: dict):
+    db = get_db()
+    summary = run_prefetch(db, dry_run=bool(payload.get("dry_run")))
+    return {"ok": True, **summary, "quota": quota_status(db)}
+
+
+@app.get("/api/admin/catalog/prefetch", dependencies=[Depends(_require_staff)])
+def catalog_prefetch_status():
+    db = get_db()
+    runs = list(db.prefetch_runs.find({}).sort("started_at", -1).limit(5))
+    return {"quota": quota_status(db), "runs": [_serialize(r) for r in runs]}
+
+
 @app.post("/api/admin/inventory/update", dependencies=[Depends(_require_staff)])
 def update_inventory(payload: dict):
     book_id = payload.get("book_id")
@@ -597,50 +822,33 @@ def update_inventory(payload: dict):
     db = get_db()
     db.inventory.update_one(
         {"book_id": obj_id, "location_id": location_id},
-        {"$set": {"qty_available": max(qty, 0)}},
+        set_stock(max(qty, 0)),
         upsert=True,
     )
+    bump_version(db, "inventory", "stock")
     return {"ok": True}
 
 
+@app.get("/api/admin/reservations", dependencies=[Depends(_require_staff)])
+def reservations_status():
+    return reservation_stats(get_db())
+
+
 @app.get("/api/admin/analytics", dependencies=[Depends(_require_staff)])
-def analytics():
-    db = get_db()
-    requests = list(db.requests.find({}))
-    status_counts = {}
-    tag_counts = {}
-    daily_counts = {}
-
-    cutoff = datetime.utcnow() - timedelta(days=6)
-    for req in requests:
-        status = req.get("status", "unknown")
-        status_counts[status] = status_counts.get(status, 0) + 1
-
-        prefs = req.get("parsed_preferences") or {}
-        for tag in prefs.get("tags", []) or []:
-            tag_counts[tag] = tag_counts.get(tag, 0) + 1
-
-        created = req.get("created_at")
-        if created:
-            try:
-                dt = datetime.fromisoformat(created.replace("Z", ""))
-            except Exception:
-                dt = None
-            if dt and dt >= cutoff:
-                key = dt.strftime("%Y-%m-%d")
-                daily_counts[key] = daily_counts.get(key, 0) + 1
-
-    top_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-    daily_series = []
-    for i in range(7):
-        day = (cutoff + timedelta(days=i)).strftime("%Y-%m-%d")
-        daily_series.append({"date": day, "count": daily_counts.get(day, 0)})
+def analytics(
+    date_from: Optional[str] = Query(default=None, alias="from"),
+    date_to: Optional[str] = Query(default=None, alias="to"),
+):
+    start = _parse_date_param(date_from, "from")
+    end = _parse_date_param(date_to, "to", end=True)
+    if start or end:
+        return range_analytics(get_db(), start, end)
+    return read_analytics(get_db())
 
-    return {
-        "status_counts": status_counts,
-        "top_tags": [{"tag": t, "count": c} for t, c in top_tags],
-        "daily": daily_series,
-    }
+
+@app.post("/api/admin/analytics/rebuild", dependencies=[Depends(_require_staff)])
+def analytics_rebuild():
+    return {"ok": True, **rebuild_rollups(get_db())}
 
 
 @app.post("/api/admin/demo-seed", dependencies=[Depends(_require_staff)])
@@ -692,13 +900,14 @@ def demo_seed():
                 "source": "demo",
             },
         ]
-        result = db.books.insert_many(demo_books)
+        result = db.books.insert_many([{**b, **identity_fields(b)} for b in demo_books])
         for book_id in result.inserted_ids:
             db.inventory.update_one(
                 {"book_id": book_id, "location_id": "main"},
                 {"$set": {"qty_available": 3}},
                 upsert=True,
             )
+        bump_version(db, "inventory", "stock")
         books = list(db.books.find({}).limit(5))
 
     demo_requests = [
@@ -718,20 +927,26 @@ def demo_seed():
 
     created = 0
     for demo in demo_requests:
-        matched = [{"book_id": str(b["_id"]), "score": 1.0} for b in books[:3]]
-        db.requests.insert_one(
-            {
-                "created_at": datetime.utcnow().isoformat() + "Z",
-                "raw_text": demo["raw_text"],
-                "parsed_preferences": demo["parsed_preferences"],
-                "matched": matched,
-                "location_id": "main",
-                "status": "new",
-                "requester_name": "Demo Parent",
-                "requester_contact": "demo@bookmatch.local",
-            }
-        )
+        matched = [
+            {"book_id": str(b["_id"]), "score": 1.0, **{f: b.get(f) or "" for f in BOOK_SNAPSHOT_FIELDS}}
+            for b in books[:3]
+        ]
+        now = datetime.utcnow()
+        doc = {
+            "created_at": now,
+            "updated_at": now,
+            "raw_text": demo["raw_text"],
+            "parsed_preferences": demo["parsed_preferences"],
+            "matched": matched,
+            "location_id": "main",
+            "status": "new",
+            "requester_name": "Demo Parent",
+            "requester_contact": "demo@bookmatch.local",
+        }
+        db.requests.insert_one(doc)
+        record_request(db, doc)
         created += 1
+    bump_version(db, "requests")
     return {"ok": True, "created": created}
 
 
@@ -743,23 +958,20 @@ def parse(req: ParseRequest):
 
 
 @app.post("/api/chat")
-def chat(req: ParseRequest, request: Request):
+def chat(req: ParseRequest, request: Request, response: Response):
+    with start_trace("chat", response):
+        return _chat(req, request)
+
+
+def _chat(req: ParseRequest, request: Request):
     user = _get_current_user(request.headers.get("authorization"))
     meta = {"age": req.age, "language": req.language, "format": req.format}
-    parsed_info = parse_preferences_with_meta(req.text, meta, req.model, use_gemini=bool(req.use_gemini))
+    with span("parse") as attrs:
+        parsed_info = parse_preferences_with_meta(req.text, meta, req.model, use_gemini=bool(req.use_gemini))
+        attrs["gemini_used"] = parsed_info.get("gemini_used", False)
     parsed = parsed_info["parsed"]
 
     db = get_db()
-    books = list(db.books.find({}))
-    inventory = list(db.inventory.find({"qty_available": {"$gt": 0}}))
-    inventory_ids = {str(item["book_id"]) for item in inventory}
-
-    filtered = []
-    for book in books:
-        if str(book["_id"]) not in inventory_ids:
-            continue
-        filtered.append(book)
-
     prefs = {
         "age": parsed.get("age"),
         "language": parsed.get("language"),
@@ -767,19 +979,11 @@ def chat(req: ParseRequest, request: Request):
         "tags": parsed.get("tags", []),
         "keywords": parsed.get("keywords", []),
     }
-    if len(filtered) < 5:
-        google_query = _build_google_query(req.text, prefs.get("tags", []), prefs.get("keywords", []))
-        imported = _import_google_books(db, google_query, prefs.get("language"), 5 - len(filtered))
-        existing_ids = {str(b["_id"]) for b in filtered}
-        for book in imported:
-            if str(book["_id"]) not in existing_ids:
-                filtered.append(book)
-                existing_ids.add(str(book["_id"]))
-
-    ranked = rank_books(filtered, prefs, query=req.text or "")
-    top = ranked[:5]
-    top = [_maybe_backfill_cover(db, b) for b in top]
-    response = explain_matches(req.text, parsed, [_serialize(b) for b in top], model=req.model)
+    google_query = _build_google_query(req.text, prefs.get("tags", []), prefs.get("keywords", []))
+    filtered = _stock_candidates(db, google_query, prefs.get("language"))
+    top = _rank_top(db, filtered, prefs, req.text or "")
+    with span("explain"):
+        response = explain_matches(req.text, parsed, [_serialize(b) for b in top], model=req.model)
     if user:
         db = get_db()
         db.users.update_one(
@@ -804,6 +1008,8 @@ def my_recommendations(user=Depends(_get_current_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Login required")
     db = get_db()
+    if user.get("from_token"):
+        user = db.users.find_one({"_id": user["_id"]}, {"last_recommendations": 1}) or {}
     ids = [ObjectId(rid) for rid in user.get("last_recommendations", []) if ObjectId.is_valid(rid)]
     if not ids:
         return {"books": []}
@@ -836,85 +1042,168 @@ def gemini_concierge(payload: dict):
     return concierge_reply(message, history, model=payload.get("model"))
 
 
+def _audio_response(request: Request, path, key: str, cache_control: str = "no-cache"):
+    size = path.stat().st_size
+    etag = f'"{key}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "X-TTS-Key": key,
+        "Content-Location": f"/api/tts/{key}.mp3",
+    }
+    if etag in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers=headers)
+    byte_range = None
+    if request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_file(path), media_type="audio/mpeg", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file(path, start, end), status_code=206, media_type="audio/mpeg", headers=headers)
+
+
 @app.post("/api/tts")
-def tts(payload: dict):
+def tts(payload: dict, request: Request):
     text = payload.get("text", "")
     if not text:
         raise HTTPException(status_code=400, detail="text required")
-    audio = text_to_speech(text)
-    return StreamingResponse(iter([audio]), media_type="audio/mpeg")
+    params = speech_params()
+    key = cache_key(text, params["voice_id"], params["model_id"], params["voice_settings"])
+    path = lookup(key)
+    if path is not None:
+        return _audio_response(request, path, key)
+    return StreamingResponse(
+        tee(key, open_speech(text, params)),
+        media_type="audio/mpeg",
+        headers={"X-TTS-Key": key, "Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/api/tts/{key}.mp3")
+def tts_cached(key: str, request: Request):
+    path = lookup(key) if KEY_PATTERN.match(key) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not cached")
+    return _audio_response(request, path, key, cache_control="public, max-age=31536000, immutable")
+
+
+@app.get("/api/admin/profile", dependencies=[Depends(_require_staff_only)])
+async def sample_profile(
+    seconds: float = Query(default=5, gt=0),
+    interval_ms: float = Query(default=5, gt=0),
+    format: str = Query(default="collapsed"),
+):
+    try:
+        result = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    if format == "json":
+        stacks = result.pop("stacks")
+        return {**result, "top": top_frames(stacks), "collapsed": collapsed(stacks)}
+    return Response(
+        collapsed(result["stacks"]),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{int(datetime.utcnow().timestamp())}.folded"',
+            "X-Profile-Samples": str(result["samples"]),
+        },
+    )
+
+
+@app.get("/api/admin/profiles", dependencies=[Depends(_require_staff_only)])
+def request_profiles():
+    return {"profiles": list_profiles()}
+
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(_require_staff_only)])
+def request_profile(profile_id: str, format: str = Query(default="text")):
+    record = get_profile(profile_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            dump_profile(record),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="request-{profile_id}.prof"'},
+        )
+    return Response(record["report"], media_type="text/plain")
+
+
+@app.get("/api/admin/traces", dependencies=[Depends(_require_staff)])
+def admin_traces(limit: int = Query(default=50, ge=1, le=500)):
+    return {"slow_ms": slow_threshold_ms(), "traces": slow_traces(limit)}
+
+
+@app.get("/api/admin/tts-cache", dependencies=[Depends(_require_staff)])
+def tts_cache_status():
+    return {**cache_stats(), "streaming": stream_stats()}
 
 
 @app.get("/api/books/search")
 def search_books(
+    response: Response,
     age: Optional[int] = None,
     language: Optional[str] = None,
     tags: Optional[str] = None,
     format: Optional[str] = Query(default=None, alias="format"),
     q: Optional[str] = None,
 ):
-    db = get_db()
-    books = list(db.books.find({}))
-    inventory = list(db.inventory.find({"qty_available": {"$gt": 0}}))
-    inventory_ids = {str(item["book_id"]) for item in inventory}
-
-    filtered = []
-    for book in books:
-        if str(book["_id"]) not in inventory_ids:
-            continue
-        filtered.append(book)
-
-    pref_tags: List[str] = []
-    if tags:
-        pref_tags = [t.strip() for t in tags.split(",") if t.strip()]
-
-    prefs = {
-        "age": age,
-        "language": language,
-        "format": format,
-        "tags": pref_tags,
-        "keywords": [],
-    }
-
-    if len(filtered) < 5:
-        google_query = _build_google_query(q or "", pref_tags, [])
-        imported = _import_google_books(db, google_query, language, 5 - len(filtered))
-        existing_ids = {str(b["_id"]) for b in filtered}
-        for book in imported:
-            if str(book["_id"]) not in existing_ids:
-                filtered.append(book)
-                existing_ids.add(str(book["_id"]))
+    with start_trace("search_books", response):
+        db = get_db()
+        pref_tags: List[str] = []
+        if tags:
+            pref_tags = [t.strip() for t in tags.split(",") if t.strip()]
 
-    ranked = rank_books(filtered, prefs, query=q or "")
-    top = ranked[:5]
-    top = [_maybe_backfill_cover(db, b) for b in top]
-    return [
-        {
-            **_serialize(b),
-            "score": round(b["score"], 2),
+        prefs = {
+            "age": age,
+            "language": language,
+            "format": format,
+            "tags": pref_tags,
+            "keywords": [],
         }
-        for b in top
-    ]
+        filtered = _stock_candidates(db, _build_google_query(q or "", pref_tags, []), language)
+        top = _rank_top(db, filtered, prefs, q or "")
+        return [
+            {
+                **_serialize(b),
+                "score": round(b["score"], 2),
+            }
+            for b in top
+        ]
 
 
 @app.post("/api/requests")
 def create_request(req: CreateRequest, request: Request):
     user = _get_current_user(request.headers.get("authorization"))
     db = get_db()
+    now = datetime.utcnow()
+    request_id = ObjectId()
+    location_id = req.location_id or "main"
+    matched = snapshot_matches(db, [m.dict() for m in req.matched])
     doc = {
-        "created_at": datetime.utcnow().isoformat() + "Z",
+        "_id": request_id,
+        "created_at": now,
+        "updated_at": now,
         "raw_text": req.raw_text,
         "parsed_preferences": req.parsed_preferences,
-        "matched": [m.dict() for m in req.matched],
-        "location_id": req.location_id or "main",
+        "matched": reserve_for_request(db, request_id, location_id, matched),
+        "location_id": location_id,
         "status": "new",
         "requester_name": req.requester_name,
         "requester_contact": req.requester_contact,
         "requester_notes": req.requester_notes,
         "user_id": str(user["_id"]) if user else None,
     }
-    result = db.requests.insert_one(doc)
-    doc["_id"] = result.inserted_id
+    db.requests.insert_one(doc)
+    record_request(db, doc)
+    bump_version(db, "requests")
     if req.requester_contact and "@" in req.requester_contact:
         db.receipts.insert_one(
             {
@@ -927,15 +1216,98 @@ def create_request(req: CreateRequest, request: Request):
     return _serialize(doc)
 
 
+REQUEST_LIST_FIELDS = {
+    "created_at": 1,
+    "status": 1,
+    "raw_text": 1,
+    "parsed_preferences": 1,
+    "matched": 1,
+    "location_id": 1,
+    "requester_name": 1,
+}
+
+
+def _encode_cursor(doc: dict) -> str:
+    created = doc.get("created_at")
+    value = created.isoformat() if isinstance(created, datetime) else f"s:{created or ''}"
+    raw = f"{value}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | str, ObjectId]:
+    try:
+        created, last_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        if created.startswith("s:"):
+            return created[2:], ObjectId(last_id)
+        return datetime.fromisoformat(created), ObjectId(last_id)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def _expand_books(db, items: List[dict]) -> None:
+    ids = {
+        ObjectId(m["book_id"])
+        for item in items
+        for m in item.get("matched") or []
+        if ObjectId.is_valid(m.get("book_id") or "")
+    }
+    books = {str(b["_id"]): _serialize(b) for b in db.books.find({"_id": {"$in": list(ids)}})} if ids else {}
+    for item in items:
+        item["books"] = [books[m["book_id"]] for m in item.get("matched") or [] if m.get("book_id") in books]
+
+
 @app.get("/api/admin/requests", dependencies=[Depends(_require_staff)])
-def list_requests(status: Optional[str] = None):
+def list_requests(
+    request: Request,
+    status: Optional[str] = None,
+    date_from: Optional[str] = Query(default=None, alias="from"),
+    date_to: Optional[str] = Query(default=None, alias="to"),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    expand: Optional[str] = None,
+):
+    start = _parse_date_param(date_from, "from")
+    end = _parse_date_param(date_to, "to", end=True)
+    after = _decode_cursor(cursor) if cursor else None
     try:
         db = get_db()
+        expand_books = bool(expand and "books" in expand.split(","))
+        version = current_version(db, "requests")
+        if expand_books:
+            version = f"{version}.{current_version(db, 'books')}"
+        query_hash = hashlib.sha1(request.url.query.encode("utf-8")).hexdigest()[:12]
+        headers = {"ETag": f'W/"{version}-{query_hash}"', "Cache-Control": "private, no-cache"}
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+
         query = {}
         if status:
             query["status"] = status
-        items = list(db.requests.find(query).sort("created_at", -1))
-        return [_serialize(i) for i in items]
+        if start or end:
+            query["created_at"] = {}
+            if start:
+                query["created_at"]["$gte"] = start
+            if end:
+                query["created_at"]["$lt"] = end
+        if after:
+            query["$or"] = [
+                {"created_at": {"$lt": after[0]}},
+                {"created_at": after[0], "_id": {"$lt": after[1]}},
+            ]
+            if isinstance(after[0], datetime):
+                query["$or"].append({"created_at": {"$type": "string"}})
+        items = list(
+            db.requests.find(query, REQUEST_LIST_FIELDS)
+            .sort([("created_at", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        if len(items) > limit:
+            items = items[:limit]
+            headers["X-Next-Cursor"] = _encode_cursor(items[-1])
+        out = [_serialize(i) for i in items]
+        if expand_books:
+            _expand_books(db, out)
+        return JSONResponse(out, headers=headers)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"list_requests failed: {exc}")
 
@@ -943,15 +1315,25 @@ def list_requests(status: Optional[str] = None):
 @app.post("/api/admin/requests/{request_id}/status", dependencies=[Depends(_require_staff)])
 def update_status(request_id: str, payload: UpdateStatus):
     db = get_db()
-    if payload.status not in {"approved", "picked", "packed", "distributed", "new"}:
+    if payload.status not in {"approved", "picked", "packed", "distributed", "new", "cancelled"}:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    result = db.requests.update_one(
+    previous = db.requests.find_one_and_update(
         {"_id": ObjectId(request_id)},
-        {"$set": {"status": payload.status}},
+        {"$set": {"status": payload.status, "updated_at": datetime.utcnow()}},
+        projection={"status": 1},
+        return_document=ReturnDocument.BEFORE,
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Request not found")
+    record_status_change(db, previous.get("status"), payload.status)
+    if payload.status == "cancelled":
+        release_request(db, previous["_id"])
+    elif payload.status == "distributed":
+        fulfill_request(db, previous["_id"])
+    elif payload.status != previous.get("status"):
+        extend_request(db, previous["_id"])
+    bump_version(db, "requests")
     doc = db.requests.find_one({"_id": ObjectId(request_id)})
     return _serialize(doc)
 
@@ -964,15 +1346,46 @@ def picklist(request_id: str):
         raise HTTPException(status_code=404, detail="Request not found")
 
     matched = req.get("matched", [])
-    book_ids = [ObjectId(m["book_id"]) for m in matched if "book_id" in m]
-    books = list(db.books.find({"_id": {"$in": book_ids}}))
+    if any("title" not in m for m in matched):
+        matched = snapshot_matches(db, matched)
 
+    location_id = req.get("location_id", "main")
     lines = []
-    for book in books:
-        lines.append(f"{book.get('title')} - {book.get('author')} ({book.get('format')})")
+    for book in matched:
+        if "title" in book:
+            line = f"{book.get('title')} - {book.get('author')} ({book.get('format')})"
+            if book.get("reserved_location", location_id) != location_id:
+                line += f" [held at {book['reserved_location']}]"
+            lines.append(line)
 
     return {
         "request_id": str(req["_id"]),
-        "location_id": req.get("location_id", "main"),
+        "location_id": location_id,
         "lines": lines,
     }
+
+
+@app.get("/api/admin/picklists", dependencies=[Depends(_require_staff)])
+def batch_picklist(
+    status: Optional[str] = None,
+    ids: Optional[str] = None,
+    format: str = Query(default="json", pattern="^(json|csv)$"),
+):
+    match = {}
+    if ids:
+        raw_ids = [i.strip() for i in ids.split(",") if i.strip()]
+        if not all(ObjectId.is_valid(i) for i in raw_ids):
+            raise HTTPException(status_code=400, detail="Invalid request id")
+        match["_id"] = {"$in": [ObjectId(i) for i in raw_ids]}
+    if status:
+        match["status"] = status
+    if not match:
+        raise HTTPException(status_code=400, detail="status or ids required")
+    rows = iter_picklist(get_db(), match)
+    if format == "csv":
+        return StreamingResponse(
+            iter_picklist_csv(rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="picklist.csv"'},
+        )
+    return StreamingResponse(iter_picklist_json(rows), media_type="application/json")
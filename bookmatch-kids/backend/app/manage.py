@@ -0,0 +1,46 @@
+import argparse
+import json
+
+from .db import ensure_indexes, get_db
+from .services.analytics import rebuild_rollups
+from .services.identity import merge_duplicate_books
+from .services.versions import bump_version
+
+
+def migrate_created_at(db) -> int:
+    result = db.requests.update_many(
+        {"created_at": {"$type": "string"}},
+        [{"$set": {"created_at": {"$dateFromString": {"dateString": "$created_at", "onError": "$created_at"}}}}],
+    )
+    if result.modified_count:
+        bump_version(db, "requests")
+    return result.modified_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ensure-indexes", help="Create MongoDB indexes")
+    merge = commands.add_parser("merge-books", help="Merge duplicate books by ISBN-13 and title/author fingerprint")
+    merge.add_argument("--dry-run", action="store_true")
+    commands.add_parser("rebuild-rollups", help="Recompute analytics rollups from request history")
+    commands.add_parser("migrate-dates", help="Convert string request timestamps to BSON dates")
+    args = parser.parse_args()
+
+    db = get_db()
+    if args.command == "ensure-indexes":
+        ensure_indexes(db)
+        print("Indexes ensured")
+    elif args.command == "merge-books":
+        ensure_indexes(db)
+        print(json.dumps(merge_duplicate_books(db, dry_run=args.dry_run), indent=2))
+    elif args.command == "rebuild-rollups":
+        ensure_indexes(db)
+        print(json.dumps(rebuild_rollups(db), indent=2))
+    elif args.command == "migrate-dates":
+        ensure_indexes(db)
+        print(f"Converted {migrate_created_at(db)} request timestamps")
+
+
+if __name__ == "__main__":
+    main()
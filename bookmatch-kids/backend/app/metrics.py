@@ -0,0 +1,148 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from pymongo import monitoring
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS = {
+    "bookmatch_http_requests_total": ("counter", "HTTP requests by method, route template and status."),
+    "bookmatch_http_request_errors_total": ("counter", "HTTP requests that raised or returned a 5xx status."),
+    "bookmatch_http_request_duration_seconds": ("histogram", "Time until the response headers were sent."),
+    "bookmatch_upstream_request_duration_seconds": ("histogram", "Calls to external APIs by upstream and operation."),
+    "bookmatch_tts_first_byte_seconds": ("histogram", "Time to the first audio byte from the ElevenLabs stream."),
+    "bookmatch_mongo_command_duration_seconds": ("histogram", "MongoDB commands by collection and command name."),
+}
+_SERIES: Dict[str, Dict[Tuple[Tuple[str, str], ...], Any]] = {name: {} for name in METRICS}
+_LOCK = threading.Lock()
+
+
+def _labels(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name: str, labels: Dict[str, Any], amount: float = 1.0) -> None:
+    key = _labels(labels)
+    with _LOCK:
+        series = _SERIES[name]
+        series[key] = series.get(key, 0.0) + amount
+
+
+def observe(name: str, labels: Dict[str, Any], seconds: float) -> None:
+    key = _labels(labels)
+    with _LOCK:
+        series = _SERIES[name]
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist["buckets"][index] += 1
+                break
+        hist["sum"] += seconds
+        hist["count"] += 1
+
+
+@contextmanager
+def upstream_timer(upstream: str, operation: str) -> Iterator[dict]:
+    call: dict = {"status": None}
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield call
+        outcome = "error" if (call["status"] or 0) >= 400 else "ok"
+    finally:
+        observe(
+            "bookmatch_upstream_request_duration_seconds",
+            {"upstream": upstream, "operation": operation, "outcome": outcome},
+            time.perf_counter() - started,
+        )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render() -> str:
+    lines: List[str] = []
+    with _LOCK:
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(_SERIES[name].items()):
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, value["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {value['sum']:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        state: Dict[str, Any] = {"status": 500, "elapsed": None}
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["elapsed"] = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            labels = {"method": scope["method"], "route": route}
+            elapsed = state["elapsed"] if state["elapsed"] is not None else time.perf_counter() - started
+            inc("bookmatch_http_requests_total", {**labels, "status": state["status"]})
+            observe("bookmatch_http_request_duration_seconds", labels, elapsed)
+            if state["status"] >= 500:
+                inc("bookmatch_http_request_errors_total", labels)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self) -> None:
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event) -> None:
+        name = event.command_name
+        target = event.command.get("collection" if name == "getMore" else name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else "-"
+
+    def _record(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        observe(
+            "bookmatch_mongo_command_duration_seconds",
+            {"collection": collection, "command": event.command_name, "outcome": outcome},
+            event.duration_micros / 1_000_000,
+        )
+
+    def succeeded(self, event) -> None:
+        self._record(event, "ok")
+
+    def failed(self, event) -> None:
+        self._record(event, "error")
+
+
+mongo_listener = MongoCommandListener()
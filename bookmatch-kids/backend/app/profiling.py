@@ -0,0 +1,226 @@
+import asyncio
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from .auth import get_user_by_token
+
+
+PROFILE_HEADER = "x-profile"
+_SAMPLER_LOCK = threading.Lock()
+_PROFILES: "OrderedDict[str, dict]" = OrderedDict()
+_PROFILES_LOCK = threading.Lock()
+_REQUEST_STATE: Dict[str, Any] = {"active": 0, "last": 0.0}
+_ACTIVE: ContextVar[Optional[cProfile.Profile]] = ContextVar("bookmatch_profile", default=None)
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def max_sample_seconds() -> float:
+    return max(_env_float("PROFILE_MAX_SECONDS", 30), 1)
+
+
+def request_profiling_enabled() -> bool:
+    return os.getenv("PROFILE_REQUESTS_ENABLED", "true").lower() in {"1", "true", "yes"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}:{frame.f_lineno}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Dict[str, Any]:
+    if not _SAMPLER_LOCK.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running on this worker")
+    try:
+        seconds = min(max(seconds, 0.1), max_sample_seconds())
+        interval = min(max(interval, 0.001), 0.1)
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(interval)
+        return {
+            "seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": round(interval * 1000, 1),
+            "samples": samples,
+            "stacks": stacks,
+        }
+    finally:
+        _SAMPLER_LOCK.release()
+
+
+def collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_frames(stacks: Counter, limit: int = 20) -> list:
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [{"frame": frame, "samples": count, "share": round(count / total, 3)} for frame, count in leaves.most_common(limit)]
+
+
+def _claim_request_slot() -> bool:
+    with _PROFILES_LOCK:
+        now = time.monotonic()
+        if _REQUEST_STATE["active"] >= max(int(_env_float("PROFILE_MAX_CONCURRENT", 1)), 1):
+            return False
+        if now - _REQUEST_STATE["last"] < _env_float("PROFILE_COOLDOWN_SECONDS", 5):
+            return False
+        _REQUEST_STATE["active"] += 1
+        _REQUEST_STATE["last"] = now
+        return True
+
+
+def _release_request_slot() -> None:
+    with _PROFILES_LOCK:
+        _REQUEST_STATE["active"] -= 1
+
+
+def _save_profile(path: str, profiler: cProfile.Profile, elapsed: float) -> str:
+    profile_id = uuid.uuid4().hex[:12]
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.sort_stats("cumulative").print_stats(40)
+    record = {
+        "id": profile_id,
+        "path": path,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "duration_ms": round(elapsed * 1000, 1),
+        "report": buffer.getvalue(),
+        "stats": stats,
+    }
+    with _PROFILES_LOCK:
+        _PROFILES[profile_id] = record
+        while len(_PROFILES) > max(int(_env_float("PROFILE_KEEP", 20)), 1):
+            _PROFILES.popitem(last=False)
+    return profile_id
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    with _PROFILES_LOCK:
+        return _PROFILES.get(profile_id)
+
+
+def list_profiles() -> list:
+    with _PROFILES_LOCK:
+        return [
+            {k: v for k, v in record.items() if k not in {"report", "stats"}}
+            for record in reversed(_PROFILES.values())
+        ]
+
+
+def dump_profile(record: dict) -> bytes:
+    return marshal.dumps(record["stats"].stats)
+
+
+def _is_staff(request) -> bool:
+    authorization = request.headers.get("authorization") or ""
+    if not authorization.startswith("Bearer "):
+        return False
+    user = get_user_by_token(authorization.split(" ", 1)[1].strip())
+    return bool(user) and user.get("role") == "staff"
+
+
+def _profiled(call: Callable) -> Callable:
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            profiler = _ACTIVE.get()
+            if profiler is None:
+                return await call(*args, **kwargs)
+            profiler.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profiler.disable()
+
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profiler = _ACTIVE.get()
+        if profiler is None:
+            return call(*args, **kwargs)
+        profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    return wrapper
+
+
+class ProfilingRoute(APIRoute):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.dependant.call = _profiled(self.dependant.call)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request):
+            if (
+                not request.headers.get(PROFILE_HEADER)
+                or not request_profiling_enabled()
+                or not await run_in_threadpool(_is_staff, request)
+            ):
+                return await handler(request)
+            if not _claim_request_slot():
+                response = await handler(request)
+                response.headers["X-Profile-Status"] = "busy"
+                return response
+            profiler = cProfile.Profile()
+            token = _ACTIVE.set(profiler)
+            started = time.perf_counter()
+            try:
+                response = await handler(request)
+            finally:
+                _ACTIVE.reset(token)
+                _release_request_slot()
+            response.headers["X-Profile-Id"] = _save_profile(self.path, profiler, time.perf_counter() - started)
+            return response
+
+        return route_handler
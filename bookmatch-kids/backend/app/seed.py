@@ -1,5 +1,7 @@
 import random
 from .db import get_db
+from .services.identity import identity_fields
+from .services.versions import bump_version
 
 
 def seed():
@@ -400,7 +402,7 @@ def seed():
         },
     ]
 
-    result = db.books.insert_many(books)
+    result = db.books.insert_many([{**b, **identity_fields(b)} for b in books])
 
     inventory = []
     for book_id in result.inserted_ids:
@@ -413,6 +415,7 @@ def seed():
         )
 
     db.inventory.insert_many(inventory)
+    bump_version(db, "inventory", "stock")
 
 
 if __name__ == "__main__":
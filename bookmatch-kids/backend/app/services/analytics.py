@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+
+
+def _day_key(created_at: Any) -> str | None:
+    if isinstance(created_at, datetime):
+        return created_at.strftime("%Y-%m-%d")
+    if isinstance(created_at, str) and len(created_at) >= 10:
+        return created_at[:10]
+    return None
+
+
+def _inc(kind: str, key: str, amount: int) -> UpdateOne:
+    return UpdateOne(
+        {"_id": f"{kind}:{key}"},
+        {"$inc": {"count": amount}, "$setOnInsert": {"kind": kind, "key": key}},
+        upsert=True,
+    )
+
+
+def _rollup_tags(prefs: Any) -> List[str]:
+    tags = prefs.get("tags") if isinstance(prefs, dict) else None
+    if not isinstance(tags, list):
+        return []
+    return list(dict.fromkeys(tag.strip().lower() for tag in tags if isinstance(tag, str) and tag.strip()))
+
+
+def record_request(db, doc: Dict[str, Any]) -> None:
+    ops = [_inc("status", doc.get("status") or "unknown", 1)]
+    for tag in _rollup_tags(doc.get("parsed_preferences")):
+        ops.append(_inc("tag", tag, 1))
+    day = _day_key(doc.get("created_at"))
+    if day:
+        ops.append(_inc("day", day, 1))
+    db.analytics_rollups.bulk_write(ops, ordered=False)
+
+
+def record_status_change(db, old_status: str | None, new_status: str) -> None:
+    old_status = old_status or "unknown"
+    if old_status == new_status:
+        return
+    db.analytics_rollups.bulk_write(
+        [_inc("status", old_status, -1), _inc("status", new_status, 1)],
+        ordered=False,
+    )
+
+
+def read_analytics(db, days: int = 7, top: int = 5) -> Dict[str, Any]:
+    status_counts = {
+        doc["key"]: doc["count"]
+        for doc in db.analytics_rollups.find({"kind": "status", "count": {"$gt": 0}})
+    }
+    top_tags = db.analytics_rollups.find({"kind": "tag", "count": {"$gt": 0}}).sort("count", -1).limit(top)
+
+    start = datetime.utcnow() - timedelta(days=days - 1)
+    day_keys = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    daily_counts = {
+        doc["key"]: doc["count"]
+        for doc in db.analytics_rollups.find({"_id": {"$in": [f"day:{key}" for key in day_keys]}})
+    }
+    return {
+        "status_counts": status_counts,
+        "top_tags": [{"tag": doc["key"], "count": doc["count"]} for doc in top_tags],
+        "daily": [{"date": key, "count": daily_counts.get(key, 0)} for key in day_keys],
+    }
+
+
+_DAY_EXPR = {
+    "$cond": [
+        {"$eq": [{"$type": "$created_at"}, "date"]},
+        {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+        {"$substrBytes": ["$created_at", 0, 10]},
+    ]
+}
+
+
+_TAGS_EXPR = {
+    "$map": {
+        "input": {
+            "$filter": {
+                "input": {"$cond": [{"$isArray": "$parsed_preferences.tags"}, "$parsed_preferences.tags", []]},
+                "cond": {"$eq": [{"$type": "$$this"}, "string"]},
+            }
+        },
+        "in": {"$toLower": {"$trim": {"input": "$$this"}}},
+    }
+}
+
+
+def _rollup_pipelines() -> Dict[str, List[dict]]:
+    return {
+        "status": [{"$group": {"_id": {"$ifNull": ["$status", "unknown"]}, "count": {"$sum": 1}}}],
+        "tag": [
+            {"$project": {"tags": {"$setUnion": [_TAGS_EXPR, []]}}},
+            {"$unwind": "$tags"},
+            {"$match": {"tags": {"$ne": ""}}},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ],
+        "day": [
+            {"$match": {"$or": [{"created_at": {"$type": "string"}}, {"created_at": {"$type": "date"}}]}},
+            {"$group": {"_id": _DAY_EXPR, "count": {"$sum": 1}}},
+        ],
+    }
+
+
+def range_analytics(db, start: datetime | None, end: datetime | None, top: int = 5) -> Dict[str, Any]:
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=7)
+    pipelines = _rollup_pipelines()
+    pipeline = [
+        {"$match": {"created_at": {"$gte": start, "$lt": end}}},
+        {
+            "$facet": {
+                "status": pipelines["status"],
+                "tag": [*pipelines["tag"], {"$sort": {"count": -1}}, {"$limit": top}],
+                "day": [{"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}}],
+            }
+        },
+    ]
+    result = next(db.requests.aggregate(pipeline), {})
+    daily_counts = {row["_id"]: row["count"] for row in result.get("day", [])}
+    days = min(max((end - start).days + (1 if end.time() != datetime.min.time() else 0), 1), 366)
+    day_keys = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    return {
+        "status_counts": {row["_id"]: row["count"] for row in result.get("status", [])},
+        "top_tags": [{"tag": row["_id"], "count": row["count"]} for row in result.get("tag", [])],
+        "daily": [{"date": key, "count": daily_counts.get(key, 0)} for key in day_keys],
+    }
+
+
+def rebuild_rollups(db) -> Dict[str, int]:
+    ops = []
+    keep = set()
+    totals: Dict[str, int] = {}
+    for kind, pipeline in _rollup_pipelines().items():
+        totals[kind] = 0
+        for row in db.requests.aggregate(pipeline, allowDiskUse=True):
+            if row["_id"] in (None, ""):
+                continue
+            rollup_id = f"{kind}:{row['_id']}"
+            keep.add(rollup_id)
+            totals[kind] += 1
+            ops.append(
+                UpdateOne(
+                    {"_id": rollup_id},
+                    {"$set": {"kind": kind, "key": row["_id"], "count": row["count"]}},
+                    upsert=True,
+                )
+            )
+    if ops:
+        db.analytics_rollups.bulk_write(ops, ordered=False)
+    stale = db.analytics_rollups.delete_many({"_id": {"$nin": sorted(keep)}})
+    return {**totals, "removed": stale.deleted_count}
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+
+from .identity import identity_fields, identity_keys, isbn_conflict, resolve_books
+from .versions import bump_version, current_version
+
+
+BOOK_SNAPSHOT_FIELDS = ("title", "author", "format", "cover_url")
+_STOCK: dict = {"version": None, "loaded_at": 0.0, "books": None, "hits": 0, "loads": 0, "load_ms": None}
+_STOCK_LOCK = threading.Lock()
+_STOCK_LOAD_LOCK = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def stock_cache_seconds() -> float:
+    return max(_env_float("CATALOG_CACHE_SECONDS", 30), 0)
+
+
+def google_books_enabled() -> bool:
+    return os.getenv("GOOGLE_BOOKS_ENABLED", "true").lower() in {"1", "true", "yes"}
+
+
+def store_google_books(
+    db,
+    results: List[Dict[str, Any]],
+    location_id: str = "main",
+    extra_tags: List[str] | None = None,
+) -> List[dict]:
+    extra_tags = [t.lower() for t in (extra_tags or []) if t]
+    books = [{**book, **identity_fields(book)} for book in results if book.get("source_id")]
+    imported = []
+    seen = set()
+    local: Dict[tuple, dict] = {}
+    stocked = 0
+    touched = False
+    for book, existing in zip(books, resolve_books(db, books)):
+        keys = identity_keys(book)
+        existing = existing or next(
+            (local[key] for key in keys if key in local and not isbn_conflict(book, local[key])), None
+        )
+        if existing:
+            if existing["_id"] in seen:
+                continue
+            seen.add(existing["_id"])
+            if extra_tags:
+                db.books.update_one({"_id": existing["_id"]}, {"$addToSet": {"tags": {"$each": extra_tags}}})
+                touched = True
+                existing["tags"] = sorted(set(existing.get("tags") or []) | set(extra_tags))
+            if not db.inventory.find_one({"book_id": existing["_id"]}):
+                db.inventory.insert_one(
+                    {"book_id": existing["_id"], "location_id": location_id, "qty_available": 1}
+                )
+                stocked += 1
+            imported.append(existing)
+            continue
+        if extra_tags:
+            book["tags"] = sorted(set(book.get("tags") or []) | set(extra_tags))
+        result = db.books.insert_one(book)
+        book["_id"] = result.inserted_id
+        seen.add(book["_id"])
+        for key in keys:
+            local.setdefault(key, book)
+        db.inventory.insert_one(
+            {"book_id": result.inserted_id, "location_id": location_id, "qty_available": 1}
+        )
+        stocked += 1
+        imported.append(book)
+    if stocked:
+        bump_version(db, "inventory", "stock")
+    if stocked or touched:
+        bump_version(db, "books")
+    return imported
+
+
+def snapshot_matches(db, matched: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    ids = list({ObjectId(m["book_id"]) for m in matched if ObjectId.is_valid(m.get("book_id") or "")})
+    if not ids:
+        return matched
+    projection = {field: 1 for field in BOOK_SNAPSHOT_FIELDS}
+    books = {str(book["_id"]): book for book in db.books.find({"_id": {"$in": ids}}, projection)}
+    out = []
+    for match in matched:
+        book = books.get(match.get("book_id"))
+        if book:
+            match = {**match, **{field: book.get(field) or "" for field in BOOK_SNAPSHOT_FIELDS}}
+        out.append(match)
+    return out
+
+
+def _cached_stock(version: int) -> List[dict] | None:
+    with _STOCK_LOCK:
+        fresh = time.monotonic() - _STOCK["loaded_at"] < stock_cache_seconds()
+        if _STOCK["books"] is None or _STOCK["version"] != version or not fresh:
+            return None
+        _STOCK["hits"] += 1
+        return list(_STOCK["books"])
+
+
+def in_stock_books(db) -> Tuple[List[dict], bool]:
+    version = current_version(db, "stock")
+    cached = _cached_stock(version)
+    if cached is not None:
+        return cached, True
+    with _STOCK_LOAD_LOCK:
+        cached = _cached_stock(version)
+        if cached is not None:
+            return cached, True
+        started = time.perf_counter()
+        in_stock = {str(item["book_id"]) for item in db.inventory.find({"qty_available": {"$gt": 0}}, {"book_id": 1})}
+        books = [book for book in db.books.find({}) if str(book["_id"]) in in_stock]
+        with _STOCK_LOCK:
+            _STOCK.update(version=version, loaded_at=time.monotonic(), books=books)
+            _STOCK["loads"] += 1
+            _STOCK["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return list(books), False
+
+
+def stock_cache_stats() -> Dict[str, Any]:
+    with _STOCK_LOCK:
+        books = _STOCK["books"]
+        return {
+            "books": len(books) if books is not None else None,
+            "version": _STOCK["version"],
+            "age_seconds": round(time.monotonic() - _STOCK["loaded_at"], 1) if books is not None else None,
+            "ttl_seconds": stock_cache_seconds(),
+            "hits": _STOCK["hits"],
+            "loads": _STOCK["loads"],
+            "last_load_ms": _STOCK["load_ms"],
+        }
@@ -1,10 +1,20 @@
 import os
 import json
+import threading
+import time
 import requests
 from functools import lru_cache
-from typing import Optional
+from typing import Iterator, Optional
+
+from ..metrics import observe, upstream_timer
 
 ELEVEN_BASE = "https://api.elevenlabs.io/v1"
+_STREAM_STATS = {"streams": 0, "completed": 0, "failed": 0, "first_bytes": 0, "ttfb_seconds": 0.0, "ttfb_max": 0.0, "bytes": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _api_base() -> str:
+    return os.getenv("ELEVENLABS_API_BASE", ELEVEN_BASE).strip().rstrip("/")
 
 
 def _api_key() -> Optional[str]:
@@ -25,11 +35,13 @@ def _resolve_voice_id() -> Optional[str]:
     if not api_key:
         return None
 
-    resp = requests.get(
-        f"{ELEVEN_BASE}/voices",
-        headers={"xi-api-key": api_key},
-        timeout=20,
-    )
+    with upstream_timer("elevenlabs", "voices") as call:
+        resp = requests.get(
+            f"{_api_base()}/voices",
+            headers={"xi-api-key": api_key},
+            timeout=20,
+        )
+        call["status"] = resp.status_code
     resp.raise_for_status()
     data = resp.json()
     for voice in data.get("voices", []):
@@ -39,17 +51,16 @@ def _resolve_voice_id() -> Optional[str]:
     return None
 
 
-def text_to_speech(text: str) -> bytes:
-    api_key = _api_key()
-    if not api_key:
+def speech_params() -> dict:
+    if not _api_key():
         raise RuntimeError("ELEVENLABS_API_KEY not set")
 
     voice_id = _resolve_voice_id()
     if not voice_id:
         raise RuntimeError("ELEVENLABS_VOICE_ID or ELEVENLABS_VOICE_NAME not set or not found")
 
-    payload = {
-        "text": text,
+    return {
+        "voice_id": voice_id,
         "model_id": os.getenv("ELEVENLABS_MODEL_ID", "eleven_turbo_v2"),
         "voice_settings": {
             "stability": 0.4,
@@ -57,15 +68,101 @@ def text_to_speech(text: str) -> bytes:
         },
     }
 
-    resp = requests.post(
-        f"{ELEVEN_BASE}/text-to-speech/{voice_id}",
-        headers={
-            "xi-api-key": api_key,
-            "accept": "audio/mpeg",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps(payload),
-        timeout=30,
-    )
+
+def text_to_speech(text: str, params: Optional[dict] = None) -> bytes:
+    params = params or speech_params()
+    payload = {
+        "text": text,
+        "model_id": params["model_id"],
+        "voice_settings": params["voice_settings"],
+    }
+
+    with upstream_timer("elevenlabs", "tts") as call:
+        resp = requests.post(
+            f"{_api_base()}/text-to-speech/{params['voice_id']}",
+            headers=_headers(),
+            data=json.dumps(payload),
+            timeout=30,
+        )
+        call["status"] = resp.status_code
     resp.raise_for_status()
     return resp.content
+
+
+def _headers() -> dict:
+    return {
+        "xi-api-key": _api_key(),
+        "accept": "audio/mpeg",
+        "Content-Type": "application/json",
+    }
+
+
+def _record_stream(**values) -> None:
+    with _STATS_LOCK:
+        for name, value in values.items():
+            if name == "ttfb":
+                _STREAM_STATS["first_bytes"] += 1
+                _STREAM_STATS["ttfb_seconds"] += value
+                _STREAM_STATS["ttfb_max"] = max(_STREAM_STATS["ttfb_max"], value)
+            else:
+                _STREAM_STATS[name] += value
+
+
+def _iter_stream(resp: requests.Response, started: float, chunk_size: int) -> Iterator[bytes]:
+    first = True
+    try:
+        for chunk in resp.iter_content(chunk_size=chunk_size):
+            if not chunk:
+                continue
+            if first:
+                ttfb = time.perf_counter() - started
+                _record_stream(ttfb=ttfb)
+                observe("bookmatch_tts_first_byte_seconds", {}, ttfb)
+                first = False
+            _record_stream(bytes=len(chunk))
+            yield chunk
+        _record_stream(completed=1)
+    except requests.RequestException:
+        _record_stream(failed=1)
+        raise
+    finally:
+        resp.close()
+
+
+def open_speech_stream(text: str, params: Optional[dict] = None, chunk_size: int = 4096) -> Iterator[bytes]:
+    params = params or speech_params()
+    payload = {
+        "text": text,
+        "model_id": params["model_id"],
+        "voice_settings": params["voice_settings"],
+    }
+    started = time.perf_counter()
+    _record_stream(streams=1)
+    try:
+        with upstream_timer("elevenlabs", "stream") as call:
+            resp = requests.post(
+                f"{_api_base()}/text-to-speech/{params['voice_id']}/stream",
+                headers=_headers(),
+                data=json.dumps(payload),
+                timeout=30,
+                stream=True,
+            )
+            call["status"] = resp.status_code
+        resp.raise_for_status()
+    except requests.RequestException:
+        _record_stream(failed=1)
+        raise
+    return _iter_stream(resp, started, chunk_size)
+
+
+def stream_stats() -> dict:
+    with _STATS_LOCK:
+        measured = _STREAM_STATS["first_bytes"]
+        return {
+            "streams": _STREAM_STATS["streams"],
+            "completed": _STREAM_STATS["completed"],
+            "failed": _STREAM_STATS["failed"],
+            "bytes": _STREAM_STATS["bytes"],
+            "avg_ttfb_ms": round(_STREAM_STATS["ttfb_seconds"] / measured * 1000, 1) if measured else 0.0,
+            "max_ttfb_ms": round(_STREAM_STATS["ttfb_max"] * 1000, 1),
+        }
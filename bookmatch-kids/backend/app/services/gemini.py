@@ -7,17 +7,30 @@ from typing import Dict, Any
 
 import requests
 
+from ..metrics import upstream_timer
+from ..tracing import annotate
 
 DEFAULT_GEMINI_MODEL = "gemini-2.5-flash"
-DEFAULT_GEMINI_VERSION = os.getenv("GEMINI_API_VERSION", "v1")
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com"
+DEFAULT_GEMINI_VERSION = "v1"
 _CACHE: dict[str, dict] = {}
 _CACHE_TTL_SECONDS = 90
+_RESOLVED: dict = {"model": None, "version": None}
+
+
+def _api_base() -> str:
+    return os.getenv("GEMINI_API_BASE", GEMINI_API_BASE).strip().rstrip("/")
+
+
+def _versions() -> list[str]:
+    preferred = _RESOLVED["version"] or os.getenv("GEMINI_API_VERSION") or DEFAULT_GEMINI_VERSION
+    return list(dict.fromkeys([preferred, "v1beta"]))
 
 
 def _endpoint(model: str | None = None, version: str | None = None) -> str:
-    use_model = model or os.getenv("GEMINI_MODEL") or DEFAULT_GEMINI_MODEL
-    use_version = version or DEFAULT_GEMINI_VERSION
-    return f"https://generativelanguage.googleapis.com/{use_version}/models/{use_model}:generateContent"
+    use_model = model or _RESOLVED["model"] or os.getenv("GEMINI_MODEL") or DEFAULT_GEMINI_MODEL
+    use_version = version or _versions()[0]
+    return f"{_api_base()}/{use_version}/models/{use_model}:generateContent"
 
 
 def _cache_key(payload: Dict[str, Any], model: str | None, version: str) -> str:
@@ -39,12 +52,12 @@ def _save_cache(key: str, data: Dict[str, Any]) -> None:
     _CACHE[key] = {"ts": time.time(), "data": data}
 
 
-def _post_gemini(payload: Dict[str, Any], model: str | None = None) -> Dict[str, Any]:
+def _post_gemini(payload: Dict[str, Any], model: str | None = None, operation: str = "generate") -> Dict[str, Any]:
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not set")
 
-    versions = [DEFAULT_GEMINI_VERSION, "v1beta"]
+    versions = _versions()
     tried = []
     last_err = None
     for version in versions:
@@ -53,16 +66,19 @@ def _post_gemini(payload: Dict[str, Any], model: str | None = None) -> Dict[str,
         tried.append(version)
         cache_key = _cache_key(payload, model, version)
         cached = _from_cache(cache_key)
+        annotate(cache_hit=bool(cached))
         if cached:
             return cached
         try:
             for attempt in range(3):
-                resp = requests.post(
-                    _endpoint(model, version=version),
-                    params={"key": api_key},
-                    json=payload,
-                    timeout=20,
-                )
+                with upstream_timer("gemini", operation) as call:
+                    resp = requests.post(
+                        _endpoint(model, version=version),
+                        params={"key": api_key},
+                        json=payload,
+                        timeout=20,
+                    )
+                    call["status"] = resp.status_code
                 if resp.status_code == 429:
                     time.sleep(1.5 * (attempt + 1))
                     continue
@@ -93,7 +109,7 @@ def list_models() -> Dict[str, Any]:
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not set")
 
-    versions = [DEFAULT_GEMINI_VERSION, "v1beta"]
+    versions = _versions()
     tried = []
     last_err = None
     for version in versions:
@@ -101,12 +117,15 @@ def list_models() -> Dict[str, Any]:
             continue
         tried.append(version)
         try:
-            resp = requests.get(
-                f"https://generativelanguage.googleapis.com/{version}/models",
-                params={"key": api_key},
-                timeout=20,
-            )
+            with upstream_timer("gemini", "models") as call:
+                resp = requests.get(
+                    f"{_api_base()}/{version}/models",
+                    params={"key": api_key},
+                    timeout=20,
+                )
+                call["status"] = resp.status_code
             resp.raise_for_status()
+            _RESOLVED["version"] = version
             return resp.json()
         except requests.HTTPError as exc:
             last_err = exc
@@ -121,6 +140,24 @@ def list_models() -> Dict[str, Any]:
     raise RuntimeError("Gemini model list failed")
 
 
+def resolve_model() -> Dict[str, Any]:
+    names = {
+        item.get("name", "").split("/", 1)[-1]
+        for item in list_models().get("models", [])
+        if "generateContent" in item.get("supportedGenerationMethods", ["generateContent"])
+    }
+    wanted = os.getenv("GEMINI_MODEL") or DEFAULT_GEMINI_MODEL
+    if wanted in names or not names:
+        model = wanted
+    elif DEFAULT_GEMINI_MODEL in names:
+        model = DEFAULT_GEMINI_MODEL
+    else:
+        flash = sorted(name for name in names if "flash" in name)
+        model = (flash or sorted(names))[-1]
+    _RESOLVED["model"] = model
+    return {"model": model, "version": _RESOLVED["version"], "requested": wanted}
+
+
 KEYWORD_TAGS = {
     "space": "space",
     "planet": "space",
@@ -222,7 +259,7 @@ def _gemini_parse(text: str, meta: Dict[str, Any], model: str | None = None) ->
         ]
     }
 
-    data = _post_gemini(payload, model=model)
+    data = _post_gemini(payload, model=model, operation="parse")
 
     text_out = ""
     try:
@@ -288,7 +325,7 @@ def explain_matches(message: str, prefs: Dict[str, Any], books: list, model: str
                 {"role": "user", "parts": [{"text": json.dumps({"message": message, "prefs": prefs, "books": books})}]},
             ]
         }
-        data = _post_gemini(payload, model=model)
+        data = _post_gemini(payload, model=model, operation="explain")
         text_out = data["candidates"][0]["content"]["parts"][0]["text"].strip()
         return {"response": text_out}
     except Exception:
@@ -316,7 +353,7 @@ def summarize_book(book: Dict[str, Any], model: str | None = None) -> Dict[str,
                 {"role": "user", "parts": [{"text": json.dumps(book)}]},
             ]
         }
-        data = _post_gemini(payload, model=model)
+        data = _post_gemini(payload, model=model, operation="summary")
         text_out = data["candidates"][0]["content"]["parts"][0]["text"].strip()
         return {"summary": text_out}
     except Exception:
@@ -345,7 +382,7 @@ def concierge_reply(message: str, history: list, model: str | None = None) -> Di
                 {"role": "user", "parts": [{"text": json.dumps({"message": message, "history": history})}]},
             ]
         }
-        data = _post_gemini(payload, model=model)
+        data = _post_gemini(payload, model=model, operation="concierge")
         text_out = data["candidates"][0]["content"]["parts"][0]["text"].strip()
         if text_out.startswith("```"):
             text_out = re.sub(r"^```(json)?", "", text_out).strip()
@@ -368,6 +405,6 @@ def test_gemini(model: str | None = None) -> Dict[str, Any]:
             {"role": "user", "parts": [{"text": "Say OK in one word."}]},
         ]
     }
-    data = _post_gemini(payload, model=model)
+    data = _post_gemini(payload, model=model, operation="test")
     text_out = data["candidates"][0]["content"]["parts"][0]["text"].strip()
     return {"reply": text_out}
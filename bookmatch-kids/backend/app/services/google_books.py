@@ -4,6 +4,7 @@ from urllib.parse import urlencode, urlparse, urlunparse, parse_qsl
 
 import requests
 
+from ..metrics import upstream_timer
 
 GOOGLE_BOOKS_ENDPOINT = "https://www.googleapis.com/books/v1/volumes"
 BOOKCOVER_API_URL = "https://bookcover.longitood.com"
@@ -95,7 +96,9 @@ def search_google_books(query: str, max_results: int = 5, language: str | None =
     if language:
         params["langRestrict"] = language[:2].lower()
 
-    resp = requests.get(GOOGLE_BOOKS_ENDPOINT, params=params, timeout=20)
+    with upstream_timer("google_books", "search") as call:
+        resp = requests.get(os.getenv("GOOGLE_BOOKS_API_URL", GOOGLE_BOOKS_ENDPOINT), params=params, timeout=20)
+        call["status"] = resp.status_code
     resp.raise_for_status()
     data = resp.json()
     items = data.get("items", []) or []
@@ -107,16 +110,18 @@ def _bookcover_lookup(title: str, author: str | None = None, isbn: str | None =
     if not base_url:
         return ""
     try:
-        if isbn:
-            resp = requests.get(f"{base_url}/bookcover/{isbn}", timeout=20)
-        elif title and author:
-            resp = requests.get(
-                f"{base_url}/bookcover",
-                params={"book_title": title, "author_name": author},
-                timeout=20,
-            )
-        else:
+        if not isbn and not (title and author):
             return ""
+        with upstream_timer("bookcover", "isbn" if isbn else "title") as call:
+            if isbn:
+                resp = requests.get(f"{base_url}/bookcover/{isbn}", timeout=20)
+            else:
+                resp = requests.get(
+                    f"{base_url}/bookcover",
+                    params={"book_title": title, "author_name": author},
+                    timeout=20,
+                )
+            call["status"] = resp.status_code
         if not resp.ok:
             return ""
         data = resp.json()
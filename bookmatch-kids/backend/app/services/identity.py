@@ -0,0 +1,199 @@
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from pymongo import DeleteOne, UpdateOne
+
+from .versions import bump_version
+
+
+_ARTICLES = {"the", "a", "an", "el", "la", "los", "las"}
+
+
+def canonical_isbn13(raw: str | None) -> str:
+    if not raw:
+        return ""
+    value = re.sub(r"[^0-9Xx]", "", str(raw)).upper()
+    if len(value) == 10:
+        if not value[:9].isdigit() or not (value[9].isdigit() or value[9] == "X"):
+            return ""
+        total = sum((10 - i) * (10 if c == "X" else int(c)) for i, c in enumerate(value))
+        if total % 11 != 0:
+            return ""
+        value = "978" + value[:9]
+        check = (10 - sum((1 if i % 2 == 0 else 3) * int(c) for i, c in enumerate(value)) % 10) % 10
+        return value + str(check)
+    if len(value) == 13 and value.isdigit() and value[:3] in {"978", "979"}:
+        check = (10 - sum((1 if i % 2 == 0 else 3) * int(c) for i, c in enumerate(value[:12])) % 10) % 10
+        return value if check == int(value[12]) else ""
+    return ""
+
+
+def _normalize_words(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def fingerprint(title: str | None, author: str | None) -> str:
+    title = (title or "").split(":", 1)[0]
+    title_words = _normalize_words(title)
+    while len(title_words) > 1 and title_words[0] in _ARTICLES:
+        title_words = title_words[1:]
+    author_words = sorted(w for w in _normalize_words(author or "") if len(w) > 1)
+    if not title_words or not author_words or author_words == ["author", "unknown"]:
+        return ""
+    return f"{' '.join(title_words)}|{' '.join(author_words)}"
+
+
+def identity_fields(book: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "isbn13": canonical_isbn13(book.get("isbn")),
+        "fingerprint": fingerprint(book.get("title"), book.get("author")),
+    }
+
+
+def identity_keys(book: Dict[str, Any]) -> List[tuple]:
+    keys = []
+    if book.get("isbn13"):
+        keys.append(("isbn13", book["isbn13"]))
+    if book.get("source") == "google" and book.get("source_id"):
+        keys.append(("source_id", book["source_id"]))
+    if book.get("isbn"):
+        keys.append(("isbn", book["isbn"]))
+    if book.get("fingerprint"):
+        keys.append(("fingerprint", book["fingerprint"]))
+    return keys
+
+
+def isbn_conflict(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return bool(a.get("isbn13") and b.get("isbn13") and a["isbn13"] != b["isbn13"])
+
+
+def resolve_books(db, books: List[Dict[str, Any]], projection: Dict[str, int] | None = None) -> List[Optional[dict]]:
+    wanted: Dict[str, set] = {"isbn13": set(), "source_id": set(), "isbn": set(), "fingerprint": set()}
+    for book in books:
+        for field, value in identity_keys(book):
+            wanted[field].add(value)
+    clauses = [{field: {"$in": sorted(values)}} for field, values in wanted.items() if values]
+    if not clauses:
+        return [None for _ in books]
+
+    if projection is not None:
+        projection = {**projection, "isbn13": 1, "source": 1, "source_id": 1, "isbn": 1, "fingerprint": 1}
+    index: Dict[tuple, List[dict]] = {}
+    for doc in db.books.find({"$or": clauses}, projection).sort("_id", 1):
+        for key in identity_keys(doc):
+            index.setdefault(key, []).append(doc)
+    resolved = []
+    for book in books:
+        candidates = (doc for key in identity_keys(book) for doc in index.get(key, []))
+        resolved.append(next((doc for doc in candidates if not isbn_conflict(book, doc)), None))
+    return resolved
+
+
+def backfill_identity(db, batch_size: int = 500) -> int:
+    updated = 0
+    ops = []
+    query = {"$or": [{"isbn13": {"$exists": False}}, {"fingerprint": {"$exists": False}}]}
+    for book in db.books.find(query, {"isbn": 1, "title": 1, "author": 1}):
+        ops.append(UpdateOne({"_id": book["_id"]}, {"$set": identity_fields(book)}))
+        if len(ops) >= batch_size:
+            updated += db.books.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += db.books.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def _duplicate_groups(db) -> List[List[Any]]:
+    parent: Dict[Any, Any] = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for field in ("isbn13", "fingerprint"):
+        pipeline = [
+            {"$match": {field: {"$nin": ["", None]}}},
+            {"$group": {"_id": f"${field}", "books": {"$push": {"id": "$_id", "isbn13": "$isbn13"}}, "n": {"$sum": 1}}},
+            {"$match": {"n": {"$gt": 1}}},
+        ]
+        for row in db.books.aggregate(pipeline, allowDiskUse=True):
+            books = row["books"]
+            if len({book["isbn13"] for book in books if book.get("isbn13")}) > 1:
+                books = [book for book in books if not book.get("isbn13")]
+            ids = [book["id"] for book in books]
+            for other in ids[1:]:
+                a, b = find(ids[0]), find(other)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+    groups: Dict[Any, List[Any]] = {}
+    for node in list(parent):
+        groups.setdefault(find(node), []).append(node)
+    return [sorted(ids) for ids in groups.values() if len(ids) > 1]
+
+
+def merge_duplicate_books(db, dry_run: bool = False) -> Dict[str, Any]:
+    backfilled = 0 if dry_run else backfill_identity(db)
+    groups = _duplicate_groups(db)
+    merged = 0
+    for ids in groups:
+        winner_id, loser_ids = ids[0], ids[1:]
+        if dry_run:
+            merged += len(loser_ids)
+            continue
+        docs = {doc["_id"]: doc for doc in db.books.find({"_id": {"$in": ids}})}
+        winner = docs.get(winner_id)
+        if not winner:
+            continue
+        fill = {}
+        for loser_id in loser_ids:
+            for field, value in (docs.get(loser_id) or {}).items():
+                if field != "_id" and value not in (None, "", []) and winner.get(field) in (None, "", []):
+                    fill.setdefault(field, value)
+        if fill:
+            db.books.update_one({"_id": winner_id}, {"$set": fill})
+
+        inventory_ops = []
+        for item in db.inventory.find({"book_id": {"$in": loser_ids}}):
+            inventory_ops.append(
+                UpdateOne(
+                    {"book_id": winner_id, "location_id": item.get("location_id", "main")},
+                    {
+                        "$inc": {
+                            "qty_available": item.get("qty_available", 0),
+                            "qty_reserved": item.get("qty_reserved", 0),
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+            inventory_ops.append(DeleteOne({"_id": item["_id"]}))
+        if inventory_ops:
+            db.inventory.bulk_write(inventory_ops, ordered=True)
+        db.reservations.update_many({"book_id": {"$in": loser_ids}}, {"$set": {"book_id": winner_id}})
+
+        winner_str = str(winner_id)
+        for loser_id in loser_ids:
+            loser_str = str(loser_id)
+            db.requests.update_many(
+                {"matched.book_id": loser_str},
+                {"$set": {"matched.$[m].book_id": winner_str}},
+                array_filters=[{"m.book_id": loser_str}],
+            )
+            db.users.update_many(
+                {"last_recommendations": loser_str},
+                {"$set": {"last_recommendations.$[r]": winner_str}},
+                array_filters=[{"r": loser_str}],
+            )
+        db.books.delete_many({"_id": {"$in": loser_ids}})
+        merged += len(loser_ids)
+    if merged and not dry_run:
+        bump_version(db, "requests")
+        bump_version(db, "inventory", "stock")
+        bump_version(db, "books")
+    return {"backfilled": backfilled, "groups": len(groups), "merged": merged, "dry_run": dry_run}
@@ -0,0 +1,245 @@
+import codecs
+import csv
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from bson import ObjectId
+
+from .inventory_import import DEFAULT_CHUNK_SIZE, backfill_covers, chunked, import_chunk, iter_csv_rows
+
+_EXECUTOR: dict = {"pool": None}
+
+
+def jobs_dir() -> Path:
+    path = Path(os.getenv("IMPORT_JOBS_DIR") or Path(tempfile.gettempdir()) / "bookmatch-imports")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _pool() -> ThreadPoolExecutor:
+    if _EXECUTOR["pool"] is None:
+        try:
+            workers = max(int(os.getenv("IMPORT_JOB_WORKERS") or 1), 1)
+        except ValueError:
+            workers = 1
+        _EXECUTOR["pool"] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import-job")
+    return _EXECUTOR["pool"]
+
+
+def _iter_file_rows(path: Path) -> Iterator[dict]:
+    with path.open("rb") as handle:
+        yield from iter_csv_rows(codecs.iterdecode(handle, "utf-8-sig"))
+
+
+def create_job(db, path: Path, filename: str, location_id: str, default_qty: int, user_id=None) -> dict:
+    now = datetime.utcnow()
+    doc = {
+        "kind": "inventory_import",
+        "status": "queued",
+        "filename": filename,
+        "path": str(path),
+        "location_id": location_id,
+        "default_qty": default_qty,
+        "chunk_size": DEFAULT_CHUNK_SIZE,
+        "user_id": user_id,
+        "total_rows": None,
+        "rows_processed": 0,
+        "committed_rows": 0,
+        "new_rows": 0,
+        "changed_rows": 0,
+        "unchanged_rows": 0,
+        "inserted_books": 0,
+        "updated_books": 0,
+        "inventory_upserts": 0,
+        "skipped": 0,
+        "covers_pending": 0,
+        "cancel_requested": False,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = db.import_jobs.insert_one(doc)
+    doc["_id"] = result.inserted_id
+    return doc
+
+
+def new_job_path() -> Path:
+    return jobs_dir() / f"{ObjectId()}.csv"
+
+
+def submit_job(job_id: ObjectId) -> None:
+    _pool().submit(_run_job, job_id)
+
+
+def _count_rows(path: Path) -> int:
+    with path.open("rb") as handle:
+        reader = csv.reader(codecs.iterdecode(handle, "utf-8-sig"))
+        return max(sum(1 for row in reader if row) - 1, 0)
+
+
+def _run_job(job_id: ObjectId) -> None:
+    from ..db import get_db
+
+    db = get_db()
+    now = datetime.utcnow()
+    job = db.import_jobs.find_one_and_update(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {"status": "running", "run_started_at": now, "updated_at": now}},
+        return_document=True,
+    )
+    if not job:
+        return
+    db.import_jobs.update_one({"_id": job_id}, {"$set": {"run_start_rows": job["committed_rows"]}})
+    try:
+        path = Path(job["path"])
+        if job.get("total_rows") is None:
+            db.import_jobs.update_one({"_id": job_id}, {"$set": {"total_rows": _count_rows(path)}})
+        committed = job["committed_rows"]
+        rows = islice(_iter_file_rows(path), committed, None)
+        for chunk in chunked(rows, job.get("chunk_size") or DEFAULT_CHUNK_SIZE):
+            state = db.import_jobs.find_one({"_id": job_id}, {"cancel_requested": 1})
+            if state and state.get("cancel_requested"):
+                db.import_jobs.update_one(
+                    {"_id": job_id},
+                    {"$set": {"status": "cancelled", "updated_at": datetime.utcnow()}},
+                )
+                return
+            result = import_chunk(db, chunk, job["location_id"], job["default_qty"], start_row=committed + 1)
+            if result["rejected"]:
+                db.import_job_errors.insert_many(
+                    [{"job_id": job_id, **rejected} for rejected in result["rejected"]]
+                )
+            committed += result["rows"]
+            db.import_jobs.update_one(
+                {"_id": job_id},
+                {
+                    "$set": {
+                        "committed_rows": committed,
+                        "rows_processed": committed,
+                        "updated_at": datetime.utcnow(),
+                    },
+                    "$inc": {
+                        "new_rows": result["new_rows"],
+                        "changed_rows": result["changed_rows"],
+                        "unchanged_rows": result["unchanged_rows"],
+                        "inserted_books": result["inserted_books"],
+                        "updated_books": result["updated_books"],
+                        "inventory_upserts": result["inventory_upserts"],
+                        "skipped": result["skipped"],
+                    },
+                    "$push": {"missing_covers": {"$each": result["missing_covers"]}},
+                },
+            )
+        job = db.import_jobs.find_one_and_update(
+            {"_id": job_id},
+            {
+                "$set": {"status": "completed", "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                "$unset": {"missing_covers": ""},
+            },
+        )
+        path.unlink(missing_ok=True)
+    except Exception as exc:
+        db.import_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "failed", "error": str(exc), "updated_at": datetime.utcnow()}},
+        )
+        return
+
+    missing_covers = list(dict.fromkeys(job.get("missing_covers") or []))
+    if missing_covers:
+        db.import_jobs.update_one({"_id": job_id}, {"$set": {"covers_pending": len(missing_covers)}})
+        backfill_covers(db, missing_covers)
+        db.import_jobs.update_one({"_id": job_id}, {"$set": {"covers_pending": 0}})
+
+
+def cancel_job(db, job_id: ObjectId) -> dict | None:
+    job = db.import_jobs.find_one_and_update(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {"status": "cancelled", "cancel_requested": True, "updated_at": datetime.utcnow()}},
+        return_document=True,
+    )
+    if job:
+        return job
+    return db.import_jobs.find_one_and_update(
+        {"_id": job_id, "status": "running"},
+        {"$set": {"cancel_requested": True, "updated_at": datetime.utcnow()}},
+        return_document=True,
+    )
+
+
+def resume_job(db, job_id: ObjectId) -> dict | None:
+    job = db.import_jobs.find_one_and_update(
+        {"_id": job_id, "status": {"$in": ["cancelled", "failed", "interrupted"]}},
+        {"$set": {"status": "queued", "cancel_requested": False, "error": None, "updated_at": datetime.utcnow()}},
+        return_document=True,
+    )
+    if job:
+        submit_job(job["_id"])
+    return job
+
+
+def recover_jobs(db, stale_after: timedelta = timedelta(minutes=2)) -> int:
+    cutoff = datetime.utcnow() - stale_after
+    result = db.import_jobs.update_many(
+        {"status": "running", "updated_at": {"$lt": cutoff}},
+        {"$set": {"status": "interrupted", "updated_at": datetime.utcnow()}},
+    )
+    return result.modified_count
+
+
+def job_progress(job: dict) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    processed = job.get("rows_processed", 0)
+    total = job.get("total_rows")
+    throughput = None
+    eta_seconds = None
+    run_started = job.get("run_started_at")
+    if run_started:
+        end = job.get("finished_at") if job.get("status") == "completed" else now
+        elapsed = (end - run_started).total_seconds()
+        done = processed - (job.get("run_start_rows") or 0)
+        if elapsed > 0 and done > 0:
+            throughput = done / elapsed
+            if total is not None and job.get("status") == "running":
+                eta_seconds = max(total - processed, 0) / throughput
+    return {
+        "rows_processed": processed,
+        "total_rows": total,
+        "percent": round(100.0 * processed / total, 1) if total else None,
+        "rows_per_second": round(throughput, 1) if throughput else None,
+        "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+    }
+
+
+def iter_rejected_csv(db, job_id: ObjectId) -> Iterator[str]:
+    fields: list[str] = []
+    for err in db.import_job_errors.find({"job_id": job_id}, {"data": 1}).limit(1000):
+        for key in (err.get("data") or {}):
+            if key not in fields:
+                fields.append(key)
+    buffer = _CsvBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(["row", "reason", *fields])
+    yield buffer.drain()
+    for err in db.import_job_errors.find({"job_id": job_id}).sort("row", 1):
+        data = err.get("data") or {}
+        writer.writerow([err.get("row"), err.get("reason"), *[data.get(f, "") for f in fields]])
+        yield buffer.drain()
+
+
+class _CsvBuffer:
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+
+    def write(self, value: str) -> None:
+        self.parts.append(value)
+
+    def drain(self) -> str:
+        out = "".join(self.parts)
+        self.parts = []
+        return out
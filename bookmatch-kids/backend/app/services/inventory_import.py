@@ -0,0 +1,307 @@
+import csv
+import hashlib
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .catalog import google_books_enabled
+from .google_books import fetch_cover_url
+from .identity import identity_fields, identity_keys, isbn_conflict, resolve_books
+from .reservations import set_stock
+from .versions import bump_version
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def normalize_header(key: str) -> str:
+    key = key.strip().lower()
+    key = key.replace(" ", "_").replace("-", "_")
+    if key in {"book_title", "book"}:
+        return "title"
+    if key in {"authors", "writer"}:
+        return "author"
+    if key in {"desc", "summary", "synopsis"}:
+        return "description"
+    if key in {"genres", "genre", "subjects"}:
+        return "tags"
+    if key in {"subgenre", "sub_genre", "subcategory"}:
+        return "tags"
+    if key in {"min_age", "age_minimum"}:
+        return "age_min"
+    if key in {"max_age", "age_maximum"}:
+        return "age_max"
+    if key in {"readinglevel", "level"}:
+        return "reading_level"
+    if key in {"lang"}:
+        return "language"
+    if key in {"book_format", "binding"}:
+        return "format"
+    if key in {"cover", "image", "thumbnail"}:
+        return "cover_url"
+    if key in {"isbn13", "isbn_13"}:
+        return "isbn"
+    if key in {"qty", "quantity", "stock"}:
+        return "qty_available"
+    if key in {"location", "site"}:
+        return "location_id"
+    return key
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[dict]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if not row:
+            continue
+        normalized = {}
+        for k, v in row.items():
+            if k is None:
+                continue
+            nk = normalize_header(k)
+            normalized[nk] = v.strip() if isinstance(v, str) else v
+        yield normalized
+
+
+def row_to_book(row: Dict[str, Any], location_id: str, default_qty: int) -> Dict[str, Any] | None:
+    title = row.get("title") or ""
+    author = row.get("author") or ""
+    if not title:
+        return None
+    isbn = row.get("isbn") or ""
+    tags_raw = row.get("tags") or ""
+    tags = [t.strip().lower() for t in tags_raw.replace("|", ",").split(",") if t.strip()]
+    try:
+        age_min = int(row.get("age_min")) if row.get("age_min") else None
+    except Exception:
+        age_min = None
+    try:
+        age_max = int(row.get("age_max")) if row.get("age_max") else None
+    except Exception:
+        age_max = None
+    description = row.get("description") or ""
+    publisher = row.get("publisher") or ""
+
+    if not tags and row.get("genre"):
+        tags = [str(row.get("genre")).strip().lower()]
+    if row.get("subgenre"):
+        sub = str(row.get("subgenre")).strip().lower()
+        if sub and sub not in tags:
+            tags.append(sub)
+    if publisher and not description:
+        description = f"Publisher: {publisher}"
+    if age_min is None:
+        age_min = 8
+    if age_max is None:
+        age_max = max(age_min + 4, 12)
+
+    try:
+        qty = int(row.get("qty_available")) if row.get("qty_available") else default_qty
+    except Exception:
+        qty = default_qty
+
+    book = {
+        "title": title,
+        "author": author or "Unknown Author",
+        "description": description,
+        "tags": tags,
+        "age_min": age_min,
+        "age_max": age_max,
+        "reading_level": row.get("reading_level") or "middle",
+        "language": row.get("language") or "English",
+        "format": row.get("format") or "chapter",
+        "cover_url": row.get("cover_url") or "",
+        "isbn": isbn,
+        "source": row.get("source") or "manual",
+    }
+    return {
+        "book": {**book, **identity_fields(book)},
+        "location_id": row.get("location_id") or location_id,
+        "qty": max(qty, 0),
+    }
+
+
+def chunked(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _failed_indexes(exc: BulkWriteError) -> Dict[int, str]:
+    return {err["index"]: err.get("errmsg", "write failed") for err in exc.details.get("writeErrors", [])}
+
+
+def content_hash(value: Dict[str, Any]) -> str:
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _lookup_inventory(db, book_ids: List[ObjectId]) -> dict:
+    if not book_ids:
+        return {}
+    projection = {"book_id": 1, "location_id": 1, "row_hash": 1, "qty_available": 1, "qty_reserved": 1}
+    return {
+        (doc["book_id"], doc.get("location_id")): (
+            doc.get("row_hash"),
+            (doc.get("qty_available") or 0) + (doc.get("qty_reserved") or 0),
+        )
+        for doc in db.inventory.find({"book_id": {"$in": book_ids}}, projection)
+    }
+
+
+def import_chunk(
+    db,
+    rows: List[dict],
+    location_id: str,
+    default_qty: int,
+    start_row: int = 1,
+) -> Dict[str, Any]:
+    items = []
+    rejected = []
+    for offset, row in enumerate(rows):
+        item = row_to_book(row, location_id, default_qty)
+        if item is None:
+            rejected.append({"row": start_row + offset, "reason": "missing title", "data": row})
+            continue
+        item["row"] = start_row + offset
+        item["data"] = row
+        item["content_hash"] = content_hash(item["book"])
+        item["row_hash"] = content_hash(
+            {"book": item["content_hash"], "location_id": item["location_id"], "qty": item["qty"]}
+        )
+        items.append(item)
+
+    resolved = resolve_books(
+        db,
+        [item["book"] for item in items],
+        projection={"_id": 1, "cover_url": 1, "content_hash": 1},
+    )
+    seen: Dict[tuple, dict] = {}
+    book_ops = []
+    book_op_items = []
+    missing_covers = []
+
+    for item, existing in zip(items, resolved):
+        book_doc = item["book"]
+        keys = identity_keys(book_doc)
+        if not existing:
+            existing = next(
+                (seen[key] for key in keys if key in seen and not isbn_conflict(book_doc, seen[key])), None
+            )
+
+        if existing:
+            book_id = existing["_id"]
+            item["kind"] = "existing"
+            item["book_changed"] = existing.get("content_hash") != item["content_hash"]
+            if item["book_changed"]:
+                if not book_doc["cover_url"] and not existing.get("cover_url"):
+                    missing_covers.append(book_id)
+                changes = {**book_doc, "content_hash": item["content_hash"]}
+                if not changes["cover_url"]:
+                    changes.pop("cover_url")
+                book_ops.append(UpdateOne({"_id": book_id}, {"$set": changes}))
+                book_op_items.append(item)
+                existing["content_hash"] = item["content_hash"]
+        else:
+            book_id = ObjectId()
+            item["kind"] = "new"
+            item["book_changed"] = True
+            existing = {"_id": book_id, **book_doc, "content_hash": item["content_hash"]}
+            book_ops.append(InsertOne(dict(existing)))
+            book_op_items.append(item)
+            if not book_doc["cover_url"]:
+                missing_covers.append(book_id)
+        item["book_id"] = book_id
+        for key in keys:
+            seen.setdefault(key, existing)
+
+    failed_rows = set()
+    if book_ops:
+        try:
+            db.books.bulk_write(book_ops, ordered=False)
+        except BulkWriteError as exc:
+            for index, reason in _failed_indexes(exc).items():
+                item = book_op_items[index]
+                failed_rows.add(item["row"])
+                rejected.append({"row": item["row"], "reason": reason, "data": item["data"]})
+
+    if len(failed_rows) < len(book_ops):
+        bump_version(db, "books")
+
+    written = [item for item in items if item["row"] not in failed_rows]
+    inventory_hashes = _lookup_inventory(
+        db, list({item["book_id"] for item in written if item["kind"] == "existing"})
+    )
+    inventory_ops = []
+    inventory_op_items = []
+    for item in written:
+        key = (item["book_id"], item["location_id"])
+        item["inventory_changed"] = inventory_hashes.get(key) != (item["row_hash"], item["qty"])
+        if not item["inventory_changed"]:
+            continue
+        inventory_hashes[key] = (item["row_hash"], item["qty"])
+        inventory_ops.append(
+            UpdateOne(
+                {"book_id": item["book_id"], "location_id": item["location_id"]},
+                set_stock(item["qty"], row_hash=item["row_hash"]),
+                upsert=True,
+            )
+        )
+        inventory_op_items.append(item)
+    inventory_failed: Dict[int, str] = {}
+    if inventory_ops:
+        try:
+            db.inventory.bulk_write(inventory_ops, ordered=False)
+        except BulkWriteError as exc:
+            inventory_failed = _failed_indexes(exc)
+    for index, reason in inventory_failed.items():
+        item = inventory_op_items[index]
+        rejected.append({"row": item["row"], "reason": f"inventory: {reason}", "data": item["data"]})
+    if inventory_ops:
+        bump_version(db, "inventory", "stock")
+
+    new_rows = [item for item in written if item["kind"] == "new"]
+    changed_rows = [
+        item
+        for item in written
+        if item["kind"] == "existing" and (item["book_changed"] or item["inventory_changed"])
+    ]
+    return {
+        "rows": len(rows),
+        "new_rows": len(new_rows),
+        "changed_rows": len(changed_rows),
+        "unchanged_rows": len(written) - len(new_rows) - len(changed_rows),
+        "inserted_books": sum(1 for item in book_op_items if item["kind"] == "new" and item["row"] not in failed_rows),
+        "updated_books": sum(1 for item in book_op_items if item["kind"] == "existing" and item["row"] not in failed_rows),
+        "inventory_upserts": len(inventory_ops) - len(inventory_failed),
+        "skipped": len(rejected),
+        "rejected": sorted(rejected, key=lambda r: r["row"]),
+        "missing_covers": list(dict.fromkeys(missing_covers)),
+    }
+
+
+def backfill_covers(db, book_ids: List[ObjectId], batch_size: int = 100) -> int:
+    if not google_books_enabled():
+        return 0
+    updated = 0
+    for start in range(0, len(book_ids), batch_size):
+        batch = book_ids[start : start + batch_size]
+        query = {"_id": {"$in": batch}, "$or": [{"cover_url": {"$exists": False}}, {"cover_url": ""}]}
+        for book in db.books.find(query, {"title": 1, "author": 1, "isbn": 1}):
+            cover = fetch_cover_url(
+                title=book.get("title", ""),
+                author=book.get("author", ""),
+                isbn=book.get("isbn", ""),
+            )
+            if cover:
+                db.books.update_one({"_id": book["_id"]}, {"$set": {"cover_url": cover}})
+                updated += 1
+    if updated:
+        bump_version(db, "books")
+    return updated
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .versions import current_version
+
+
+LIST_FIELDS = ("created_at", "status", "raw_text", "parsed_preferences", "matched", "location_id", "requester_name")
+_HUB: Dict[str, Any] = {"thread": None, "stop": None, "mode": None, "subscribers": {}, "published": 0}
+_LOCK = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _request_summary(doc: dict) -> dict:
+    out = {"id": str(doc["_id"])}
+    for field in LIST_FIELDS:
+        if field in doc:
+            value = doc[field]
+            out[field] = value.isoformat() + "Z" if isinstance(value, datetime) else value
+    return out
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.requests: Dict[str, dict] = {}
+        self.inventory = 0
+        self.resync = False
+
+    def add_request(self, change: dict) -> None:
+        previous = self.requests.get(change["id"])
+        if previous and previous["op"] == "insert":
+            previous["request"].update({k: v for k, v in change.items() if k not in {"op", "id"}})
+            return
+        self.requests[change["id"]] = change
+
+    def events(self) -> List[tuple]:
+        events = []
+        if self.resync:
+            events.append(("resync", {}))
+        if self.requests:
+            events.append(("requests", {"changes": list(self.requests.values())}))
+        if self.inventory:
+            events.append(("inventory", {"changed": self.inventory}))
+        return events
+
+
+def _deliver(queue: asyncio.Queue, events: List[tuple]) -> None:
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        events = [("resync", {})]
+    queue.put_nowait(events)
+
+
+def _publish(batch: _Batch) -> None:
+    events = batch.events()
+    if not events:
+        return
+    with _LOCK:
+        subscribers = list(_HUB["subscribers"].items())
+        _HUB["published"] += 1
+    for queue, loop in subscribers:
+        try:
+            loop.call_soon_threadsafe(_deliver, queue, events)
+        except RuntimeError:
+            unsubscribe(queue)
+
+
+def _apply_change(batch: _Batch, change: dict) -> None:
+    collection = change.get("ns", {}).get("coll")
+    op = change.get("operationType")
+    if collection == "inventory":
+        batch.inventory += 1
+        return
+    if collection != "requests":
+        return
+    doc_id = str(change.get("documentKey", {}).get("_id"))
+    if op == "insert" and change.get("fullDocument"):
+        batch.add_request({"op": "insert", "id": doc_id, "request": _request_summary(change["fullDocument"])})
+    elif op in {"update", "replace"}:
+        fields = (change.get("updateDescription") or {}).get("updatedFields") or change.get("fullDocument") or {}
+        if "status" in fields:
+            batch.add_request({"op": "status", "id": doc_id, "status": fields["status"]})
+    elif op == "delete":
+        batch.add_request({"op": "delete", "id": doc_id})
+    elif op in {"drop", "invalidate"}:
+        batch.resync = True
+
+
+def _watch(db, stop: threading.Event, resync: bool, cursor: dict) -> None:
+    window = _env_float("LIVE_COALESCE_SECONDS", 0.5)
+    pipeline = [{"$match": {"ns.coll": {"$in": ["requests", "inventory"]}}}]
+    while not stop.is_set():
+        try:
+            stream = db.watch(pipeline, resume_after=cursor["resume_token"], max_await_time_ms=1000)
+        except OperationFailure:
+            if cursor["resume_token"] is None:
+                raise
+            cursor["resume_token"] = None
+            resync = True
+            continue
+        with stream:
+            _HUB["mode"] = "change_stream"
+            batch = _Batch()
+            batch.resync = resync
+            resync = False
+            flush_at = time.monotonic() if batch.resync else None
+            while not stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    _apply_change(batch, change)
+                    flush_at = flush_at or time.monotonic() + window
+                if flush_at and time.monotonic() >= flush_at:
+                    _publish(batch)
+                    batch = _Batch()
+                    flush_at = None
+                if flush_at is None:
+                    cursor["resume_token"] = stream.resume_token
+            _publish(batch)
+        cursor["resume_token"] = None
+        resync = True
+
+
+def _poll(db, stop: threading.Event) -> None:
+    _HUB["mode"] = "polling"
+    interval = max(_env_float("LIVE_POLL_SECONDS", 3), 0.5)
+    since = datetime.utcnow() - timedelta(seconds=1)
+    inventory_version = current_version(db, "inventory")
+    while not stop.wait(interval):
+        try:
+            batch = _Batch()
+            now = datetime.utcnow() - timedelta(seconds=1)
+            projection = {field: 1 for field in (*LIST_FIELDS, "updated_at")}
+            for doc in db.requests.find({"updated_at": {"$gt": since, "$lte": now}}, projection).sort("updated_at", 1):
+                if doc.get("created_at") and doc["created_at"] > since:
+                    batch.add_request({"op": "insert", "id": str(doc["_id"]), "request": _request_summary(doc)})
+                else:
+                    batch.add_request({"op": "status", "id": str(doc["_id"]), "status": doc.get("status")})
+            since = now
+            version = current_version(db, "inventory")
+            if version != inventory_version:
+                batch.inventory = version - inventory_version
+                inventory_version = version
+            _publish(batch)
+        except PyMongoError:
+            continue
+
+
+def _run(stop: threading.Event) -> None:
+    from ..db import get_db
+
+    db = get_db()
+    cursor = {"resume_token": None}
+    resync = False
+    while os.getenv("LIVE_CHANGE_STREAMS", "true").lower() in {"1", "true", "yes"} and not stop.is_set():
+        try:
+            _watch(db, stop, resync, cursor)
+            return
+        except OperationFailure:
+            if _HUB["mode"] != "change_stream":
+                break
+        except PyMongoError:
+            pass
+        resync = cursor["resume_token"] is None
+        stop.wait(1)
+    if not stop.is_set():
+        _poll(db, stop)
+
+
+def _ensure_started() -> None:
+    with _LOCK:
+        thread: Optional[threading.Thread] = _HUB["thread"]
+        if thread and thread.is_alive():
+            return
+        stop = threading.Event()
+        thread = threading.Thread(target=_run, args=(stop,), name="live-hub", daemon=True)
+        _HUB.update({"thread": thread, "stop": stop, "mode": "starting"})
+    thread.start()
+
+
+def subscribe(loop: asyncio.AbstractEventLoop, max_pending: int = 100) -> asyncio.Queue:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+    with _LOCK:
+        _HUB["subscribers"][queue] = loop
+    _ensure_started()
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue) -> None:
+    with _LOCK:
+        _HUB["subscribers"].pop(queue, None)
+
+
+def stop_live_hub() -> None:
+    with _LOCK:
+        stop = _HUB["stop"]
+        _HUB.update({"thread": None, "stop": None, "mode": None})
+    if stop:
+        stop.set()
+
+
+def live_status() -> dict:
+    with _LOCK:
+        return {"mode": _HUB["mode"], "subscribers": len(_HUB["subscribers"]), "batches": _HUB["published"]}
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+PICKLIST_COLUMNS = [
+    "location_id",
+    "title",
+    "author",
+    "format",
+    "book_id",
+    "requested",
+    "requests",
+    "qty_available",
+    "qty_reserved",
+    "shortfall",
+]
+
+
+def _book_field(field: str) -> dict:
+    return {"$ifNull": [f"${field}", {"$arrayElemAt": [f"$book.{field}", 0]}]}
+
+
+def picklist_lines(match: Dict[str, Any]) -> List[dict]:
+    return [
+        {"$match": match},
+        {"$project": {"location_id": {"$ifNull": ["$location_id", "main"]}, "matched": 1}},
+        {"$unwind": "$matched"},
+        {
+            "$group": {
+                "_id": {
+                    "location_id": {"$ifNull": ["$matched.reserved_location", "$location_id"]},
+                    "book_id": "$matched.book_id",
+                },
+                "requested": {"$sum": 1},
+                "request_ids": {"$addToSet": "$_id"},
+                "title": {"$first": "$matched.title"},
+                "author": {"$first": "$matched.author"},
+                "format": {"$first": "$matched.format"},
+            }
+        },
+    ]
+
+
+def picklist_pipeline(match: Dict[str, Any]) -> List[dict]:
+    return [
+        *picklist_lines(match),
+        {
+            "$addFields": {
+                "book_oid": {"$convert": {"input": "$_id.book_id", "to": "objectId", "onError": None, "onNull": None}}
+            }
+        },
+        {
+            "$lookup": {
+                "from": "books",
+                "localField": "book_oid",
+                "foreignField": "_id",
+                "as": "book",
+            }
+        },
+        {
+            "$lookup": {
+                "from": "inventory",
+                "let": {"book_id": "$book_oid", "location_id": "$_id.location_id"},
+                "pipeline": [
+                    {
+                        "$match": {
+                            "$expr": {
+                                "$and": [
+                                    {"$eq": ["$book_id", "$$book_id"]},
+                                    {"$eq": ["$location_id", "$$location_id"]},
+                                ]
+                            }
+                        }
+                    },
+                    {"$project": {"qty_available": 1, "qty_reserved": 1}},
+                ],
+                "as": "stock",
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "location_id": "$_id.location_id",
+                "book_id": "$_id.book_id",
+                "title": _book_field("title"),
+                "author": _book_field("author"),
+                "format": _book_field("format"),
+                "requested": 1,
+                "requests": {"$size": "$request_ids"},
+                "qty_available": {"$sum": "$stock.qty_available"},
+                "qty_reserved": {"$sum": "$stock.qty_reserved"},
+            }
+        },
+        {
+            "$addFields": {
+                "shortfall": {
+                    "$max": [{"$subtract": ["$requested", {"$add": ["$qty_available", "$qty_reserved"]}]}, 0]
+                }
+            }
+        },
+        {"$sort": {"location_id": 1, "title": 1, "book_id": 1}},
+    ]
+
+
+def iter_picklist(db, match: Dict[str, Any]) -> Iterator[dict]:
+    return db.requests.aggregate(picklist_pipeline(match), allowDiskUse=True)
+
+
+def iter_picklist_csv(rows: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=PICKLIST_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > 16_384:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_picklist_json(rows: Iterable[dict]) -> Iterator[str]:
+    yield '{"locations": ['
+    location = None
+    for row in rows:
+        line = json.dumps({k: row.get(k) for k in PICKLIST_COLUMNS if k != "location_id"})
+        if row["location_id"] != location:
+            prefix = "]}, " if location is not None else ""
+            location = row["location_id"]
+            yield f'{prefix}{{"location_id": {json.dumps(location)}, "lines": [{line}'
+        else:
+            yield f", {line}"
+    yield "]}]}" if location is not None else "]}"
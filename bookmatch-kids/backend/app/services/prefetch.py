@@ -0,0 +1,186 @@
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from .catalog import google_books_enabled, store_google_books
+from .google_books import search_google_books
+
+
+_SCHEDULER: dict = {"thread": None, "stop": None}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def prefetch_enabled() -> bool:
+    return os.getenv("CATALOG_PREFETCH_ENABLED", "false").lower() in {"1", "true", "yes"}
+
+
+def analyze_demand(db, lookback_days: int, max_combos: int = 50) -> List[Dict[str, Any]]:
+    cutoff = datetime.utcnow() - timedelta(days=lookback_days)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": cutoff}}},
+        {
+            "$project": {
+                "tags": "$parsed_preferences.tags",
+                "age": "$parsed_preferences.age",
+                "language": "$parsed_preferences.language",
+            }
+        },
+        {"$unwind": "$tags"},
+        {"$match": {"tags": {"$type": "string", "$ne": ""}}},
+        {
+            "$group": {
+                "_id": {"tag": {"$toLower": "$tags"}, "age": "$age", "language": "$language"},
+                "demand": {"$sum": 1},
+            }
+        },
+        {"$sort": {"demand": -1}},
+        {"$limit": max_combos},
+    ]
+    combos = []
+    for row in db.requests.aggregate(pipeline):
+        key = row["_id"]
+        age = key.get("age")
+        combos.append(
+            {
+                "tag": key.get("tag"),
+                "age": age if isinstance(age, int) else None,
+                "language": key.get("language") or None,
+                "demand": row["demand"],
+            }
+        )
+    return combos
+
+
+def count_in_stock(db, tag: str, age: int | None, language: str | None, limit: int) -> int:
+    match: Dict[str, Any] = {"tags": tag}
+    clauses = []
+    if age is not None:
+        clauses.append(
+            {
+                "$or": [
+                    {"age_min": {"$lte": age}, "age_max": {"$gte": age}},
+                    {"age_min": None},
+                ]
+            }
+        )
+    if language:
+        clauses.append({"language": {"$regex": f"^{re.escape(language)}$", "$options": "i"}})
+    if clauses:
+        match["$and"] = clauses
+    pipeline = [
+        {"$match": match},
+        {"$project": {"_id": 1}},
+        {"$lookup": {"from": "inventory", "localField": "_id", "foreignField": "book_id", "as": "stock"}},
+        {"$match": {"stock": {"$elemMatch": {"qty_available": {"$gt": 0}}}}},
+        {"$limit": limit},
+        {"$count": "n"},
+    ]
+    rows = list(db.books.aggregate(pipeline))
+    return rows[0]["n"] if rows else 0
+
+
+def _take_quota(db, day: str, quota: int) -> bool:
+    db.prefetch_quota.update_one({"_id": day}, {"$setOnInsert": {"used": 0}}, upsert=True)
+    doc = db.prefetch_quota.find_one_and_update(
+        {"_id": day, "used": {"$lt": quota}},
+        {"$inc": {"used": 1}},
+    )
+    return doc is not None
+
+
+def quota_status(db) -> Dict[str, Any]:
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    doc = db.prefetch_quota.find_one({"_id": day}) or {}
+    return {
+        "date": day,
+        "used": doc.get("used", 0),
+        "quota": _env_int("CATALOG_PREFETCH_DAILY_QUOTA", 100),
+    }
+
+
+def run_prefetch(db, dry_run: bool = False) -> Dict[str, Any]:
+    lookback_days = _env_int("CATALOG_PREFETCH_LOOKBACK_DAYS", 14)
+    min_coverage = _env_int("CATALOG_PREFETCH_MIN_COVERAGE", 5)
+    per_query = _env_int("CATALOG_PREFETCH_PER_QUERY", 10)
+    quota = _env_int("CATALOG_PREFETCH_DAILY_QUOTA", 100)
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    started = datetime.utcnow()
+
+    thin = []
+    for combo in analyze_demand(db, lookback_days):
+        coverage = count_in_stock(db, combo["tag"], combo["age"], combo["language"], min_coverage)
+        if coverage < min_coverage:
+            thin.append({**combo, "coverage": coverage})
+
+    queries = 0
+    imported = 0
+    quota_exhausted = False
+    if not dry_run and google_books_enabled():
+        for combo in thin:
+            if not _take_quota(db, day, quota):
+                quota_exhausted = True
+                break
+            queries += 1
+            try:
+                results = search_google_books(
+                    f"{combo['tag']} subject:juvenile",
+                    max_results=per_query,
+                    language=combo["language"],
+                )
+            except Exception as exc:
+                combo["error"] = str(exc)
+                continue
+            stored = store_google_books(db, results, extra_tags=[combo["tag"]])
+            combo["imported"] = len(stored)
+            imported += len(stored)
+
+    summary = {
+        "started_at": started,
+        "finished_at": datetime.utcnow(),
+        "dry_run": dry_run,
+        "thin_combos": thin,
+        "queries": queries,
+        "imported": imported,
+        "quota_exhausted": quota_exhausted,
+    }
+    if not dry_run:
+        db.prefetch_runs.insert_one(dict(summary))
+    return summary
+
+
+def _scheduler_loop(stop: threading.Event) -> None:
+    from ..db import get_db
+
+    interval = max(_env_int("CATALOG_PREFETCH_INTERVAL_MINUTES", 360), 1) * 60
+    delay = 60
+    while not stop.wait(delay):
+        delay = interval
+        try:
+            run_prefetch(get_db())
+        except Exception:
+            continue
+
+
+def start_prefetch_scheduler() -> bool:
+    if not prefetch_enabled() or _SCHEDULER["thread"] is not None:
+        return False
+    stop = threading.Event()
+    thread = threading.Thread(target=_scheduler_loop, args=(stop,), name="catalog-prefetch", daemon=True)
+    _SCHEDULER.update({"thread": thread, "stop": stop})
+    thread.start()
+    return True
+
+
+def stop_prefetch_scheduler() -> None:
+    stop = _SCHEDULER.get("stop")
+    if stop is not None:
+        stop.set()
+    _SCHEDULER.update({"thread": None, "stop": None})
@@ -0,0 +1,213 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from .versions import bump_version
+
+
+_SWEEPER: dict = {"thread": None, "stop": None}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def reservations_enabled() -> bool:
+    return os.getenv("RESERVATIONS_ENABLED", "true").lower() in {"1", "true", "yes"}
+
+
+def reservation_ttl() -> timedelta:
+    return timedelta(hours=max(_env_float("RESERVATION_TTL_HOURS", 72), 0.01))
+
+
+def _purge_at(now: datetime) -> datetime:
+    return now + timedelta(days=max(_env_float("RESERVATION_RETENTION_DAYS", 30), 1))
+
+
+def set_stock(qty: int, **fields: Any) -> List[Dict[str, Any]]:
+    available = {"$subtract": [qty, {"$ifNull": ["$qty_reserved", 0]}]}
+    values = {key: {"$literal": value} for key, value in fields.items()}
+    return [{"$set": {**values, "qty_available": available}}]
+
+
+def reserve_copy(db, book_id: ObjectId, location_id: str, qty: int = 1) -> dict | None:
+    update = {"$inc": {"qty_available": -qty, "qty_reserved": qty}}
+    options = {"projection": {"location_id": 1, "qty_available": 1}, "return_document": ReturnDocument.AFTER}
+    item = db.inventory.find_one_and_update(
+        {"book_id": book_id, "location_id": location_id, "qty_available": {"$gte": qty}},
+        update,
+        **options,
+    )
+    if item is None:
+        item = db.inventory.find_one_and_update(
+            {"book_id": book_id, "qty_available": {"$gte": qty}},
+            update,
+            **options,
+        )
+    return item
+
+
+def reserve_for_request(
+    db,
+    request_id: ObjectId,
+    location_id: str,
+    matched: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    if not reservations_enabled():
+        return matched
+    now = datetime.utcnow()
+    docs = []
+    out = []
+    emptied = False
+    for match in matched:
+        book_id = match.get("book_id") or ""
+        item = reserve_copy(db, ObjectId(book_id), location_id) if ObjectId.is_valid(book_id) else None
+        reserved = item.get("location_id", "main") if item else None
+        if item and item.get("qty_available", 0) < 1:
+            emptied = True
+        if reserved:
+            docs.append(
+                {
+                    "request_id": request_id,
+                    "book_id": ObjectId(book_id),
+                    "location_id": reserved,
+                    "qty": 1,
+                    "status": "held",
+                    "created_at": now,
+                    "expires_at": now + reservation_ttl(),
+                }
+            )
+        line = {**match, "reserved": reserved is not None}
+        if reserved:
+            line["reserved_location"] = reserved
+        out.append(line)
+    if docs:
+        try:
+            db.reservations.insert_many(docs, ordered=False)
+        except Exception:
+            for doc in docs:
+                _return_stock(db, doc)
+            raise
+        bump_version(db, "inventory")
+        if emptied:
+            bump_version(db, "stock")
+    return out
+
+
+def _return_stock(db, reservation: dict) -> bool:
+    qty = reservation.get("qty", 1)
+    before = db.inventory.find_one_and_update(
+        {"book_id": reservation["book_id"], "location_id": reservation["location_id"]},
+        {"$inc": {"qty_available": qty, "qty_reserved": -qty}},
+        projection={"qty_available": 1},
+    )
+    return bool(before) and (before.get("qty_available") or 0) < 1
+
+
+def _settle(db, query: Dict[str, Any], status: str) -> int:
+    settled = 0
+    refilled = False
+    now = datetime.utcnow()
+    while True:
+        reservation = db.reservations.find_one_and_update(
+            {**query, "status": "held"},
+            {"$set": {"status": status, "settled_at": now, "purge_at": _purge_at(now)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not reservation:
+            break
+        if status == "fulfilled":
+            db.inventory.update_one(
+                {"book_id": reservation["book_id"], "location_id": reservation["location_id"]},
+                {"$inc": {"qty_reserved": -reservation.get("qty", 1)}},
+            )
+        elif _return_stock(db, reservation):
+            refilled = True
+        settled += 1
+    if settled:
+        bump_version(db, "inventory")
+        if refilled:
+            bump_version(db, "stock")
+    return settled
+
+
+def release_request(db, request_id: ObjectId) -> int:
+    return _settle(db, {"request_id": request_id}, "released")
+
+
+def fulfill_request(db, request_id: ObjectId) -> int:
+    return _settle(db, {"request_id": request_id}, "fulfilled")
+
+
+def extend_request(db, request_id: ObjectId) -> int:
+    result = db.reservations.update_many(
+        {"request_id": request_id, "status": "held"},
+        {"$set": {"expires_at": datetime.utcnow() + reservation_ttl()}},
+    )
+    return result.modified_count
+
+
+def expire_reservations(db) -> int:
+    return _settle(db, {"expires_at": {"$lt": datetime.utcnow()}}, "expired")
+
+
+def reservation_stats(db) -> Dict[str, Any]:
+    pipeline = [{"$group": {"_id": "$status", "count": {"$sum": "$qty"}}}]
+    counts = {row["_id"]: row["count"] for row in db.reservations.aggregate(pipeline)}
+    stock = next(
+        db.inventory.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": None,
+                        "available": {"$sum": "$qty_available"},
+                        "reserved": {"$sum": {"$ifNull": ["$qty_reserved", 0]}},
+                    }
+                }
+            ]
+        ),
+        {},
+    )
+    return {
+        "held": counts.get("held", 0),
+        "released": counts.get("released", 0),
+        "expired": counts.get("expired", 0),
+        "fulfilled": counts.get("fulfilled", 0),
+        "qty_available": stock.get("available", 0),
+        "qty_reserved": stock.get("reserved", 0),
+    }
+
+
+def _sweeper_loop(stop: threading.Event) -> None:
+    from ..db import get_db
+
+    interval = max(_env_float("RESERVATION_SWEEP_SECONDS", 60), 1)
+    while not stop.wait(interval):
+        try:
+            expire_reservations(get_db())
+        except Exception:
+            continue
+
+
+def start_reservation_sweeper() -> bool:
+    if not reservations_enabled() or _SWEEPER["thread"] is not None:
+        return False
+    stop = threading.Event()
+    thread = threading.Thread(target=_sweeper_loop, args=(stop,), name="reservation-sweeper", daemon=True)
+    _SWEEPER.update({"thread": thread, "stop": stop})
+    thread.start()
+    return True
+
+
+def stop_reservation_sweeper() -> None:
+    stop = _SWEEPER.get("stop")
+    if stop is not None:
+        stop.set()
+    _SWEEPER.update({"thread": None, "stop": None})
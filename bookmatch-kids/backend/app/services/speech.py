@@ -0,0 +1,109 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Union
+
+from .elevenlabs import open_speech_stream, text_to_speech
+from .tts_cache import cache_key, iter_file, lookup, store, tee
+
+_EXECUTOR: dict = {"pool": None}
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def chunk_workers() -> int:
+    return max(_env_int("TTS_CHUNK_WORKERS", 3), 1)
+
+
+def max_chunk_chars() -> int:
+    return max(_env_int("TTS_CHUNK_MAX_CHARS", 300), 50)
+
+
+def split_sentences(text: str, limit: Optional[int] = None) -> List[str]:
+    limit = limit or max_chunk_chars()
+    chunks = []
+    for sentence in _SENTENCE_BREAK.split(text):
+        sentence = " ".join(sentence.split())
+        while len(sentence) > limit:
+            cut = sentence.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+
+def _pool() -> ThreadPoolExecutor:
+    if _EXECUTOR["pool"] is None:
+        _EXECUTOR["pool"] = ThreadPoolExecutor(max_workers=chunk_workers(), thread_name_prefix="tts-chunk")
+    return _EXECUTOR["pool"]
+
+
+def _chunk_key(chunk: str, params: dict) -> str:
+    return cache_key(chunk, params["voice_id"], params["model_id"], params["voice_settings"])
+
+
+def _synthesize(chunk: str, params: dict) -> Union[Path, bytes]:
+    key = _chunk_key(chunk, params)
+    path = lookup(key)
+    if path is not None:
+        return path
+    audio = text_to_speech(chunk, params)
+    return store(key, audio) or audio
+
+
+def _iter_audio(audio: Union[Path, bytes]) -> Iterator[bytes]:
+    if isinstance(audio, Path):
+        yield from iter_file(audio)
+    else:
+        yield audio
+
+
+def _iter_chunks(first: Iterator[bytes], rest: Iterator[str], pending: Deque[Future], params: dict) -> Iterator[bytes]:
+    try:
+        yield from first
+        while pending:
+            audio = pending.popleft().result()
+            for chunk in islice(rest, 1):
+                pending.append(_pool().submit(_synthesize, chunk, params))
+            yield from _iter_audio(audio)
+    finally:
+        close = getattr(first, "close", None)
+        if close:
+            close()
+        for future in pending:
+            future.cancel()
+
+
+def open_speech(text: str, params: dict) -> Iterator[bytes]:
+    chunks = split_sentences(text)
+    if len(chunks) <= 1:
+        return open_speech_stream(chunks[0] if chunks else text, params)
+    rest = iter(chunks[1:])
+    pending: Deque[Future] = deque(_pool().submit(_synthesize, chunk, params) for chunk in islice(rest, chunk_workers()))
+    try:
+        key = _chunk_key(chunks[0], params)
+        path = lookup(key)
+        first = iter_file(path) if path is not None else tee(key, open_speech_stream(chunks[0], params))
+    except Exception:
+        for future in pending:
+            future.cancel()
+        raise
+    return _iter_chunks(first, rest, pending, params)
+
+
+def shutdown_speech_pool() -> None:
+    pool = _EXECUTOR["pool"]
+    _EXECUTOR["pool"] = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_INDEX: "OrderedDict[str, int]" = OrderedDict()
+_STATE: Dict[str, Any] = {"loaded": False, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0}
+_LOCK = threading.Lock()
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def cache_enabled() -> bool:
+    return os.getenv("TTS_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+
+
+def cache_dir() -> Path:
+    path = Path(os.getenv("TTS_CACHE_DIR") or Path(tempfile.gettempdir()) / "bookmatch-tts")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def max_bytes() -> int:
+    try:
+        return max(int(os.getenv("TTS_CACHE_MAX_BYTES") or 200_000_000), 0)
+    except ValueError:
+        return 200_000_000
+
+
+def cache_key(text: str, voice_id: str, model_id: str, voice_settings: Dict[str, Any]) -> str:
+    material = json.dumps([text, voice_id, model_id, voice_settings], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> Path:
+    return cache_dir() / f"{key}.mp3"
+
+
+def _load_index() -> None:
+    if _STATE["loaded"]:
+        return
+    entries = []
+    for path in cache_dir().glob("*.mp3"):
+        if not KEY_PATTERN.match(path.stem):
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, path.stem, stat.st_size))
+    for _, key, size in sorted(entries):
+        _INDEX[key] = size
+    _STATE.update({"loaded": True, "bytes": sum(_INDEX.values())})
+
+
+def _evict(budget: int) -> None:
+    while _INDEX and _STATE["bytes"] > budget:
+        key, size = _INDEX.popitem(last=False)
+        _STATE["bytes"] -= size
+        _STATE["evictions"] += 1
+        try:
+            _path(key).unlink()
+        except OSError:
+            pass
+
+
+def lookup(key: str) -> Optional[Path]:
+    if not cache_enabled() or not KEY_PATTERN.match(key):
+        return None
+    with _LOCK:
+        _load_index()
+        if key not in _INDEX:
+            _STATE["misses"] += 1
+            return None
+        path = _path(key)
+        if not path.exists():
+            _STATE["bytes"] -= _INDEX.pop(key)
+            _STATE["misses"] += 1
+            return None
+        _INDEX.move_to_end(key)
+        _STATE["hits"] += 1
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return path
+
+
+def store_file(key: str, tmp_path: Path) -> Optional[Path]:
+    size = tmp_path.stat().st_size
+    if not cache_enabled() or size == 0 or size > max_bytes():
+        tmp_path.unlink(missing_ok=True)
+        return None
+    path = _path(key)
+    with _LOCK:
+        _load_index()
+        os.replace(tmp_path, path)
+        _STATE["bytes"] += size - _INDEX.pop(key, 0)
+        _INDEX[key] = size
+        _evict(max_bytes())
+    return path if key in _INDEX else None
+
+
+def temp_path(key: str) -> Path:
+    return cache_dir() / f".{key}.{uuid.uuid4().hex}.tmp"
+
+
+def store(key: str, data: bytes) -> Optional[Path]:
+    if not cache_enabled():
+        return None
+    tmp = temp_path(key)
+    tmp.write_bytes(data)
+    return store_file(key, tmp)
+
+
+def tee(key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    if not cache_enabled():
+        yield from chunks
+        return
+    tmp = temp_path(key)
+    complete = False
+    try:
+        with tmp.open("wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+        if complete:
+            store_file(key, tmp)
+        else:
+            tmp.unlink(missing_ok=True)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise ValueError("unsupported range")
+    start, end = match.groups()
+    if start == "":
+        length = int(end)
+        if length == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+    if first >= size or last < first:
+        raise ValueError("unsatisfiable range")
+    return first, last
+
+
+def iter_file(path: Path, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        handle.seek(start)
+        remaining = (end - start + 1) if end is not None else None
+        while remaining is None or remaining > 0:
+            chunk = handle.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _LOCK:
+        _load_index()
+        lookups = _STATE["hits"] + _STATE["misses"]
+        return {
+            "entries": len(_INDEX),
+            "bytes": _STATE["bytes"],
+            "max_bytes": max_bytes(),
+            "hits": _STATE["hits"],
+            "misses": _STATE["misses"],
+            "hit_rate": round(_STATE["hits"] / lookups, 3) if lookups else 0.0,
+            "evictions": _STATE["evictions"],
+        }
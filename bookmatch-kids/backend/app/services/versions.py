@@ -0,0 +1,8 @@
+def bump_version(db, *names: str) -> None:
+    for name in names:
+        db.counters.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+
+def current_version(db, name: str) -> int:
+    doc = db.counters.find_one({"_id": name}, {"version": 1})
+    return doc.get("version", 0) if doc else 0
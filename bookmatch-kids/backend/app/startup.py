@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable
+
+_IMPORTED = time.perf_counter()
+_STATE: dict = {"began": None, "started_at": None, "finished_ms": None, "required": (), "steps": {}}
+_LOCK = threading.Lock()
+logger = logging.getLogger("uvicorn.error")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _offset_ms(moment: float) -> float:
+    return round((moment - (_STATE["began"] or _IMPORTED)) * 1000, 1)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _record(name: str, **values) -> None:
+    with _LOCK:
+        _STATE["steps"].setdefault(name, {"name": name, "attempts": 0}).update(values)
+
+
+def _ready() -> bool:
+    steps = _STATE["steps"]
+    return bool(_STATE["began"]) and all(steps.get(name, {}).get("status") == "ok" for name in _STATE["required"])
+
+
+def begin(required: Iterable[str]) -> None:
+    with _LOCK:
+        _STATE.update(
+            began=time.perf_counter(),
+            started_at=datetime.utcnow(),
+            finished_ms=None,
+            required=tuple(required),
+            steps={},
+        )
+
+
+def _started(name: str, required: bool) -> float:
+    started = time.perf_counter()
+    with _LOCK:
+        attempts = _STATE["steps"].get(name, {}).get("attempts", 0) + 1
+    _record(name, status="running", start_ms=_offset_ms(started), required=required, attempts=attempts, error=None)
+    return started
+
+
+def _done(name: str, started: float, result: Any) -> None:
+    _record(name, status="ok", duration_ms=_elapsed_ms(started), detail=result if isinstance(result, dict) else None)
+
+
+def _failed(name: str, started: float, exc: BaseException) -> None:
+    _record(name, status="failed", duration_ms=_elapsed_ms(started), error=(str(exc) or type(exc).__name__)[:300])
+
+
+def run_sync(name: str, func: Callable[[], Any], required: bool = False) -> Any:
+    started = _started(name, required)
+    try:
+        result = func()
+    except Exception as exc:
+        _failed(name, started, exc)
+        return None
+    _done(name, started, result)
+    return result
+
+
+async def run_step(name: str, func: Callable[[], Any], required: bool = False, timeout: float | None = None) -> bool:
+    started = _started(name, required)
+    try:
+        result = await asyncio.wait_for(asyncio.to_thread(func), timeout)
+    except asyncio.CancelledError:
+        _record(name, status="cancelled", duration_ms=_elapsed_ms(started))
+        raise
+    except Exception as exc:
+        _failed(name, started, exc)
+        return False
+    _done(name, started, result)
+    return True
+
+
+async def retry_step(name: str, func: Callable[[], Any], required: bool = False, timeout: float | None = None) -> None:
+    delay = max(_env_float("STARTUP_RETRY_SECONDS", 2), 0.1)
+    while not await run_step(name, func, required=required, timeout=timeout):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+def skip(name: str, reason: str) -> None:
+    _record(name, status="skipped", start_ms=_offset_ms(time.perf_counter()), duration_ms=0.0, required=False, error=reason)
+
+
+def finish() -> None:
+    with _LOCK:
+        _STATE["finished_ms"] = _offset_ms(time.perf_counter())
+    summary = timeline()
+    steps = ", ".join(f"{step['name']} {step.get('duration_ms', 0)}ms {step['status']}" for step in summary["steps"])
+    logger.info("Warmup finished in %sms (%s)", summary["finished_ms"], steps)
+
+
+def readiness() -> Dict[str, Any]:
+    with _LOCK:
+        steps = _STATE["steps"]
+        pending = [name for name in _STATE["required"] if steps.get(name, {}).get("status") != "ok"]
+        failed = [name for name, step in steps.items() if step.get("status") == "failed"]
+        return {"status": "ready" if _ready() else "starting", "pending": pending, "failed": failed}
+
+
+def timeline() -> Dict[str, Any]:
+    with _LOCK:
+        steps = sorted((dict(step) for step in _STATE["steps"].values()), key=lambda step: step.get("start_ms") or 0)
+        ends = [step["start_ms"] + (step.get("duration_ms") or 0) for step in steps if step["name"] in _STATE["required"]]
+        began = _STATE["began"]
+        return {
+            "started_at": _STATE["started_at"],
+            "import_ms": round((began - _IMPORTED) * 1000, 1) if began else None,
+            "ready_ms": round(max(ends), 1) if ends and _ready() else None,
+            "finished_ms": _STATE["finished_ms"],
+            "uptime_seconds": round(time.perf_counter() - began, 1) if began else None,
+            "required": list(_STATE["required"]),
+            "steps": steps,
+        }
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+
+TOKEN_PREFIX = "v1."
+_REVOKED: Dict[str, Any] = {"sids": {}, "users": {}, "synced_at": 0.0}
+_REVOKED_LOCK = threading.Lock()
+
+
+def _secret() -> bytes:
+    return (os.getenv("AUTH_TOKEN_SECRET") or "").encode("utf-8")
+
+
+def signed_mode() -> bool:
+    return os.getenv("AUTH_TOKEN_MODE", "session").lower() == "signed" and bool(_secret())
+
+
+def access_ttl_seconds() -> int:
+    try:
+        return max(int(os.getenv("ACCESS_TOKEN_TTL_SECONDS") or 900), 30)
+    except ValueError:
+        return 900
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _signature(body: str) -> str:
+    return _b64encode(hmac.new(_secret(), (TOKEN_PREFIX + body).encode("ascii"), hashlib.sha256).digest())
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(TOKEN_PREFIX)
+
+
+def sign_access_token(user: dict, sid: str) -> str:
+    now = time.time()
+    claims = {
+        "sub": str(user["_id"]),
+        "role": user.get("role"),
+        "email": user.get("email"),
+        "name": user.get("name"),
+        "sid": sid,
+        "iat": now,
+        "exp": int(now) + access_ttl_seconds(),
+    }
+    body = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{TOKEN_PREFIX}{body}.{_signature(body)}"
+
+
+def decode_access_token(token: str, verify_exp: bool = True) -> Optional[dict]:
+    if not is_signed_token(token) or not _secret():
+        return None
+    try:
+        body, signature = token[len(TOKEN_PREFIX) :].split(".", 1)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _signature(body)):
+        return None
+    try:
+        claims = json.loads(_b64decode(body))
+    except Exception:
+        return None
+    if verify_exp and claims.get("exp", 0) < time.time():
+        return None
+    return claims
+
+
+def _sync_revocations(db) -> None:
+    try:
+        interval = float(os.getenv("REVOCATION_SYNC_SECONDS") or 5)
+    except ValueError:
+        interval = 5.0
+    now = time.monotonic()
+    if now - _REVOKED["synced_at"] < interval:
+        return
+    _REVOKED["synced_at"] = now
+    sids: Dict[str, float] = {}
+    users: Dict[str, float] = {}
+    for doc in db.revoked_tokens.find({"expires_at": {"$gt": datetime.utcnow()}}):
+        target = sids if doc.get("kind") == "sid" else users
+        target[doc["value"]] = max(target.get(doc["value"], 0.0), doc.get("revoked_at", 0.0))
+    with _REVOKED_LOCK:
+        _REVOKED["sids"] = sids
+        _REVOKED["users"] = users
+
+
+def is_revoked(db, claims: dict) -> bool:
+    _sync_revocations(db)
+    with _REVOKED_LOCK:
+        if claims.get("sid") in _REVOKED["sids"]:
+            return True
+        revoked_at = _REVOKED["users"].get(claims.get("sub"))
+    return revoked_at is not None and claims.get("iat", 0) <= revoked_at
+
+
+def revoke(db, kind: str, value: str) -> None:
+    revoked_at = time.time()
+    db.revoked_tokens.insert_one(
+        {
+            "kind": kind,
+            "value": value,
+            "revoked_at": revoked_at,
+            "expires_at": datetime.utcnow() + timedelta(seconds=access_ttl_seconds()),
+        }
+    )
+    with _REVOKED_LOCK:
+        target = _REVOKED["sids"] if kind == "sid" else _REVOKED["users"]
+        target[value] = max(target.get(value, 0.0), revoked_at)
+
+
+def revocation_stats() -> dict:
+    with _REVOKED_LOCK:
+        return {"revoked_sessions": len(_REVOKED["sids"]), "revoked_users": len(_REVOKED["users"])}
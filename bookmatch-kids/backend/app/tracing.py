@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+
+logger = logging.getLogger("bookmatch.trace")
+_CURRENT: ContextVar[Optional["Trace"]] = ContextVar("bookmatch_trace", default=None)
+_SLOW: Dict[str, Any] = {"buffer": None}
+_LOCK = threading.Lock()
+_TOKEN_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def slow_threshold_ms() -> float:
+    return max(_env_float("TRACE_SLOW_MS", 500), 0)
+
+
+def _buffer() -> Deque[dict]:
+    if _SLOW["buffer"] is None:
+        _SLOW["buffer"] = deque(maxlen=max(int(_env_float("TRACE_BUFFER_SIZE", 100)), 1))
+    return _SLOW["buffer"]
+
+
+class Trace:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.spans: List[dict] = []
+        self.attrs: Dict[str, Any] = {}
+        self.open: List[dict] = []
+
+    def server_timing(self) -> str:
+        parts = [
+            f"{_TOKEN_CHARS.sub('_', item['name'])};dur={item['duration_ms']:.1f}"
+            for item in sorted(self.spans, key=lambda item: item["offset_ms"])
+        ]
+        parts.append(f"total;dur={self.duration_ms:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat() + "Z",
+            "duration_ms": round(self.duration_ms, 1),
+            "attrs": self.attrs,
+            "spans": sorted(self.spans, key=lambda item: item["offset_ms"]),
+        }
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[dict]:
+    trace = _CURRENT.get()
+    item: Dict[str, Any] = {"name": name, "attrs": dict(attrs)}
+    if trace is None:
+        yield item["attrs"]
+        return
+    start = time.perf_counter()
+    item["offset_ms"] = round((start - trace.started) * 1000, 1)
+    trace.open.append(item)
+    try:
+        yield item["attrs"]
+    except Exception as exc:
+        item["attrs"]["error"] = type(exc).__name__
+        raise
+    finally:
+        trace.open.remove(item)
+        item["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        trace.spans.append(item)
+
+
+def annotate(**attrs: Any) -> None:
+    trace = _CURRENT.get()
+    if trace is None:
+        return
+    target = trace.open[-1]["attrs"] if trace.open else trace.attrs
+    target.update(attrs)
+
+
+def _json_logger() -> logging.Logger:
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def _finish(trace: Trace) -> None:
+    record = trace.to_dict()
+    if os.getenv("TRACE_LOG_JSON", "false").lower() in {"1", "true", "yes"}:
+        _json_logger().info(json.dumps(record, default=str))
+    if trace.duration_ms >= slow_threshold_ms() and random.random() < _env_float("TRACE_SAMPLE_RATE", 1.0):
+        with _LOCK:
+            _buffer().append(record)
+
+
+@contextmanager
+def start_trace(name: str, response=None, **attrs: Any) -> Iterator[Trace]:
+    trace = Trace(name)
+    trace.attrs.update(attrs)
+    token = _CURRENT.set(trace)
+    try:
+        yield trace
+    except Exception as exc:
+        trace.attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        _CURRENT.reset(token)
+        trace.duration_ms = (time.perf_counter() - trace.started) * 1000
+        if response is not None:
+            response.headers["Server-Timing"] = trace.server_timing()
+        _finish(trace)
+
+
+def slow_traces(limit: int = 50) -> List[dict]:
+    with _LOCK:
+        return list(reversed(_buffer()))[:limit]
@@ -0,0 +1,124 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .cases import Case, all_cases
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def measure(case: Case) -> Dict[str, object]:
+    case.call()
+    samples = []
+    clock = time.perf_counter
+    for _ in range(case.repeat):
+        started = clock()
+        case.call()
+        samples.append(clock() - started)
+
+    tracemalloc.start()
+    case.call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50 = _percentile(samples, 50)
+    return {
+        "case": case.name,
+        "size": case.size,
+        "repeat": case.repeat,
+        "p50_ms": round(p50 * 1000, 4),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 4),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "throughput_per_s": round(case.items / p50, 1) if p50 else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    previous = {(row["case"], row["size"]): row for row in baseline}
+    rows = []
+    for row in results:
+        before = previous.get((row["case"], row["size"]))
+        if not before or not before.get("p50_ms"):
+            continue
+        change = row["p50_ms"] / before["p50_ms"] - 1
+        rows.append(
+            {
+                "case": row["case"],
+                "size": row["size"],
+                "baseline_p50_ms": before["p50_ms"],
+                "p50_ms": row["p50_ms"],
+                "change": round(change, 3),
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Catalog sizes for rank_books and CSV parsing")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", default="", help="Comma separated case names")
+    parser.add_argument("--out", default="bench/results/latest.json")
+    parser.add_argument("--baseline", default="bench/results/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p50 slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    selected = {name.strip() for name in args.only.split(",") if name.strip()}
+    results = []
+    for name, build in all_cases(sizes, args.seed).items():
+        if selected and name not in selected:
+            continue
+        for case in build():
+            row = measure(case)
+            results.append(row)
+            print(
+                f"{row['case']:<28} n={row['size']:<8} p50={row['p50_ms']:>10.4f}ms "
+                f"p99={row['p99_ms']:>10.4f}ms {row['throughput_per_s'] or 0:>12.1f}/s peak={row['peak_kib']}KiB"
+            )
+
+    report = {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    rows = compare(results, json.loads(baseline_path.read_text(encoding="utf-8"))["results"], args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"{row['case']:<28} n={row['size']:<8} {row['baseline_p50_ms']:.4f}ms -> {row['p50_ms']:.4f}ms ({row['change']:+.1%}) {flag}")
+    regressions = [row for row in rows if row["regression"]]
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
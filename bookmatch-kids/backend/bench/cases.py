@@ -0,0 +1,103 @@
+import io
+import os
+from datetime import datetime
+from itertools import cycle
+from typing import Callable, Dict, Iterator, List, NamedTuple
+
+from bson import ObjectId
+
+from .catalog import KID_QUERIES, catalog, inventory_csv
+
+
+class Case(NamedTuple):
+    name: str
+    size: int
+    items: int
+    repeat: int
+    call: Callable[[], object]
+
+
+def _main():
+    os.environ.setdefault("DEMO_LOGIN", "false")
+    from app import main
+
+    return main
+
+
+def _prefs(query: str) -> dict:
+    from app.services.gemini import _fallback_parse
+
+    parsed = _fallback_parse(query, {"age": None, "language": None, "format": None})
+    return {key: parsed.get(key) for key in ("age", "language", "format", "tags", "keywords")}
+
+
+def rank_cases(sizes: List[int], seed: int) -> Iterator[Case]:
+    from app.services.matching import rank_books
+
+    query = KID_QUERIES[0]
+    prefs = _prefs(query)
+    for size in sizes:
+        books = catalog(size, seed)
+        yield Case("rank_books", size, size, max(3, min(50, 200_000 // size)), lambda books=books: rank_books(books, prefs, query))
+
+
+def score_case(seed: int) -> Case:
+    from app.services.matching import _score_book
+
+    books = cycle(catalog(1000, seed))
+    queries = cycle([(query, _prefs(query)) for query in KID_QUERIES])
+
+    def call():
+        query, prefs = next(queries)
+        return _score_book(next(books), prefs, query)
+
+    return Case("_score_book", 1000, 1, 20_000, call)
+
+
+def fallback_parse_case() -> Case:
+    from app.services.gemini import _fallback_parse
+
+    queries = cycle(KID_QUERIES)
+    meta = {"age": None, "language": None, "format": None}
+    return Case("_fallback_parse", len(KID_QUERIES), 1, 20_000, lambda: _fallback_parse(next(queries), meta))
+
+
+def csv_cases(sizes: List[int], seed: int) -> Iterator[Case]:
+    from app.services.inventory_import import iter_csv_rows, row_to_book
+
+    for size in sizes:
+        text = inventory_csv(size, seed)
+
+        def call(text=text):
+            return [row_to_book(row, "main", 1) for row in iter_csv_rows(io.StringIO(text))]
+
+        yield Case("iter_csv_rows+row_to_book", size, size, max(3, min(20, 100_000 // size)), call)
+
+
+def serialize_case(seed: int) -> Case:
+    serialize = _main()._serialize
+    now = datetime.utcnow()
+    docs = cycle([{**book, "_id": ObjectId(), "created_at": now, "updated_at": now} for book in catalog(1000, seed)])
+    return Case("_serialize", 1000, 1, 50_000, lambda: serialize(next(docs)))
+
+
+def google_query_case() -> Case:
+    build = _main()._build_google_query
+    inputs = cycle([(query, prefs["tags"], prefs["keywords"]) for query in KID_QUERIES for prefs in [_prefs(query)]])
+
+    def call():
+        text, tags, keywords = next(inputs)
+        return build(text, tags, keywords)
+
+    return Case("_build_google_query", len(KID_QUERIES), 1, 50_000, call)
+
+
+def all_cases(sizes: List[int], seed: int) -> Dict[str, Callable[[], Iterator[Case]]]:
+    return {
+        "rank_books": lambda: rank_cases(sizes, seed),
+        "_score_book": lambda: iter([score_case(seed)]),
+        "_fallback_parse": lambda: iter([fallback_parse_case()]),
+        "csv": lambda: csv_cases(sizes, seed),
+        "_serialize": lambda: iter([serialize_case(seed)]),
+        "_build_google_query": lambda: iter([google_query_case()]),
+    }
@@ -0,0 +1,33 @@
+import csv
+import io
+import random
+from typing import Any, Dict, List
+
+from app.datagen import generate_books
+
+KID_QUERIES = [
+    "funny space adventure for a 7 year old",
+    "mystery chapter book with a detective dog",
+    "picture book about animals for my 4 yo",
+    "graphic novel about soccer",
+    "spanish books about dragons and magic",
+    "science robots for 9 year olds",
+    "bilingual picture book about friendship",
+    "something like dog man but about cats",
+]
+
+
+def catalog(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    return list(generate_books(count, seed))
+
+
+def inventory_csv(count: int, seed: int = 7, locations: int = 5) -> str:
+    rng = random.Random(seed + 1)
+    buffer = io.StringIO()
+    columns = ["title", "author", "description", "tags", "age_min", "age_max", "reading_level", "language", "format", "isbn"]
+    writer = csv.writer(buffer)
+    writer.writerow([*columns, "qty_available", "location_id"])
+    for book in generate_books(count, seed):
+        row = [("|".join(book[key]) if key == "tags" else book[key]) for key in columns]
+        writer.writerow([*row, rng.randint(0, 5), f"branch-{rng.randrange(locations)}"])
+    return buffer.getvalue()
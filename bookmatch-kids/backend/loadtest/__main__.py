@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+from .load import LoadConfig, print_report, run_load
+from .stubs import StubConfig, StubServer, Upstream
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _stub_config(args) -> StubConfig:
+    return StubConfig(
+        upstreams={
+            "gemini": Upstream(args.gemini_ms, args.jitter, args.error_rate),
+            "google_books": Upstream(args.books_ms, args.jitter, args.error_rate),
+            "elevenlabs": Upstream(args.tts_ms, args.jitter, args.error_rate),
+        },
+        burst_every=args.burst_every,
+        burst_seconds=args.burst_seconds,
+        burst_upstreams=tuple(name.strip() for name in args.burst_upstreams.split(",") if name.strip()),
+        seed=args.seed,
+    )
+
+
+def _load_config(args, base_url: str) -> LoadConfig:
+    return LoadConfig(
+        base_url=base_url.rstrip("/"),
+        users=args.users,
+        duration=args.duration,
+        staff_share=args.staff_share,
+        think_ms=args.think_ms,
+        use_gemini=not args.no_gemini,
+        seed=args.seed,
+    )
+
+
+def _finish(report: dict, out: str | None) -> None:
+    print_report(report)
+    if out:
+        Path(out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {out}")
+
+
+def _wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"API at {base_url} did not become ready")
+
+
+def cmd_stubs(args) -> None:
+    server = StubServer(_stub_config(args), port=args.stub_port).start()
+    print(f"Upstream stubs on {server.base_url}. Start the API with:")
+    for key, value in server.env().items():
+        print(f"  {key}={value}")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(server.counts()))
+    except KeyboardInterrupt:
+        server.stop()
+
+
+def cmd_run(args) -> None:
+    _wait_ready(args.base_url, timeout=10)
+    _finish(run_load(_load_config(args, args.base_url)), args.out)
+
+
+def cmd_all(args) -> None:
+    stubs = StubServer(_stub_config(args), port=args.stub_port).start()
+    env = {
+        **os.environ,
+        **stubs.env(),
+        "MONGODB_URI": args.mongodb_uri,
+        "DEMO_LOGIN": "true",
+        "CATALOG_PREFETCH_ENABLED": "false",
+        "TTS_CACHE_DIR": str(BACKEND_DIR / ".loadtest-tts"),
+    }
+    if args.books:
+        seed_cmd = ["app.datagen", "--reset", "--books", str(args.books), "--requests", str(args.history), "--seed", str(args.seed)]
+    else:
+        seed_cmd = ["app.seed"]
+    if not args.skip_seed:
+        subprocess.run([sys.executable, "-m", *seed_cmd], cwd=BACKEND_DIR, env=env, check=True)
+    base_url = f"http://127.0.0.1:{args.api_port}"
+    api = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(args.api_port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        _wait_ready(base_url)
+        report = run_load(_load_config(args, base_url))
+        report["upstream_calls"] = stubs.counts()
+        _finish(report, args.out)
+    finally:
+        api.terminate()
+        api.wait(timeout=20)
+        stubs.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    commands = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--seed", type=int, default=7)
+    stub_args = argparse.ArgumentParser(add_help=False)
+    stub_args.add_argument("--stub-port", type=int, default=9100)
+    stub_args.add_argument("--gemini-ms", type=float, default=700)
+    stub_args.add_argument("--books-ms", type=float, default=250)
+    stub_args.add_argument("--tts-ms", type=float, default=300)
+    stub_args.add_argument("--jitter", type=float, default=0.3, help="Latency jitter as a fraction of the mean")
+    stub_args.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream calls that return 500")
+    stub_args.add_argument("--burst-every", type=float, default=0, help="Seconds between 429 bursts (0 disables)")
+    stub_args.add_argument("--burst-seconds", type=float, default=5)
+    stub_args.add_argument("--burst-upstreams", default="gemini")
+    load_args = argparse.ArgumentParser(add_help=False)
+    load_args.add_argument("--users", type=int, default=20)
+    load_args.add_argument("--duration", type=float, default=60)
+    load_args.add_argument("--staff-share", type=float, default=0.15)
+    load_args.add_argument("--think-ms", type=float, default=500)
+    load_args.add_argument("--no-gemini", action="store_true", help="Use the fallback parser in /api/chat")
+    load_args.add_argument("--out", help="Write the report as JSON")
+
+    commands.add_parser("stubs", parents=[common, stub_args], help="Serve fake Gemini, Google Books and ElevenLabs APIs")
+    run = commands.add_parser("run", parents=[common, load_args], help="Replay traffic against a running API")
+    run.add_argument("--base-url", default="http://127.0.0.1:8001")
+    everything = commands.add_parser(
+        "all", parents=[common, stub_args, load_args], help="Start stubs and the API, then run load"
+    )
+    everything.add_argument("--mongodb-uri", default="mongodb://localhost:27017/bookmatch_loadtest")
+    everything.add_argument("--api-port", type=int, default=8011)
+    everything.add_argument("--workers", type=int, default=1)
+    everything.add_argument("--skip-seed", action="store_true")
+    everything.add_argument("--books", type=int, default=0, help="Seed a generated catalog of this size instead of app.seed")
+    everything.add_argument("--history", type=int, default=50_000, help="Past requests to generate with --books")
+    args = parser.parse_args()
+    {"stubs": cmd_stubs, "run": cmd_run, "all": cmd_all}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
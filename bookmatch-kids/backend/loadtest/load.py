@@ -0,0 +1,201 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+
+KID_QUERIES = [
+    "funny space adventure for a 7 year old",
+    "mystery chapter book with a detective dog",
+    "picture book about animals for my 4 year old",
+    "graphic novel about soccer for 9 year olds",
+    "spanish books about dragons and magic",
+    "science robots for 8 year olds",
+    "friendship stories for a 6 year old",
+]
+SEARCHES = [
+    {"tags": "space", "age": 7},
+    {"tags": "animals", "age": 5, "format": "picture"},
+    {"tags": "mystery,animals", "age": 9},
+    {"tags": "sports", "age": 8, "format": "graphic"},
+    {"q": "dragon", "language": "Spanish"},
+]
+STATUSES = ["approved", "picked", "packed"]
+
+
+@dataclass
+class LoadConfig:
+    base_url: str = "http://127.0.0.1:8001"
+    users: int = 20
+    duration: float = 60.0
+    staff_share: float = 0.15
+    think_ms: float = 500.0
+    request_share: float = 0.3
+    tts_share: float = 0.1
+    use_gemini: bool = True
+    seed: int = 7
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float) -> List[dict]:
+        rows = []
+        with self.lock:
+            for name, samples in sorted(self.samples.items()):
+                ordered = sorted(samples)
+
+                def pct(value: float) -> float:
+                    return round(ordered[min(int(round(value / 100 * (len(ordered) - 1))), len(ordered) - 1)] * 1000, 1)
+
+                rows.append(
+                    {
+                        "endpoint": name,
+                        "count": len(ordered),
+                        "errors": self.errors.get(name, 0),
+                        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                        "p50_ms": pct(50),
+                        "p95_ms": pct(95),
+                        "p99_ms": pct(99),
+                        "max_ms": round(ordered[-1] * 1000, 1),
+                    }
+                )
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, config: LoadConfig, recorder: Recorder, rng: random.Random, staff: bool) -> None:
+        self.config = config
+        self.recorder = recorder
+        self.rng = rng
+        self.staff = staff
+        self.session = requests.Session()
+        self.token: Optional[str] = None
+
+    def call(self, name: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        if self.token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        try:
+            resp = self.session.request(method, f"{self.config.base_url}{path}", timeout=60, **kwargs)
+            if kwargs.get("stream"):
+                for _ in resp.iter_content(chunk_size=16384):
+                    pass
+        except requests.RequestException:
+            self.recorder.record(name, time.perf_counter() - started, False)
+            return None
+        self.recorder.record(name, time.perf_counter() - started, resp.status_code < 400)
+        return resp
+
+    def think(self) -> None:
+        time.sleep(self.rng.expovariate(1000 / self.config.think_ms) if self.config.think_ms else 0)
+
+    def kid_visit(self) -> None:
+        self.call("GET /api/books/search", "GET", "/api/books/search", params=self.rng.choice(SEARCHES))
+        self.think()
+        query = self.rng.choice(KID_QUERIES)
+        resp = self.call("POST /api/chat", "POST", "/api/chat", json={"text": query, "use_gemini": self.config.use_gemini})
+        if resp is None or resp.status_code >= 400:
+            return
+        data = resp.json()
+        self.think()
+        if data.get("matches") and self.rng.random() < self.config.request_share:
+            matched = [{"book_id": match["id"], "score": match.get("score", 0)} for match in data["matches"][:3]]
+            self.call(
+                "POST /api/requests",
+                "POST",
+                "/api/requests",
+                json={
+                    "raw_text": query,
+                    "parsed_preferences": data.get("parsed") or {},
+                    "matched": matched,
+                    "location_id": self.rng.choice(["main", "east", "west"]),
+                    "requester_name": "Load Test",
+                },
+            )
+        if data.get("response") and self.rng.random() < self.config.tts_share:
+            self.call("POST /api/tts", "POST", "/api/tts", json={"text": data["response"]}, stream=True)
+
+    def staff_visit(self) -> None:
+        if not self.token:
+            resp = self.call("POST /api/auth/demo", "POST", "/api/auth/demo")
+            if resp is None or resp.status_code >= 400:
+                return
+            self.token = resp.json().get("token")
+        resp = self.call("GET /api/admin/requests", "GET", "/api/admin/requests", params={"limit": 50})
+        self.think()
+        self.call("GET /api/admin/analytics", "GET", "/api/admin/analytics")
+        items = resp.json() if resp is not None and resp.status_code == 200 else []
+        items = [item for item in items if item.get("status") not in {"distributed", "cancelled"}]
+        if not items:
+            return
+        item = self.rng.choice(items)
+        self.think()
+        self.call("GET /api/admin/requests/{id}/picklist", "GET", f"/api/admin/requests/{item['id']}/picklist")
+        self.call(
+            "POST /api/admin/requests/{id}/status",
+            "POST",
+            f"/api/admin/requests/{item['id']}/status",
+            json={"status": self.rng.choice(STATUSES)},
+        )
+        if self.rng.random() < 0.2:
+            self.call("GET /api/admin/picklists", "GET", "/api/admin/picklists", params={"status": "approved"})
+
+    def run(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            if self.staff:
+                self.staff_visit()
+            else:
+                self.kid_visit()
+            self.think()
+
+
+def run_load(config: LoadConfig) -> dict:
+    recorder = Recorder()
+    rng = random.Random(config.seed)
+    staff_users = round(config.users * config.staff_share)
+    users = [
+        VirtualUser(config, recorder, random.Random(rng.random()), staff=index < staff_users)
+        for index in range(config.users)
+    ]
+    started = time.monotonic()
+    deadline = started + config.duration
+    threads = [threading.Thread(target=user.run, args=(deadline,), daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    rows = recorder.report(elapsed)
+    return {
+        "users": config.users,
+        "staff_users": staff_users,
+        "duration_s": round(elapsed, 1),
+        "requests": sum(row["count"] for row in rows),
+        "errors": sum(row["errors"] for row in rows),
+        "endpoints": rows,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['requests']} requests, {report['errors']} errors in {report['duration_s']}s "
+        f"({report['users']} users, {report['staff_users']} staff)"
+    )
+    print(f"{'endpoint':<42}{'count':>7}{'err':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for row in report["endpoints"]:
+        print(
+            f"{row['endpoint']:<42}{row['count']:>7}{row['errors']:>6}{row['rps']:>8}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}"
+        )
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+TAG_WORDS = ["space", "animals", "mystery", "sports", "dragon", "robot", "science", "friendship", "adventure", "history"]
+FRAME = bytes.fromhex("fffb9064") + bytes(413)
+FRAME_SECONDS = 1152 / 44100
+
+
+@dataclass
+class Upstream:
+    latency_ms: float
+    jitter: float = 0.3
+    error_rate: float = 0.0
+
+
+@dataclass
+class StubConfig:
+    upstreams: Dict[str, Upstream] = field(
+        default_factory=lambda: {
+            "gemini": Upstream(700),
+            "google_books": Upstream(250),
+            "elevenlabs": Upstream(300),
+        }
+    )
+    burst_every: float = 0.0
+    burst_seconds: float = 0.0
+    burst_upstreams: tuple = ("gemini",)
+    tts_chars_per_second: float = 400.0
+    seed: int = 7
+
+
+class _State:
+    def __init__(self, config: StubConfig) -> None:
+        self.config = config
+        self.started = time.monotonic()
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def fault(self, upstream: str) -> Optional[int]:
+        config = self.config
+        if config.burst_every and upstream in config.burst_upstreams:
+            if (time.monotonic() - self.started) % config.burst_every < config.burst_seconds:
+                self.count(f"{upstream}:429")
+                return 429
+        with self.lock:
+            failed = self.rng.random() < config.upstreams[upstream].error_rate
+        if failed:
+            self.count(f"{upstream}:500")
+            return 500
+        return None
+
+    def delay(self, upstream: str, scale: float = 1.0) -> None:
+        settings = self.config.upstreams[upstream]
+        with self.lock:
+            jitter = self.rng.uniform(-settings.jitter, settings.jitter)
+        time.sleep(max(settings.latency_ms * (1 + jitter) * scale, 0) / 1000)
+
+
+def _prompt_texts(payload: dict) -> list:
+    return [part.get("text", "") for content in payload.get("contents", []) for part in content.get("parts", [])]
+
+
+def _gemini_text(payload: dict) -> str:
+    texts = _prompt_texts(payload)
+    system = texts[0] if texts else ""
+    body = texts[-1] if texts else ""
+    if "JSON-only parser" in system:
+        request = json.loads(body).get("text", "") if body.startswith("{") else body
+        lowered = request.lower()
+        age = re.search(r"\b(\d{1,2})\b", lowered)
+        return json.dumps(
+            {
+                "age": int(age.group(1)) if age else None,
+                "language": "Spanish" if "spanish" in lowered else None,
+                "format": next((fmt for fmt in ("picture", "chapter", "graphic") if fmt in lowered), None),
+                "tags": [tag for tag in TAG_WORDS if tag in lowered][:3],
+                "keywords": [word for word in lowered.split() if len(word) > 4][:4],
+                "tone": "funny" if "funny" in lowered else None,
+                "themes": [],
+                "series": None,
+                "length": None,
+            }
+        )
+    if "book concierge" in system:
+        return json.dumps(
+            {
+                "reply": "What does your reader love right now? Animals, space or mysteries?",
+                "suggested_queries": ["funny animals for age 6", "space adventure chapter book"],
+            }
+        )
+    return "These picks match your interests and reading level. Start with the first one, it is a great read-aloud."
+
+
+def _volumes(query: str, count: int) -> dict:
+    digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    words = [word for word in query.split() if word.isalpha()][:2] or ["Story"]
+    items = []
+    for index in range(count):
+        items.append(
+            {
+                "id": f"stub-{digest[:10]}-{index}",
+                "volumeInfo": {
+                    "title": f"{' '.join(word.title() for word in words)} Book {index + 1}",
+                    "authors": [f"Stub Author {digest[index % 8]}"],
+                    "description": f"A generated book about {query}.",
+                    "categories": ["Juvenile Fiction / General"],
+                    "language": "en",
+                    "pageCount": 40 + index * 10,
+                    "industryIdentifiers": [{"type": "ISBN_13", "identifier": f"979{int(digest[:9], 16) % 10**9:09d}{index}"}],
+                },
+            }
+        )
+    return {"items": items}
+
+
+def _make_handler(state: _State):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args) -> None:
+            return
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            return json.loads(raw or b"{}")
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _fail(self, upstream: str) -> bool:
+            status = state.fault(upstream)
+            if status is None:
+                return False
+            self._send_json(status, {"error": {"code": status, "message": "stubbed failure"}})
+            return True
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path.endswith("/books/v1/volumes"):
+                state.count("google_books")
+                state.delay("google_books")
+                if not self._fail("google_books"):
+                    self._send_json(200, _volumes(query.get("q", [""])[0], int(query.get("maxResults", ["5"])[0])))
+            elif url.path.endswith("/models"):
+                state.count("gemini_models")
+                self._send_json(200, {"models": [{"name": "models/gemini-2.5-flash"}]})
+            elif url.path.endswith("/voices"):
+                state.count("elevenlabs_voices")
+                self._send_json(200, {"voices": [{"name": "Stub Voice", "voice_id": "stub-voice"}]})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            payload = self._read_json()
+            if url.path.endswith(":generateContent"):
+                state.count("gemini")
+                state.delay("gemini")
+                if not self._fail("gemini"):
+                    self._send_json(200, {"candidates": [{"content": {"parts": [{"text": _gemini_text(payload)}]}}]})
+            elif "/text-to-speech/" in url.path:
+                state.count("elevenlabs")
+                self._speak(payload.get("text", ""), streaming=url.path.endswith("/stream"))
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def _speak(self, text: str, streaming: bool) -> None:
+            state.delay("elevenlabs")
+            if self._fail("elevenlabs"):
+                return
+            seconds = max(len(text) / 15, 0.5)
+            audio = FRAME * max(int(seconds / FRAME_SECONDS), 1)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            if not streaming:
+                time.sleep(len(text) / state.config.tts_chars_per_second)
+                self.send_header("Content-Length", str(len(audio)))
+                self.end_headers()
+                self.wfile.write(audio)
+                return
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunk_size = 4096
+            pause = len(text) / state.config.tts_chars_per_second / max(len(audio) // chunk_size, 1)
+            for start in range(0, len(audio), chunk_size):
+                chunk = audio[start : start + chunk_size]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+                time.sleep(pause)
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+class StubServer:
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 9100) -> None:
+        self.state = _State(config)
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "GEMINI_API_KEY": "stub",
+            "GEMINI_API_BASE": self.base_url,
+            "GOOGLE_BOOKS_ENABLED": "true",
+            "GOOGLE_BOOKS_API_URL": f"{self.base_url}/books/v1/volumes",
+            "BOOKCOVER_API_ENABLED": "false",
+            "ELEVENLABS_API_KEY": "stub",
+            "ELEVENLABS_VOICE_ID": "stub-voice",
+            "ELEVENLABS_API_BASE": f"{self.base_url}/v1",
+        }
+
+    def start(self) -> "StubServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="upstream-stubs", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def counts(self) -> Dict[str, int]:
+        with self.state.lock:
+            return dict(self.state.counts)
@@ -0,0 +1,7 @@
+import mongomock
+import pytest
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.services.analytics import record_request
+
+
+def test_record_request_ignores_malformed_tags(db):
+    doc = {
+        "_id": ObjectId(),
+        "status": "new",
+        "created_at": datetime(2026, 5, 1),
+        "parsed_preferences": {"tags": [" Dragons ", "dragons", {"bad": 1}, ["x"], 3, None, ""]},
+    }
+    record_request(db, doc)
+    tags = {row["key"]: row["count"] for row in db.analytics_rollups.find({"kind": "tag"})}
+    assert tags == {"dragons": 1}
+    assert db.analytics_rollups.find_one({"_id": "status:new"})["count"] == 1
+
+
+def test_record_request_accepts_non_list_tags(db):
+    record_request(db, {"status": "new", "parsed_preferences": {"tags": "space"}})
+    assert db.analytics_rollups.count_documents({"kind": "tag"}) == 0
@@ -0,0 +1,45 @@
+import pytest
+from bson import ObjectId
+
+from app import auth, tokens
+
+
+@pytest.fixture
+def signed(db, monkeypatch):
+    monkeypatch.setenv("AUTH_TOKEN_MODE", "signed")
+    monkeypatch.setenv("AUTH_TOKEN_SECRET", "test-secret")
+    monkeypatch.setenv("SESSION_CACHE_SYNC_SECONDS", "0")
+    monkeypatch.setenv("REVOCATION_SYNC_SECONDS", "0")
+    monkeypatch.setattr(auth, "get_db", lambda: db)
+    auth._SESSION_CACHE.clear()
+    auth._CACHE_SYNC.update(version=None, checked_at=0.0)
+    tokens._REVOKED.update(sids={}, users={}, synced_at=0.0)
+    user_id = db.users.insert_one({"email": "staff@example.org", "name": "Staff", "role": "staff"}).inserted_id
+    return auth.issue_tokens(db.users.find_one({"_id": user_id}))
+
+
+def _auth_version(db):
+    return (db.auth_state.find_one({"_id": "sessions"}) or {}).get("version", 0)
+
+
+def test_refresh_token_is_not_a_bearer_token(signed):
+    assert auth.get_user_by_token(signed["token"])["email"] == "staff@example.org"
+    assert auth.get_user_by_token(signed["refresh_token"]) is None
+
+
+def test_session_token_still_authenticates(signed, db):
+    session_token = auth.create_session(db.users.find_one()["_id"])
+    assert auth.get_user_by_token(session_token)["email"] == "staff@example.org"
+
+
+def test_signed_logout_evicts_cache_and_bumps_version(signed, db):
+    refresh = signed["refresh_token"]
+    auth._cache_put(refresh, {"_id": ObjectId(), "email": "staff@example.org"}, None)
+    before = _auth_version(db)
+
+    auth.logout(signed["token"])
+    assert auth._cache_get(refresh) is None
+    assert _auth_version(db) == before + 1
+    assert db.sessions.find_one({"token": refresh}) is None
+    assert auth.get_user_by_token(signed["token"]) is None
+    assert auth.refresh_access_token(refresh) is None
@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+import pytest
+
+from app import hashing
+
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_WORKERS", "0")
+    hashing.shutdown_pool()
+    yield
+    hashing.shutdown_pool()
+
+
+def test_zero_workers_hash_off_the_event_loop(inline_pool, monkeypatch):
+    threads = []
+    derive = hashing.derive
+
+    def tracked(*args):
+        threads.append(threading.current_thread())
+        return derive(*args)
+
+    monkeypatch.setattr(hashing, "derive", tracked)
+    result = asyncio.run(hashing.derive_async("secret", "00" * 16, 10_000))
+    assert result == derive("secret", "00" * 16, 10_000)
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,39 @@
+from app.services.identity import identity_fields, merge_duplicate_books, resolve_books
+from app.services.inventory_import import import_chunk
+
+
+def _book(**fields):
+    book = {"title": "Starlight Explorers", "author": "J. Vega", **fields}
+    return {**book, **identity_fields(book)}
+
+
+def test_fingerprint_match_skips_different_isbn(db):
+    db.books.insert_one(_book(isbn="9780000000002"))
+    resolved = resolve_books(db, [_book(isbn="9780306406157"), _book(isbn=""), _book(isbn="9780000000002")])
+    assert resolved[0] is None
+    assert resolved[1]["isbn13"] == "9780000000002"
+    assert resolved[2]["isbn13"] == "9780000000002"
+
+
+def test_fingerprint_match_prefers_compatible_book(db):
+    first = db.books.insert_one(_book(isbn="9780000000002")).inserted_id
+    second = db.books.insert_one(_book(isbn="")).inserted_id
+    assert resolve_books(db, [_book(isbn="9780306406157")])[0]["_id"] == second
+    assert resolve_books(db, [_book(isbn="")])[0]["_id"] == first
+
+
+def test_import_keeps_editions_with_different_isbns_apart(db):
+    rows = [
+        {"title": "Starlight Explorers", "author": "J. Vega", "isbn": "9780000000002"},
+        {"title": "Starlight Explorers", "author": "J. Vega", "isbn": "9780306406157"},
+    ]
+    result = import_chunk(db, rows, "main", 1)
+    assert result["new_rows"] == 2
+    assert db.books.count_documents({}) == 2
+
+
+def test_merge_keeps_editions_with_different_isbns_apart(db):
+    db.books.insert_many([_book(isbn="9780000000002"), _book(isbn="9780306406157"), _book(isbn="")])
+    result = merge_duplicate_books(db)
+    assert result["merged"] == 0
+    assert db.books.count_documents({}) == 3
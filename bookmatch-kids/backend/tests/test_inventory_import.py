@@ -0,0 +1,35 @@
+from app.services.inventory_import import import_chunk
+from app.services.reservations import set_stock
+
+ROW = {"title": "Starlight Explorers", "author": "J. Vega", "isbn": "9780000000002", "qty_available": "3"}
+
+
+def _stock(db):
+    row = db.inventory.find_one({"location_id": "main"})
+    return row["qty_available"], row.get("qty_reserved", 0)
+
+
+def test_reimport_of_unchanged_rows_is_skipped(db):
+    import_chunk(db, [ROW], "main", 1)
+    result = import_chunk(db, [ROW], "main", 1)
+    assert result["unchanged_rows"] == 1
+    assert result["inventory_upserts"] == 0
+
+
+def test_reimport_restores_count_after_manual_update(db):
+    import_chunk(db, [ROW], "main", 1)
+    book_id = db.books.find_one()["_id"]
+    db.inventory.update_one({"book_id": book_id, "location_id": "main"}, set_stock(0))
+
+    result = import_chunk(db, [ROW], "main", 1)
+    assert result["changed_rows"] == 1
+    assert _stock(db) == (3, 0)
+
+
+def test_reimport_during_hold_keeps_row_unchanged(db):
+    import_chunk(db, [ROW], "main", 1)
+    db.inventory.update_one({"location_id": "main"}, {"$inc": {"qty_available": -1, "qty_reserved": 1}})
+
+    result = import_chunk(db, [ROW], "main", 1)
+    assert result["unchanged_rows"] == 1
+    assert _stock(db) == (2, 1)
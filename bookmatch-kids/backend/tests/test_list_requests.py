@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.versions import bump_version
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(main, "get_db", lambda: db)
+    main.app.dependency_overrides[main._require_staff] = lambda: {"role": "staff"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def _pages(client, **params):
+    ids = []
+    cursor = None
+    while True:
+        response = client.get("/api/admin/requests", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return ids
+
+
+def test_cursor_pages_reach_string_dated_rows(client, db):
+    now = datetime(2026, 5, 1)
+    dated = [{"_id": ObjectId(), "created_at": now - timedelta(days=i), "status": "new"} for i in range(3)]
+    legacy = [{"_id": ObjectId(), "created_at": f"not a date {i}", "status": "new"} for i in range(3)]
+    db.requests.insert_many(dated + legacy)
+
+    ids = _pages(client, limit=2)
+    assert ids[:3] == [str(doc["_id"]) for doc in dated]
+    assert sorted(ids[3:]) == sorted(str(doc["_id"]) for doc in legacy)
+
+
+def test_expanded_etag_changes_with_books(client, db):
+    book_id = db.books.insert_one({"title": "Starlight Explorers"}).inserted_id
+    db.requests.insert_one({"created_at": datetime(2026, 5, 1), "matched": [{"book_id": str(book_id)}]})
+    plain = client.get("/api/admin/requests").headers["etag"]
+    expanded = client.get("/api/admin/requests", params={"expand": "books"}).headers["etag"]
+
+    bump_version(db, "books")
+    assert client.get("/api/admin/requests").headers["etag"] == plain
+    response = client.get("/api/admin/requests", params={"expand": "books"}, headers={"If-None-Match": expanded})
+    assert response.status_code == 200
+    assert response.headers["etag"] != expanded
@@ -0,0 +1,38 @@
+from app.services.identity import identity_fields
+from app.services.picklists import picklist_lines
+from app.services.reservations import reserve_for_request
+
+
+def _request(db, book_id, location_id="main"):
+    request_id = db.requests.insert_one({"status": "approved", "location_id": location_id}).inserted_id
+    matched = reserve_for_request(db, request_id, location_id, [{"book_id": str(book_id), "title": "Starlight"}])
+    db.requests.update_one({"_id": request_id}, {"$set": {"matched": matched}})
+    return request_id
+
+
+def _lines(db):
+    rows = db.requests.aggregate(picklist_lines({"status": "approved"}))
+    return {row["_id"]["location_id"]: row["requested"] for row in rows}
+
+
+def test_fallback_hold_is_picked_at_its_own_location(db):
+    book = {"title": "Starlight Explorers", "author": "J. Vega"}
+    book_id = db.books.insert_one({**book, **identity_fields(book)}).inserted_id
+    db.inventory.insert_many(
+        [
+            {"book_id": book_id, "location_id": "main", "qty_available": 1},
+            {"book_id": book_id, "location_id": "branch-1", "qty_available": 1},
+        ]
+    )
+    _request(db, book_id)
+    fallback = _request(db, book_id)
+    assert db.reservations.find_one({"request_id": fallback})["location_id"] == "branch-1"
+    assert _lines(db) == {"main": 1, "branch-1": 1}
+
+
+def test_unreserved_lines_use_the_request_location(db):
+    book = {"title": "Starlight Explorers", "author": "J. Vega"}
+    book_id = db.books.insert_one({**book, **identity_fields(book)}).inserted_id
+    _request(db, book_id, location_id="branch-2")
+    db.requests.insert_one({"status": "approved", "matched": [{"book_id": str(book_id)}]})
+    assert _lines(db) == {"branch-2": 1, "main": 1}
@@ -0,0 +1,94 @@
+import mongomock
+import pytest
+from bson import ObjectId
+
+from app.services.identity import identity_fields, merge_duplicate_books
+from app.services.inventory_import import import_chunk
+from app.services.reservations import release_request, reserve_for_request, set_stock
+from app.services.versions import current_version
+
+
+def _stock(db, book_id, location_id="main"):
+    row = db.inventory.find_one({"book_id": book_id, "location_id": location_id})
+    return row["qty_available"], row.get("qty_reserved", 0)
+
+
+def _book(db, **fields):
+    book = {"title": "Starlight Explorers", "author": "J. Vega", "isbn": "9780000000002", **fields}
+    return db.books.insert_one({**book, **identity_fields(book)}).inserted_id
+
+
+def _hold(db, book_id, location_id="main"):
+    request_id = ObjectId()
+    matched = reserve_for_request(db, request_id, location_id, [{"book_id": str(book_id), "score": 1}])
+    assert matched[0]["reserved"]
+    return request_id
+
+
+def test_manual_count_during_hold_does_not_oversell(db):
+    book_id = _book(db)
+    db.inventory.insert_one({"book_id": book_id, "location_id": "main", "qty_available": 3})
+    request_id = _hold(db, book_id)
+
+    db.inventory.update_one({"book_id": book_id, "location_id": "main"}, set_stock(3), upsert=True)
+    assert _stock(db, book_id) == (2, 1)
+
+    release_request(db, request_id)
+    assert _stock(db, book_id) == (3, 0)
+
+
+def test_reimport_during_hold_does_not_oversell(db):
+    row = {"title": "Starlight Explorers", "author": "J. Vega", "isbn": "9780000000002", "qty_available": "3"}
+    import_chunk(db, [row], "main", 1)
+    book_id = db.books.find_one()["_id"]
+    request_id = _hold(db, book_id)
+
+    import_chunk(db, [{**row, "qty_available": "4"}], "main", 1)
+    assert _stock(db, book_id) == (3, 1)
+
+    release_request(db, request_id)
+    assert _stock(db, book_id) == (4, 0)
+
+
+@pytest.fixture
+def array_filters_ignored():
+    mongomock.ignore_feature("array_filters")
+    yield
+    mongomock.warn_on_feature("array_filters")
+
+
+def test_merge_moves_holds_to_winner(db, array_filters_ignored):
+    winner_id = _book(db)
+    loser_id = _book(db, title="Starlight Explorers (Reprint)")
+    db.inventory.insert_many(
+        [
+            {"book_id": winner_id, "location_id": "main", "qty_available": 1},
+            {"book_id": loser_id, "location_id": "main", "qty_available": 2},
+        ]
+    )
+    request_id = _hold(db, loser_id)
+
+    result = merge_duplicate_books(db)
+    assert result["merged"] == 1
+    assert db.books.find_one({"_id": loser_id}) is None
+    assert _stock(db, winner_id) == (2, 1)
+    assert db.reservations.find_one({"request_id": request_id})["book_id"] == winner_id
+
+    release_request(db, request_id)
+    assert _stock(db, winner_id) == (3, 0)
+
+
+def test_stock_version_only_moves_when_a_row_empties_or_refills(db):
+    book_id = _book(db)
+    db.inventory.insert_one({"book_id": book_id, "location_id": "main", "qty_available": 2})
+
+    first = _hold(db, book_id)
+    assert current_version(db, "stock") == 0
+    second = _hold(db, book_id)
+    assert current_version(db, "stock") == 1
+
+    release_request(db, second)
+    assert current_version(db, "stock") == 2
+    release_request(db, first)
+    assert current_version(db, "stock") == 2
+    assert current_version(db, "inventory") == 4
@@ -4,7 +4,7 @@ import StaffPage from "./pages/StaffPage";
 import VolunteerPage from "./pages/VolunteerPage";
 import PitchPage from "./pages/PitchPage";
 import "./styles.css";
-import { login, me, register, demoLogin, magicLogin } from "./api";
+import { login, logout, me, register, demoLogin, magicLogin, saveAuthTokens, clearAuthTokens } from "./api";
 
 const tabs = [
   { id: "kid", label: "Kid" },
@@ -42,7 +42,7 @@ export default function App() {
     if (!magic) return;
     magicLogin(magic)
       .then((data) => {
-        localStorage.setItem("bookmatch_token", data.token);
+        saveAuthTokens(data);
         setUser(data.user);
         params.delete("magic");
         window.history.replaceState({}, "", `${window.location.pathname}`);
@@ -94,7 +94,7 @@ export default function App() {
               role: authRole,
               invite_code: authInvite || undefined,
             });
-      localStorage.setItem("bookmatch_token", data.token);
+      saveAuthTokens(data);
       setUser(data.user);
       setAuthOpen(false);
       setAuthPassword("");
@@ -103,8 +103,9 @@ export default function App() {
     }
   }
 
-  function handleLogout() {
-    localStorage.removeItem("bookmatch_token");
+  async function handleLogout() {
+    await logout();
+    clearAuthTokens();
     setUser(null);
   }
 
@@ -112,7 +113,7 @@ export default function App() {
     setDemoError(null);
     try {
       const data = await demoLogin();
-      localStorage.setItem("bookmatch_token", data.token);
+      saveAuthTokens(data);
       setUser(data.user);
       setAuthOpen(false);
     } catch (err) {
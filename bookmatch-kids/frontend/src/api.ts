@@ -1,6 +1,7 @@
 import type {
   ParsedPreferences,
   Book,
+  RequestChange,
   RequestItem,
   Picklist,
   BookMatch,
@@ -9,7 +10,7 @@ import type {
   KeysStatus,
   ChatResponse,
   GeminiModelsResponse,
-  InventoryImportResult,
+  ImportJob,
   AnalyticsResponse,
   DbInfo,
 } from "./types";
@@ -52,17 +53,55 @@ function friendlyMessage(message: string): string {
   return message;
 }
 
-async function request<T>(path: string, options: RequestInit = {}): Promise<T> {
+export function saveAuthTokens(data: { token: string; refresh_token?: string }) {
+  localStorage.setItem("bookmatch_token", data.token);
+  if (data.refresh_token) {
+    localStorage.setItem("bookmatch_refresh_token", data.refresh_token);
+  } else {
+    localStorage.removeItem("bookmatch_refresh_token");
+  }
+}
+
+export function clearAuthTokens() {
+  localStorage.removeItem("bookmatch_token");
+  localStorage.removeItem("bookmatch_refresh_token");
+}
+
+async function refreshAccessToken(): Promise<boolean> {
+  let refreshToken = "";
+  try {
+    refreshToken = localStorage.getItem("bookmatch_refresh_token") || "";
+  } catch {
+    return false;
+  }
+  if (!refreshToken) return false;
+  const res = await fetch(`${API_BASE}/api/auth/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  });
+  if (!res.ok) return false;
+  const data = await res.json();
+  localStorage.setItem("bookmatch_token", data.token);
+  return true;
+}
+
+async function send(path: string, options: RequestInit = {}, retried = false): Promise<Response> {
   const token = getAuthToken();
+  const isForm = options.body instanceof FormData;
   const res = await fetch(`${API_BASE}${path}`, {
     headers: {
-      "Content-Type": "application/json",
+      ...(isForm ? {} : { "Content-Type": "application/json" }),
       ...(token ? { Authorization: `Bearer ${token}` } : {}),
       ...(options.headers || {}),
     },
     ...options,
   });
 
+  if (res.status === 401 && token && !retried && (await refreshAccessToken())) {
+    return send(path, options, true);
+  }
+
   if (!res.ok) {
     let text = "";
     try {
@@ -78,6 +117,11 @@ async function request<T>(path: string, options: RequestInit = {}): Promise<T> {
     throw new Error(friendlyMessage(text || `Request failed: ${res.status}`));
   }
 
+  return res;
+}
+
+async function request<T>(path: string, options: RequestInit = {}): Promise<T> {
+  const res = await send(path, options);
   return res.json();
 }
 
@@ -138,9 +182,49 @@ export function createRequest(payload: {
   });
 }
 
-export function listRequests(status?: string): Promise<RequestItem[]> {
-  const query = status ? `?status=${encodeURIComponent(status)}` : "";
-  return request(`/api/admin/requests${query}`);
+export async function listRequests(
+  status?: string,
+  cursor?: string | null
+): Promise<{ items: RequestItem[]; nextCursor: string | null }> {
+  const params = new URLSearchParams();
+  if (status) params.set("status", status);
+  if (cursor) params.set("cursor", cursor);
+  const query = params.toString() ? `?${params.toString()}` : "";
+  const res = await send(`/api/admin/requests${query}`);
+  return { items: await res.json(), nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
+export function openAdminStream(handlers: {
+  onRequests: (changes: RequestChange[]) => void;
+  onInventory: () => void;
+  onResync: () => void;
+}): () => void {
+  let source: EventSource | null = null;
+  let timer: number | undefined;
+  let closed = false;
+  const connect = () => {
+    source = new EventSource(`${API_BASE}/api/admin/stream?token=${encodeURIComponent(getAuthToken())}`);
+    source.addEventListener("requests", (event) => {
+      handlers.onRequests(JSON.parse((event as MessageEvent).data).changes);
+    });
+    source.addEventListener("inventory", () => handlers.onInventory());
+    source.addEventListener("resync", () => handlers.onResync());
+    source.onerror = () => {
+      if (closed || source?.readyState !== EventSource.CLOSED) return;
+      timer = window.setTimeout(async () => {
+        await refreshAccessToken();
+        if (closed) return;
+        connect();
+        handlers.onResync();
+      }, 5000);
+    };
+  };
+  connect();
+  return () => {
+    closed = true;
+    window.clearTimeout(timer);
+    source?.close();
+  };
 }
 
 export function updateRequestStatus(id: string, status: string): Promise<RequestItem> {
@@ -162,21 +246,21 @@ export function fetchKeysStatus(): Promise<KeysStatus> {
   return request("/api/admin/keys-status");
 }
 
-export function login(payload: { email: string; password: string }): Promise<{ token: string; user: { id: string; email: string; name: string; role: string } }> {
+export function login(payload: { email: string; password: string }): Promise<{ token: string; refresh_token?: string; user: { id: string; email: string; name: string; role: string } }> {
   return request("/api/auth/login", {
     method: "POST",
     body: JSON.stringify(payload),
   });
 }
 
-export function register(payload: { name: string; email: string; password: string; role?: string; invite_code?: string }): Promise<{ token: string; user: { id: string; email: string; name: string; role: string } }> {
+export function register(payload: { name: string; email: string; password: string; role?: string; invite_code?: string }): Promise<{ token: string; refresh_token?: string; user: { id: string; email: string; name: string; role: string } }> {
   return request("/api/auth/register", {
     method: "POST",
     body: JSON.stringify(payload),
   });
 }
 
-export function demoLogin(): Promise<{ token: string; user: { id: string; email: string; name: string; role: string } }> {
+export function demoLogin(): Promise<{ token: string; refresh_token?: string; user: { id: string; email: string; name: string; role: string } }> {
   return request("/api/auth/demo", {
     method: "POST",
     body: JSON.stringify({}),
@@ -193,7 +277,19 @@ export async function me(): Promise<{ id: string; email: string; name: string; r
   }
 }
 
-export function magicLogin(token: string): Promise<{ token: string; user: { id: string; email: string; name: string; role: string } }> {
+export async function logout(): Promise<void> {
+  if (!getAuthToken()) return;
+  try {
+    await request("/api/auth/logout", {
+      method: "POST",
+      body: JSON.stringify({}),
+    });
+  } catch {
+    // ignore
+  }
+}
+
+export function magicLogin(token: string): Promise<{ token: string; refresh_token?: string; user: { id: string; email: string; name: string; role: string } }> {
   return request("/api/auth/magic-login", {
     method: "POST",
     body: JSON.stringify({ token }),
@@ -254,13 +350,68 @@ export function importInventory(payload: {
   csv: string;
   location_id?: string;
   default_qty?: number;
-}): Promise<InventoryImportResult> {
+}): Promise<{ ok: boolean; job: ImportJob }> {
   return request("/api/admin/inventory/import", {
     method: "POST",
     body: JSON.stringify(payload),
   });
 }
 
+export function uploadInventory(payload: {
+  file: File;
+  location_id?: string;
+  default_qty?: number;
+}): Promise<{ ok: boolean; job: ImportJob }> {
+  const form = new FormData();
+  form.append("file", payload.file);
+  form.append("location_id", payload.location_id || "main");
+  form.append("default_qty", String(payload.default_qty ?? 1));
+  return request("/api/admin/inventory/upload", {
+    method: "POST",
+    body: form,
+  });
+}
+
+export function fetchImportJob(id: string): Promise<ImportJob> {
+  return request(`/api/admin/jobs/${id}`);
+}
+
+export function cancelImportJob(id: string): Promise<ImportJob> {
+  return request(`/api/admin/jobs/${id}/cancel`, {
+    method: "POST",
+    body: JSON.stringify({}),
+  });
+}
+
+export function resumeImportJob(id: string): Promise<ImportJob> {
+  return request(`/api/admin/jobs/${id}/resume`, {
+    method: "POST",
+    body: JSON.stringify({}),
+  });
+}
+
+export async function downloadImportErrors(id: string): Promise<Blob> {
+  const token = getAuthToken();
+  const res = await fetch(`${API_BASE}/api/admin/jobs/${id}/errors`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+  if (!res.ok) {
+    throw new Error(`Download failed: ${res.status}`);
+  }
+  return res.blob();
+}
+
+export async function downloadBatchPicklist(status: string): Promise<Blob> {
+  const token = getAuthToken();
+  const res = await fetch(`${API_BASE}/api/admin/picklists?status=${encodeURIComponent(status)}&format=csv`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+  if (!res.ok) {
+    throw new Error(`Download failed: ${res.status}`);
+  }
+  return res.blob();
+}
+
 export function refreshBookCovers(payload: {
   limit?: number;
   force?: boolean;
@@ -317,7 +468,11 @@ export function concierge(message: string, history: string[] = []): Promise<Conc
   });
 }
 
-export async function textToSpeech(text: string): Promise<Blob> {
+const speechKeys = new Map<string, string>();
+
+export async function textToSpeech(text: string): Promise<string> {
+  const key = speechKeys.get(text);
+  if (key) return `${API_BASE}/api/tts/${key}.mp3`;
   const res = await fetch(`${API_BASE}/api/tts`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
@@ -327,5 +482,43 @@ export async function textToSpeech(text: string): Promise<Blob> {
     const errorText = await res.text();
     throw new Error(errorText || `TTS failed: ${res.status}`);
   }
-  return res.blob();
+  const speechKey = res.headers.get("X-TTS-Key");
+  const remember = () => {
+    if (speechKey) speechKeys.set(text, speechKey);
+  };
+  if (res.headers.get("ETag") || !res.body || !canStreamAudio()) {
+    const blob = await res.blob();
+    remember();
+    return URL.createObjectURL(blob);
+  }
+  return streamAudio(res.body, remember);
+}
+
+function canStreamAudio() {
+  return typeof MediaSource !== "undefined" && MediaSource.isTypeSupported("audio/mpeg");
+}
+
+function streamAudio(body: ReadableStream<Uint8Array>, onComplete: () => void): string {
+  const source = new MediaSource();
+  source.addEventListener(
+    "sourceopen",
+    async () => {
+      const buffer = source.addSourceBuffer("audio/mpeg");
+      const reader = body.getReader();
+      try {
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer.appendBuffer(value);
+          await new Promise((resolve) => buffer.addEventListener("updateend", resolve, { once: true }));
+        }
+        source.endOfStream();
+        onComplete();
+      } catch {
+        if (source.readyState === "open") source.endOfStream("network");
+      }
+    },
+    { once: true }
+  );
+  return URL.createObjectURL(source);
 }
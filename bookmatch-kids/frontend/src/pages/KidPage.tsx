@@ -91,9 +91,8 @@ export default function KidPage() {
     setLoading(true);
     setError(null);
     try {
-      const blob = await textToSpeech(textToRead);
-      const url = URL.createObjectURL(blob);
-      if (audioUrl) URL.revokeObjectURL(audioUrl);
+      const url = await textToSpeech(textToRead);
+      if (audioUrl?.startsWith("blob:")) URL.revokeObjectURL(audioUrl);
       setAudioUrl(url);
     } catch (err) {
       setError(err instanceof Error ? err.message : "TTS failed");
@@ -8,8 +8,12 @@ import {
   textToSpeech,
   geminiTest,
   fetchGeminiModels,
-  lookupBooks,
   importInventory,
+  uploadInventory,
+  fetchImportJob,
+  cancelImportJob,
+  resumeImportJob,
+  downloadImportErrors,
   updateInventory,
   fetchAnalytics,
   setMongoUri,
@@ -18,23 +22,26 @@ import {
   seedDemoRequests,
   fetchDbInfo,
   refreshBookCovers,
+  openAdminStream,
 } from "../api";
 import type {
   Picklist,
+  RequestChange,
   RequestItem,
   ConfigStatus,
   KeysStatus,
   Book,
   AnalyticsResponse,
-  InventoryImportResult,
+  ImportJob,
   DbInfo,
 } from "../types";
 
-const STATUS_OPTIONS = ["new", "approved", "picked", "packed", "distributed"];
+const STATUS_OPTIONS = ["new", "approved", "picked", "packed", "distributed", "cancelled"];
 
 export default function StaffPage() {
   const [statusFilter, setStatusFilter] = useState("");
   const [requests, setRequests] = useState<RequestItem[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [active, setActive] = useState<RequestItem | null>(null);
   const [picklist, setPicklist] = useState<Picklist | null>(null);
   const [config, setConfig] = useState<ConfigStatus | null>(null);
@@ -43,10 +50,10 @@ export default function StaffPage() {
   const [geminiTestResult, setGeminiTestResult] = useState<string | null>(null);
   const [geminiModel, setGeminiModel] = useState("");
   const [modelOptions, setModelOptions] = useState<string[]>([]);
-  const [matchedBooks, setMatchedBooks] = useState<Book[]>([]);
   const [analytics, setAnalytics] = useState<AnalyticsResponse | null>(null);
-  const [importResult, setImportResult] = useState<InventoryImportResult | null>(null);
+  const [importResult, setImportResult] = useState<ImportJob | null>(null);
   const [inventoryCsv, setInventoryCsv] = useState("");
+  const [inventoryFile, setInventoryFile] = useState<File | null>(null);
   const [inventoryLocation, setInventoryLocation] = useState("main");
   const [inventoryQty, setInventoryQty] = useState("1");
   const [updatingInventory, setUpdatingInventory] = useState<Record<string, string>>({});
@@ -69,8 +76,10 @@ export default function StaffPage() {
     setLoading(true);
     setError(null);
     try {
-      const data = await listRequests(statusFilter || undefined);
+      const page = await listRequests(statusFilter || undefined);
+      const data = page.items;
       setRequests(data);
+      setNextCursor(page.nextCursor);
       try {
         const analyticsData = await fetchAnalytics();
         setAnalytics(analyticsData);
@@ -129,17 +138,56 @@ export default function StaffPage() {
       .catch(() => setModelOptions([]));
   }, []);
 
+  function applyRequestChanges(changes: RequestChange[]) {
+    const visible = (status: string) => !statusFilter || status === statusFilter;
+    setRequests((prev) => {
+      let next = prev;
+      for (const change of changes) {
+        if (change.op === "insert") {
+          if (visible(change.request.status) && !next.some((item) => item.id === change.id)) {
+            next = [change.request, ...next];
+          }
+        } else if (change.op === "status") {
+          next = next
+            .map((item) => (item.id === change.id ? { ...item, status: change.status } : item))
+            .filter((item) => visible(item.status));
+        } else {
+          next = next.filter((item) => item.id !== change.id);
+        }
+      }
+      return next;
+    });
+    setActive((prev) => {
+      const change = prev ? changes.find((c) => c.id === prev.id) : undefined;
+      return prev && change?.op === "status" ? { ...prev, status: change.status } : prev;
+    });
+  }
+
   useEffect(() => {
-    const timer = setInterval(() => {
-      fetchAnalytics()
-        .then(setAnalytics)
-        .catch(() => setAnalytics(null));
-      fetchDbInfo()
-        .then(setDbInfo)
-        .catch(() => setDbInfo(null));
-    }, 30000);
-    return () => clearInterval(timer);
-  }, []);
+    return openAdminStream({
+      onRequests: (changes) => {
+        if (statusFilter && changes.some((c) => c.op === "status" && c.status === statusFilter)) {
+          loadRequests();
+        } else {
+          applyRequestChanges(changes);
+        }
+        fetchAnalytics()
+          .then(setAnalytics)
+          .catch(() => setAnalytics(null));
+        if (changes.some((c) => c.op !== "status")) {
+          fetchDbInfo()
+            .then(setDbInfo)
+            .catch(() => setDbInfo(null));
+        }
+      },
+      onInventory: () => {
+        fetchDbInfo()
+          .then(setDbInfo)
+          .catch(() => setDbInfo(null));
+      },
+      onResync: () => loadRequests(),
+    });
+  }, [statusFilter]);
 
   async function handleStatusChange(newStatus: string) {
     if (!active) return;
@@ -148,7 +196,7 @@ export default function StaffPage() {
     try {
       const updated = await updateRequestStatus(active.id, newStatus);
       setActive(updated);
-      await loadRequests();
+      applyRequestChanges([{ op: "status", id: updated.id, status: updated.status }]);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Something went wrong");
     } finally {
@@ -156,12 +204,14 @@ export default function StaffPage() {
     }
   }
 
-  async function handlePicklist(requestId: string) {
+  async function loadMoreRequests() {
+    if (!nextCursor) return;
     setLoading(true);
     setError(null);
     try {
-      const data = await fetchPicklist(requestId);
-      setPicklist(data);
+      const page = await listRequests(statusFilter || undefined, nextCursor);
+      setRequests((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Something went wrong");
     } finally {
@@ -169,32 +219,26 @@ export default function StaffPage() {
     }
   }
 
-  async function loadMatchedBooks(request: RequestItem | null) {
-    if (!request || !request.matched || request.matched.length === 0) {
-      setMatchedBooks([]);
-      return;
-    }
+  async function handlePicklist(requestId: string) {
+    setLoading(true);
+    setError(null);
     try {
-      const ids = request.matched.map((m) => m.book_id);
-      const data = await lookupBooks(ids);
-      setMatchedBooks(data.books || []);
-    } catch {
-      setMatchedBooks([]);
+      const data = await fetchPicklist(requestId);
+      setPicklist(data);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Something went wrong");
+    } finally {
+      setLoading(false);
     }
   }
 
-  useEffect(() => {
-    loadMatchedBooks(active);
-  }, [active]);
-
   async function handleReadPicklist() {
     if (!picklist) return;
     setReading(true);
     setError(null);
     try {
-      const text = `Picklist for location ${picklist.location_id}. ${picklist.lines.join(" ")}`;
-      const blob = await textToSpeech(text);
-      const url = URL.createObjectURL(blob);
+      const text = `Picklist for location ${picklist.location_id}. ${picklist.lines.join(". ")}.`;
+      const url = await textToSpeech(text);
       const audio = new Audio(url);
       audio.play();
     } catch (err) {
@@ -246,19 +290,37 @@ export default function StaffPage() {
     }
   }
 
+  async function waitForImportJob(id: string) {
+    let job = await fetchImportJob(id);
+    setImportResult(job);
+    while (job.status === "queued" || job.status === "running") {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      job = await fetchImportJob(id);
+      setImportResult(job);
+    }
+    return job;
+  }
+
   async function handleImportCsv() {
     setLoading(true);
     setError(null);
     setImportResult(null);
     try {
       const qty = Number(inventoryQty || "1");
-      const result = await importInventory({
-        csv: inventoryCsv,
+      const options = {
         location_id: inventoryLocation || "main",
         default_qty: Number.isFinite(qty) ? qty : 1,
-      });
-      setImportResult(result);
+      };
+      const { job } = inventoryFile
+        ? await uploadInventory({ file: inventoryFile, ...options })
+        : await importInventory({ csv: inventoryCsv, ...options });
+      setImportResult(job);
       setInventoryCsv("");
+      setInventoryFile(null);
+      const finished = await waitForImportJob(job.id);
+      if (finished.status === "failed") {
+        setError(finished.error || "Import failed");
+      }
       await loadRequests();
       const data = await fetchAnalytics();
       setAnalytics(data);
@@ -269,6 +331,45 @@ export default function StaffPage() {
     }
   }
 
+  async function handleCancelImport() {
+    if (!importResult) return;
+    try {
+      setImportResult(await cancelImportJob(importResult.id));
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Cancel failed");
+    }
+  }
+
+  async function handleResumeImport() {
+    if (!importResult) return;
+    setLoading(true);
+    setError(null);
+    try {
+      const job = await resumeImportJob(importResult.id);
+      setImportResult(job);
+      await waitForImportJob(job.id);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Resume failed");
+    } finally {
+      setLoading(false);
+    }
+  }
+
+  async function handleDownloadRejected() {
+    if (!importResult) return;
+    try {
+      const blob = await downloadImportErrors(importResult.id);
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = `import-${importResult.id}-rejected.csv`;
+      a.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Download failed");
+    }
+  }
+
   async function handleSaveMongoUri() {
     if (!mongoUri.trim()) return;
     setLoading(true);
@@ -395,6 +496,11 @@ export default function StaffPage() {
     }
   }
 
+  const matchedBooks = (active?.matched || []).map((match) => ({
+    id: match.book_id,
+    title: match.title || match.book_id,
+  }));
+
   return (
     <section className="panel">
       <h2>Staff Dashboard</h2>
@@ -515,19 +621,20 @@ export default function StaffPage() {
             accept=".csv,text/csv"
             onChange={(event) => {
               const file = event.target.files?.[0];
-              if (!file) return;
-              const reader = new FileReader();
-              reader.onload = () => setInventoryCsv(String(reader.result || ""));
-              reader.readAsText(file);
+              setInventoryFile(file || null);
+              if (file) setInventoryCsv("");
             }}
           />
-          <span className="muted">Or paste CSV below.</span>
+          <span className="muted">{inventoryFile ? `Selected ${inventoryFile.name}.` : "Or paste CSV below."}</span>
         </div>
         <label className="field">
           <span>Paste CSV</span>
           <textarea
             value={inventoryCsv}
-            onChange={(event) => setInventoryCsv(event.target.value)}
+            onChange={(event) => {
+              setInventoryCsv(event.target.value);
+              setInventoryFile(null);
+            }}
             rows={4}
             placeholder="title,author,tags,age_min,age_max,language,format,isbn,qty_available,location_id"
           />
@@ -546,7 +653,7 @@ export default function StaffPage() {
               onChange={(event) => setInventoryQty(event.target.value)}
             />
           </label>
-          <button onClick={handleImportCsv} disabled={loading || !inventoryCsv.trim()}>
+          <button onClick={handleImportCsv} disabled={loading || (!inventoryFile && !inventoryCsv.trim())}>
             Import CSV
           </button>
           <button className="secondary" onClick={handleDownloadTemplate}>
@@ -554,8 +661,28 @@ export default function StaffPage() {
           </button>
         </div>
         {importResult ? (
-          <div className="success">
-            Imported. New: {importResult.inserted_books}, Updated: {importResult.updated_books}, Inventory upserts: {importResult.inventory_upserts}{importResult.skipped ? `, Skipped: ${importResult.skipped}` : ""}
+          <div className={importResult.status === "failed" ? "error" : "success"}>
+            {importResult.status === "queued" || importResult.status === "running"
+              ? `Importing ${importResult.filename}: ${importResult.progress.rows_processed}${importResult.progress.total_rows !== null ? ` / ${importResult.progress.total_rows}` : ""} rows${importResult.progress.rows_per_second ? ` (${importResult.progress.rows_per_second} rows/s` + (importResult.progress.eta_seconds !== null ? `, ~${Math.ceil(importResult.progress.eta_seconds)}s left)` : ")") : ""}.`
+              : `Import ${importResult.status}.`}{" "}
+            New: {importResult.new_rows}, Changed: {importResult.changed_rows}, Unchanged: {importResult.unchanged_rows}, Inventory upserts: {importResult.inventory_upserts}{importResult.skipped ? `, Skipped: ${importResult.skipped}` : ""}{importResult.covers_pending ? `, Covers pending: ${importResult.covers_pending}` : ""}
+            <div className="field-row">
+              {importResult.status === "queued" || importResult.status === "running" ? (
+                <button className="secondary" onClick={handleCancelImport} disabled={importResult.cancel_requested}>
+                  Cancel import
+                </button>
+              ) : null}
+              {importResult.status === "cancelled" || importResult.status === "failed" || importResult.status === "interrupted" ? (
+                <button className="secondary" onClick={handleResumeImport} disabled={loading}>
+                  Resume import
+                </button>
+              ) : null}
+              {importResult.skipped ? (
+                <button className="secondary" onClick={handleDownloadRejected}>
+                  Download rejected rows
+                </button>
+              ) : null}
+            </div>
           </div>
         ) : null}
       </div>
@@ -729,6 +856,11 @@ export default function StaffPage() {
           {!loading && requests.length === 0 ? (
             <p className="muted">No requests yet.</p>
           ) : null}
+          {nextCursor ? (
+            <button className="secondary" onClick={loadMoreRequests} disabled={loading}>
+              Load more
+            </button>
+          ) : null}
         </aside>
 
         <div className="detail">
@@ -1,9 +1,10 @@
 import { useEffect, useState } from "react";
-import { fetchPicklist, listRequests, textToSpeech, updateRequestStatus } from "../api";
+import { downloadBatchPicklist, fetchPicklist, listRequests, textToSpeech, updateRequestStatus } from "../api";
 import type { Picklist, RequestItem } from "../types";
 
 export default function VolunteerPage() {
   const [requests, setRequests] = useState<RequestItem[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [active, setActive] = useState<RequestItem | null>(null);
   const [picklist, setPicklist] = useState<Picklist | null>(null);
   const [loading, setLoading] = useState(false);
@@ -15,8 +16,10 @@ export default function VolunteerPage() {
     setLoading(true);
     setError(null);
     try {
-      const data = await listRequests("approved");
+      const page = await listRequests("approved");
+      const data = page.items;
       setRequests(data);
+      setNextCursor(page.nextCursor);
       if (data.length > 0) {
         setActive(data[0]);
       } else {
@@ -34,6 +37,21 @@ export default function VolunteerPage() {
     loadRequests();
   }, []);
 
+  async function loadMoreRequests() {
+    if (!nextCursor) return;
+    setLoading(true);
+    setError(null);
+    try {
+      const page = await listRequests("approved", nextCursor);
+      setRequests((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Something went wrong");
+    } finally {
+      setLoading(false);
+    }
+  }
+
   async function handlePicklist(requestId: string) {
     setLoading(true);
     setError(null);
@@ -69,9 +87,8 @@ export default function VolunteerPage() {
     setReading(true);
     setError(null);
     try {
-      const text = `Picklist for location ${picklist.location_id}. ${picklist.lines.join(" ")}`;
-      const blob = await textToSpeech(text);
-      const url = URL.createObjectURL(blob);
+      const text = `Picklist for location ${picklist.location_id}. ${picklist.lines.join(". ")}.`;
+      const url = await textToSpeech(text);
       const audio = new Audio(url);
       audio.play();
     } catch (err) {
@@ -99,6 +116,21 @@ export default function VolunteerPage() {
     URL.revokeObjectURL(url);
   }
 
+  async function handleDownloadAll() {
+    setError(null);
+    try {
+      const blob = await downloadBatchPicklist("approved");
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = "picklist-approved.csv";
+      a.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Download failed");
+    }
+  }
+
   function handlePrint() {
     window.print();
   }
@@ -126,6 +158,9 @@ export default function VolunteerPage() {
         <button className="secondary" onClick={loadRequests} disabled={loading}>
           Refresh
         </button>
+        <button className="secondary" onClick={handleDownloadAll} disabled={loading || requests.length === 0}>
+          Download all picklists (CSV)
+        </button>
         <span className="muted">Showing approved requests only.</span>
       </div>
 
@@ -152,6 +187,11 @@ export default function VolunteerPage() {
           {!loading && requests.length === 0 ? (
             <p className="muted">No approved requests yet.</p>
           ) : null}
+          {nextCursor ? (
+            <button className="secondary" onClick={loadMoreRequests} disabled={loading}>
+              Load more
+            </button>
+          ) : null}
         </aside>
 
         <div className="detail">
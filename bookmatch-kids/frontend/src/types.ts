@@ -35,6 +35,10 @@ export type InventoryEntry = {
 export type BookMatch = {
   book_id: string;
   score: number;
+  title?: string;
+  author?: string;
+  format?: string;
+  cover_url?: string;
 };
 
 export type RequestItem = {
@@ -48,8 +52,14 @@ export type RequestItem = {
   requester_name?: string | null;
   requester_contact?: string | null;
   requester_notes?: string | null;
+  books?: Book[];
 };
 
+export type RequestChange =
+  | { op: "insert"; id: string; request: RequestItem }
+  | { op: "status"; id: string; status: string }
+  | { op: "delete"; id: string };
+
 export type Picklist = {
   request_id: string;
   location_id: string;
@@ -92,12 +102,27 @@ export type GeminiModelsResponse = {
   error?: string;
 };
 
-export type InventoryImportResult = {
-  ok: boolean;
+export type ImportJob = {
+  id: string;
+  status: "queued" | "running" | "completed" | "failed" | "cancelled" | "interrupted";
+  filename: string;
+  new_rows: number;
+  changed_rows: number;
+  unchanged_rows: number;
   inserted_books: number;
   updated_books: number;
   inventory_upserts: number;
-  skipped?: number;
+  skipped: number;
+  covers_pending: number;
+  cancel_requested: boolean;
+  error?: string | null;
+  progress: {
+    rows_processed: number;
+    total_rows: number | null;
+    percent: number | null;
+    rows_per_second: number | null;
+    eta_seconds: number | null;
+  };
 };
 
 export type AnalyticsResponse = {